@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script to backfill the client_email_index reverse index.
+Walks every superadmin/*/clients document and writes one index entry per
+normalized client email, so tenant lookups become a single document read.
+"""
+
+from models.database import get_db, COLLECTIONS
+from services.tenant_service import normalize_email
+from datetime import datetime
+import asyncio
+
+BATCH_SIZE = 500
+
+async def backfill_client_index():
+    """
+    Rebuild the client_email_index collection from the superadmin/clients tree.
+    Existing entries are overwritten; clients without an email are skipped.
+    """
+    db = get_db()
+    index_collection = db.collection(COLLECTIONS["client_email_index"])
+
+    print("Starting backfill of client email index...")
+
+    try:
+        batch = db.batch()
+        pending = 0
+        total_indexed = 0
+        seen_emails = {}
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                client_data = client_doc.to_dict()
+                email = normalize_email(client_data.get("email"))
+
+                if not email:
+                    print(f"  Skipping client without email: {client_doc.id}")
+                    continue
+
+                if email in seen_emails:
+                    print(f"  WARNING: {email} also used by {seen_emails[email]}, keeping {superadmin_doc.id}/{client_doc.id}")
+                seen_emails[email] = f"{superadmin_doc.id}/{client_doc.id}"
+
+                batch.set(index_collection.document(email), {
+                    "superadmin_id": superadmin_doc.id,
+                    "client_id": client_doc.id,
+                    "email": client_data.get("email"),
+                    "status": client_data.get("status"),
+                    "updated_at": datetime.utcnow()
+                })
+                pending += 1
+                total_indexed += 1
+
+                if pending >= BATCH_SIZE:
+                    await batch.commit()
+                    batch = db.batch()
+                    pending = 0
+
+        if pending:
+            await batch.commit()
+
+        print(f"\n✓ Backfill completed! Indexed {total_indexed} clients.")
+
+    except Exception as e:
+        print(f"Error during backfill: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(backfill_client_index())
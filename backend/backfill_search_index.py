@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Script to backfill the search tokens used by the list endpoints' search.
+Walks every superadmin/*/clients tenant and writes search_tokens on users,
+questions and surveys created before the search index existed.
+"""
+
+from models.database import get_db
+from services.search_index import SEARCH_FIELD, search_tokens
+import asyncio
+
+BATCH_SIZE = 500
+
+# Tenant subcollection -> fields that are searchable
+SEARCHABLE_FIELDS = {
+    "users": ["full_name", "email"],
+    "questions": ["text"],
+    "surveys": ["title", "description"]
+}
+
+async def backfill_search_index():
+    """
+    Recompute search_tokens for every searchable document.
+    Documents whose tokens are already current are left untouched.
+    """
+    db = get_db()
+
+    print("Starting backfill of search index...")
+
+    try:
+        batch = db.batch()
+        pending = 0
+        total_updated = 0
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                for collection_name, fields in SEARCHABLE_FIELDS.items():
+                    async for doc in client_doc.reference.collection(collection_name).stream():
+                        data = doc.to_dict()
+                        tokens = search_tokens(*(data.get(field) for field in fields))
+                        if data.get(SEARCH_FIELD) == tokens:
+                            continue
+
+                        batch.update(doc.reference, {SEARCH_FIELD: tokens})
+                        pending += 1
+                        total_updated += 1
+
+                        if pending >= BATCH_SIZE:
+                            await batch.commit()
+                            batch = db.batch()
+                            pending = 0
+
+                print(f"  Indexed client {client_doc.id}")
+
+        if pending:
+            await batch.commit()
+
+        print(f"\n✓ Backfill completed! Updated {total_updated} documents.")
+
+    except Exception as e:
+        print(f"Error during backfill: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(backfill_search_index())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Script to backfill the users_by_email index that enforces unique user emails.
+Walks every superadmin/*/clients tenant and creates an index entry for each
+user created before the index existed. Users sharing an email with an
+earlier user are reported, not indexed; resolve them by hand.
+"""
+
+from models.database import get_db
+from services.tenant_service import normalize_email
+import asyncio
+
+BATCH_SIZE = 500
+
+async def backfill_users_by_email():
+    """
+    Create the missing users_by_email entries of every client.
+    The oldest user keeps an email that is shared by several users.
+    """
+    db = get_db()
+
+    print("Starting backfill of users_by_email index...")
+
+    try:
+        total_indexed = 0
+        duplicates = []
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                index_collection = client_doc.reference.collection("users_by_email")
+
+                # Entries written since the index went live are authoritative
+                owners = {}
+                async for index_doc in index_collection.stream():
+                    owners[index_doc.id] = index_doc.to_dict().get("user_id")
+
+                users = [doc async for doc in client_doc.reference.collection("users").stream()]
+                users.sort(key=lambda doc: (doc.to_dict().get("created_at") is None, doc.to_dict().get("created_at") or 0))
+
+                batch = db.batch()
+                pending = 0
+                for user_doc in users:
+                    email = user_doc.to_dict().get("email")
+                    key = normalize_email(email)
+                    if not key:
+                        continue
+                    if key in owners:
+                        if owners[key] != user_doc.id:
+                            duplicates.append((client_doc.reference.path, email, user_doc.id, owners[key]))
+                        continue
+
+                    owners[key] = user_doc.id
+                    batch.set(index_collection.document(key), {
+                        "user_id": user_doc.id,
+                        "email": email,
+                        "created_at": user_doc.to_dict().get("created_at")
+                    })
+                    pending += 1
+                    total_indexed += 1
+
+                    if pending >= BATCH_SIZE:
+                        await batch.commit()
+                        batch = db.batch()
+                        pending = 0
+
+                if pending:
+                    await batch.commit()
+
+                print(f"  Indexed client {client_doc.id}")
+
+        for client_path, email, user_id, owner_id in duplicates:
+            print(f"  Duplicate email {email} in {client_path}: user {user_id} (kept {owner_id})")
+
+        print(f"\n✓ Backfill completed! Indexed {total_indexed} users, {len(duplicates)} duplicates reported.")
+
+    except Exception as e:
+        print(f"Error during backfill: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(backfill_users_by_email())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to build the offline gazetteer used for reverse geocoding.
+Reads the GeoNames cities15000.txt and countryInfo.txt dumps
+(https://download.geonames.org/export/dump/, CC BY 4.0) and writes
+data/gazetteer.csv with one row per populated place.
+"""
+
+import csv
+import sys
+
+from services.geocoder import GAZETTEER_PATH, GAZETTEER_COLUMNS
+
+def read_country_names(country_info_path: str) -> dict:
+    """ISO country code -> country name, from countryInfo.txt"""
+    names = {}
+    with open(country_info_path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            fields = line.rstrip("\n").split("\t")
+            names[fields[0]] = fields[4]
+    return names
+
+def build_gazetteer(cities_path: str, country_info_path: str):
+    """
+    Convert the GeoNames dumps into the bundled gazetteer CSV.
+    """
+    print("Starting gazetteer build...")
+
+    country_names = read_country_names(country_info_path)
+    places = []
+    with open(cities_path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            places.append((
+                fields[1],
+                country_names.get(fields[8], fields[8]),
+                round(float(fields[4]), 5),
+                round(float(fields[5]), 5)
+            ))
+
+    # Stable order keeps regenerated files diffable
+    places.sort(key=lambda place: (place[1], place[0], place[2], place[3]))
+
+    with open(GAZETTEER_PATH, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(GAZETTEER_COLUMNS)
+        writer.writerows(places)
+
+    print(f"\n✓ Build completed! Wrote {len(places)} places to {GAZETTEER_PATH}.")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python build_gazetteer.py cities15000.txt countryInfo.txt")
+        sys.exit(1)
+    build_gazetteer(sys.argv[1], sys.argv[2])
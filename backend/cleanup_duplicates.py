@@ -24,14 +24,14 @@ async def cleanup_duplicate_assignments():
         
         total_duplicates_removed = 0
         
-        for superadmin_doc in superadmin_docs:
+        async for superadmin_doc in superadmin_docs:
             print(f"Checking superadmin: {superadmin_doc.id}")
             
             # Get all clients under this superadmin
             clients_collection = superadmin_doc.reference.collection("clients")
             clients_docs = clients_collection.stream()
             
-            for client_doc in clients_docs:
+            async for client_doc in clients_docs:
                 print(f"  Checking client: {client_doc.id}")
                 
                 # Get all assignments for this client
@@ -41,7 +41,7 @@ async def cleanup_duplicate_assignments():
                 # Group assignments by user_id + survey_id combination
                 assignment_groups = {}
                 
-                for assignment_doc in assignments_docs:
+                async for assignment_doc in assignments_docs:
                     assignment_data = assignment_doc.to_dict()
                     user_id = assignment_data.get("user_id")
                     survey_id = assignment_data.get("survey_id")
@@ -75,7 +75,7 @@ async def cleanup_duplicate_assignments():
                         # Keep the first (most recent) and delete the rest
                         for assignment in assignments[1:]:
                             print(f"      Removing duplicate: {assignment['doc_id']}")
-                            assignment["doc_ref"].delete()
+                            await assignment["doc_ref"].delete()
                             client_duplicates_removed += 1
                 
                 if client_duplicates_removed > 0:
@@ -135,4 +135,219 @@ exports.deleteUser = functions.https.onCall(async (data, context) => {
     console.error('Error stack:', error.stack);
     throw new functions.https.HttpsError('internal', error.message);
   }
-});
\ No newline at end of file
+});
+// Keep the client_email_index reverse index and the client admin's tenant claims
+// in sync with client documents so the backend can resolve tenants cheaply.
+const normalizeEmail = (email) => (email || '').trim().toLowerCase();
+
+exports.syncClientEmailIndex = functions.firestore
+  .document('superadmin/{superadminId}/clients/{clientId}')
+  .onWrite(async (change, context) => {
+    const { superadminId, clientId } = context.params;
+    const before = change.before.exists ? change.before.data() : null;
+    const after = change.after.exists ? change.after.data() : null;
+    const indexRef = admin.firestore().collection('client_email_index');
+
+    const oldEmail = before ? normalizeEmail(before.email) : '';
+    const newEmail = after ? normalizeEmail(after.email) : '';
+
+    // Email changed or client deleted: drop the stale entry
+    if (oldEmail && oldEmail !== newEmail) {
+      await indexRef.doc(oldEmail).delete();
+      console.log('Removed client index entry:', oldEmail);
+    }
+
+    if (newEmail) {
+      await indexRef.doc(newEmail).set({
+        superadmin_id: superadminId,
+        client_id: clientId,
+        email: after.email,
+        status: after.status || null,
+        updated_at: admin.firestore.FieldValue.serverTimestamp(),
+      });
+      console.log('Updated client index entry:', newEmail);
+
+      // Client documents are keyed by the client admin's Auth UID; carry the tenant
+      // identity in custom claims so API requests can skip the tenant lookup.
+      try {
+        const userRecord = await admin.auth().getUser(clientId);
+        const claims = userRecord.customClaims || {};
+        if (claims.superadmin_id !== superadminId || claims.client_id !== clientId) {
+          await admin.auth().setCustomUserClaims(clientId, {
+            ...claims,
+            superadmin_id: superadminId,
+            client_id: clientId,
+          });
+          console.log('Set tenant claims for client:', clientId);
+        }
+      } catch (error) {
+        console.log('Skipping tenant claims for client', clientId, '-', error.message);
+      }
+    }
+
+    return null;
+  });
+
+// Keep each survey's result rollup (surveys/{surveyId}/rollup_shards/{generation}-{n}) up
+// to date as responses are written, so result views never re-read the responses. Each
+// write increments one random shard of the generation in rollup_meta/{surveyId}; the
+// backend adds up the shards of its ready_generation when reading.
+// Triggers are delivered at least once and in any order, so every response has a marker
+// (surveys/{surveyId}/rollup_applied/{responseId}) holding the answers its rollup counts.
+// A transaction moves the rollup from the marker to the response as it is now, which
+// makes redelivered and out-of-order events no-ops.
+// Keep in sync with services/results_service.py.
+const ROLLUP_SHARDS = 10;
+const ROLLUP_MARKERS = 'rollup_applied';
+const ROLLUP_META = 'rollup_meta';
+const MAX_ROLLUP_KEY_LENGTH = 200;
+const YES_VALUES = ['yes', 'y', 'true', '1'];
+const NO_VALUES = ['no', 'n', 'false', '0'];
+const QUESTION_TYPE_TTL_MS = 5 * 60 * 1000;
+
+// Question ID -> { type, expiresAt }, per function instance
+const questionTypeCache = new Map();
+
+const answersMap = (answers) => {
+  if (Array.isArray(answers)) {
+    const map = {};
+    answers.forEach((item) => {
+      if (item && typeof item === 'object') map[item.question_id] = item.answer;
+    });
+    return map;
+  }
+  return answers && typeof answers === 'object' ? answers : {};
+};
+
+const isAnswered = (value) =>
+  value !== null && value !== undefined && value !== '' && !(Array.isArray(value) && value.length === 0);
+
+const rollupKey = (value) => String(value).trim().slice(0, MAX_ROLLUP_KEY_LENGTH);
+
+const getQuestionTypes = async (questionsRef, questionIds) => {
+  const now = Date.now();
+  const types = {};
+  const missing = [];
+  questionIds.forEach((questionId) => {
+    const cached = questionTypeCache.get(questionId);
+    if (cached && cached.expiresAt > now) types[questionId] = cached.type;
+    else missing.push(questionId);
+  });
+
+  if (missing.length) {
+    const docs = await admin.firestore().getAll(...missing.map((questionId) => questionsRef.doc(questionId)));
+    docs.forEach((doc) => {
+      const type = doc.exists ? doc.data().type : null;
+      questionTypeCache.set(doc.id, { type, expiresAt: now + QUESTION_TYPE_TTL_MS });
+      types[doc.id] = type;
+    });
+  }
+  return types;
+};
+
+// Add one response's contribution (sign +1 or -1) to the pending rollup deltas
+const addToRollup = (delta, answers, types, sign) => {
+  Object.entries(answers).forEach(([questionId, value]) => {
+    const type = types[questionId];
+    if (!type || !isAnswered(value)) return;
+
+    const entry = delta.questions[questionId] = delta.questions[questionId] || { answered: 0, sum: 0, numeric: 0, counts: {} };
+    const count = (key) => { entry.counts[key] = (entry.counts[key] || 0) + sign; };
+    entry.answered += sign;
+
+    if (type === 'multiple_choice') {
+      (Array.isArray(value) ? value : [value]).forEach((option) => {
+        // Blank answers are no option, and Firestore rejects empty map keys
+        const key = rollupKey(option);
+        if (key) count(key);
+      });
+    } else if (type === 'rating') {
+      const rating = Number(value);
+      if (Number.isFinite(rating)) {
+        entry.sum += sign * rating;
+        entry.numeric += sign;
+        count(String(Math.floor(rating + 0.5)));
+      }
+    } else if (type === 'yes_no') {
+      const answer = String(value).trim().toLowerCase();
+      if (YES_VALUES.includes(answer)) count('yes');
+      else if (NO_VALUES.includes(answer)) count('no');
+    }
+  });
+};
+
+exports.rollupSurveyResponse = functions.firestore
+  .document('superadmin/{superadminId}/clients/{clientId}/surveys/{surveyId}/responses/{responseId}')
+  .onWrite(async (change, context) => {
+    const { superadminId, clientId, surveyId, responseId } = context.params;
+    const db = admin.firestore();
+    const clientRef = db.doc(`superadmin/${superadminId}/clients/${clientId}`);
+    const surveyRef = clientRef.collection('surveys').doc(surveyId);
+    const responseRef = surveyRef.collection('responses').doc(responseId);
+    const markerRef = surveyRef.collection(ROLLUP_MARKERS).doc(responseId);
+    const metaRef = clientRef.collection(ROLLUP_META).doc(surveyId);
+
+    await db.runTransaction(async (transaction) => {
+      const [survey, meta, marker, response] = await transaction.getAll(surveyRef, metaRef, markerRef, responseRef);
+
+      // Surveys being deleted, and surveys whose rollup was never built, are left alone
+      const generation = meta.exists ? meta.data().generation : null;
+      if (!survey.exists || survey.data().deleting || !generation) return;
+
+      // A marker from an older generation means the current rollup has not counted the response yet
+      const markerData = marker.exists ? marker.data() : null;
+      const counted = markerData && markerData.generation === generation ? markerData.answers || {} : null;
+      const current = response.exists ? answersMap(response.data().answers) : null;
+      if (!counted && !current) return;
+
+      const questionIds = [...new Set([...Object.keys(counted || {}), ...Object.keys(current || {})])];
+      const types = await getQuestionTypes(clientRef.collection('questions'), questionIds);
+
+      const delta = { responses: (current ? 1 : 0) - (counted ? 1 : 0), questions: {} };
+      if (counted) addToRollup(delta, counted, types, -1);
+      if (current) addToRollup(delta, current, types, 1);
+
+      // Only non-zero changes are written, as increments
+      const increment = admin.firestore.FieldValue.increment;
+      const update = {};
+      if (delta.responses) update.responses = increment(delta.responses);
+      Object.entries(delta.questions).forEach(([questionId, entry]) => {
+        const fields = {};
+        ['answered', 'sum', 'numeric'].forEach((field) => {
+          if (entry[field]) fields[field] = increment(entry[field]);
+        });
+        const counts = {};
+        Object.entries(entry.counts).forEach(([key, count]) => {
+          if (count) counts[key] = increment(count);
+        });
+        if (Object.keys(counts).length) fields.counts = counts;
+        if (Object.keys(fields).length) {
+          update.questions = update.questions || {};
+          update.questions[questionId] = fields;
+        }
+      });
+
+      if (Object.keys(update).length) {
+        const shard = Math.floor(Math.random() * ROLLUP_SHARDS);
+        transaction.set(surveyRef.collection('rollup_shards').doc(`${generation}-${shard}`), update, { merge: true });
+      }
+      if (current) transaction.set(markerRef, { generation, answers: current });
+      else transaction.delete(markerRef);
+    });
+    return null;
+  });
+
+// Surveys created in the console UI start with a complete, empty rollup, as API-created ones do
+exports.initSurveyRollup = functions.firestore
+  .document('superadmin/{superadminId}/clients/{clientId}/surveys/{surveyId}')
+  .onCreate(async (snapshot, context) => {
+    const { superadminId, clientId, surveyId } = context.params;
+    const metaRef = admin.firestore().doc(`superadmin/${superadminId}/clients/${clientId}/${ROLLUP_META}/${surveyId}`);
+    try {
+      await metaRef.create({ generation: 1, ready_generation: 1 });
+    } catch (error) {
+      // Already written by the backend with the survey (ALREADY_EXISTS)
+      if (error.code !== 6) throw error;
+    }
+    return null;
+  });
@@ -8,9 +8,12 @@ from typing import List, Optional
 import uvicorn
 
 from models.database import init_firebase
-from routers import users, questions, surveys, assignments
+from routers import users, questions, surveys, assignments, stats, jobs, clients
 from firebase_admin import auth as firebase_auth
-from middleware.auth import verify_firebase_token, get_current_user_email
+from middleware.auth import verify_firebase_token, get_current_user_email, get_superadmin_email, token_cache
+from services.tenant_service import invalidate_client, tenant_cache
+from services.auth_executor import run_auth_call, auth_executor
+from services.geocoder import geocoder
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -47,12 +50,15 @@ app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(questions.router, prefix="/api/questions", tags=["questions"])
 app.include_router(surveys.router, prefix="/api/surveys", tags=["surveys"])
 app.include_router(assignments.router, prefix="/api/assignments", tags=["assignments"])
+app.include_router(stats.router, prefix="/api/stats", tags=["stats"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(clients.router, prefix="/api/superadmin", tags=["clients"])
 
 @app.get("/api/test-user/{user_id}")
 async def test_user_exists(user_id: str):
     """Test if user exists in Firebase Auth"""
     try:
-        user = firebase_auth.get_user(user_id)
+        user = await run_auth_call(firebase_auth.get_user, user_id)
         return {"success": True, "exists": True, "email": user.email}
     except firebase_auth.UserNotFoundError:
         return {"success": True, "exists": False}
@@ -65,13 +71,14 @@ async def delete_client_from_auth(user_id: str):
     try:
         # First check if user exists
         try:
-            user = firebase_auth.get_user(user_id)
+            user = await run_auth_call(firebase_auth.get_user, user_id)
             print(f"Found user: {user.email} with UID: {user_id}")
         except firebase_auth.UserNotFoundError:
             return {"success": False, "message": "User not found in Firebase Auth", "error": "USER_NOT_FOUND"}
         
         # Delete the user
-        firebase_auth.delete_user(user_id)
+        await run_auth_call(firebase_auth.delete_user, user_id)
+        invalidate_client(user.email)
         print(f"Successfully deleted user with UID: {user_id}")
         return {"success": True, "message": "User deleted from Firebase Auth"}
     except firebase_auth.UserNotFoundError:
@@ -88,6 +95,16 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics(current_user_email: str = Depends(get_superadmin_email)):
+    """Runtime counters for the Firebase Auth executor, the request caches and the geocoder"""
+    return {
+        "auth_executor": auth_executor.stats(),
+        "token_cache": token_cache.stats(),
+        "tenant_cache": tenant_cache.stats(),
+        "geocoder": geocoder.stats()
+    }
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -1,19 +1,99 @@
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, status, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from firebase_admin import auth
+from collections import OrderedDict
+from typing import Optional
+import hashlib
 import logging
+import os
+import threading
+import time
+
+from services.tenant_service import TenantService, TenantContext, CLIENT_INACTIVE_STATUS
+from services.auth_executor import run_auth_call
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
+CLOCK_SKEW_SECONDS = 60
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+# Accounts allowed to manage client admins (comma-separated); required, superadmin endpoints are refused without it
+SUPERADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("SUPERADMIN_EMAILS", "").split(",") if email.strip()
+}
+if not SUPERADMIN_EMAILS:
+    logger.warning("SUPERADMIN_EMAILS is not set: all superadmin endpoints will be refused")
+
+class TokenCache:
+    """Bounded LRU cache of verified ID token claims, keyed by a hash of the token"""
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, decoded_token = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decoded_token
+
+    def set(self, token: str, decoded_token: dict):
+        # Same window verify_id_token accepts: the token's exp plus the clock skew
+        expires_at = decoded_token.get("exp", 0) + CLOCK_SKEW_SECONDS
+        if expires_at <= time.time():
+            return
+        key = self.token_key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, decoded_token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Process-wide cache of verified tokens
+token_cache = TokenCache()
+
 async def verify_firebase_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify Firebase ID token and return user info"""
     try:
         print(f"DEBUG: Verifying token for request")
         print(f"DEBUG: Token length: {len(credentials.credentials)}")
         
-        # Verify the ID token with clock skew tolerance
-        decoded_token = auth.verify_id_token(credentials.credentials, clock_skew_seconds=60)
+        # Reuse the claims of a token already verified by this process
+        decoded_token = token_cache.get(credentials.credentials)
+        if decoded_token is None:
+            # Verify the ID token with clock skew tolerance
+            decoded_token = await run_auth_call(
+                auth.verify_id_token, credentials.credentials, clock_skew_seconds=CLOCK_SKEW_SECONDS
+            )
+            token_cache.set(credentials.credentials, decoded_token)
         
         # Extract user information
         user_info = {
@@ -21,6 +101,9 @@ async def verify_firebase_token(credentials: HTTPAuthorizationCredentials = Depe
             "email": decoded_token.get("email"),
             "email_verified": decoded_token.get("email_verified", False),
             "name": decoded_token.get("name"),
+            # Tenant custom claims, present on client admin tokens minted after provisioning
+            "superadmin_id": decoded_token.get("superadmin_id"),
+            "client_id": decoded_token.get("client_id"),
         }
         
         print(f"DEBUG: Token verified for user: {user_info['email']}")
@@ -59,8 +142,52 @@ async def get_current_user_email(user_info: dict = Depends(verify_firebase_token
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email not found in token"
         )
+    
     return user_info["email"]
 
+async def get_tenant_context(
+    background_tasks: BackgroundTasks,
+    user_info: dict = Depends(verify_firebase_token),
+    current_user_email: str = Depends(get_current_user_email)
+) -> TenantContext:
+    """Resolve the client admin's tenant once per request for all service calls"""
+    tenant_service = TenantService()
+    has_claims = bool(user_info.get("superadmin_id") and user_info.get("client_id"))
+    if has_claims:
+        # Claims are set by the Admin SDK only, so the index lookup can be skipped
+        await tenant_service.remember_client(current_user_email, user_info["superadmin_id"], user_info["client_id"])
+    
+    tenant = await tenant_service.get_context(current_user_email)
+    
+    if tenant.status == CLIENT_INACTIVE_STATUS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Client account is deactivated"
+        )
+    
+    # Token predates the claims: write them once per process, after this request
+    if tenant.is_resolved and not has_claims and tenant_service.start_claims_provisioning(user_info["uid"]):
+        background_tasks.add_task(tenant_service.set_client_claims, user_info["uid"], tenant.superadmin_id, tenant.client_id)
+    
+    return tenant
+
+async def get_superadmin_email(
+    user_info: dict = Depends(verify_firebase_token),
+    current_user_email: str = Depends(get_current_user_email)
+) -> str:
+    """Require the caller to be a superadmin with a verified email"""
+    if not SUPERADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Superadmin access is not configured"
+        )
+    if not user_info.get("email_verified") or current_user_email.strip().lower() not in SUPERADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Superadmin access required"
+        )
+    return current_user_email
+
 # Optional authentication (for public endpoints that can benefit from user context)
 async def optional_auth(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(auto_error=False))):
     """Optional authentication that doesn't raise error if no token provided"""
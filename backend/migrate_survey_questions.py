@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Script to migrate survey structure into the survey documents.
+For every survey without a question_ids array, copies its survey_questions
+mappings (in order) onto the survey and deletes the mappings. Surveys created
+from the client console keep their list in their own questions field.
+"""
+
+from models.database import get_db
+from services.survey_service import is_console_survey
+import asyncio
+
+BATCH_SIZE = 500
+
+async def migrate_survey_questions():
+    """
+    Embed the ordered question list in each legacy survey document.
+    Surveys that already have question_ids are skipped, so the script can be re-run.
+    """
+    db = get_db()
+
+    print("Starting migration of survey questions...")
+
+    try:
+        total_migrated = 0
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                # Group this client's mappings by survey in a single pass
+                mappings_by_survey = {}
+                async for mapping_doc in client_doc.reference.collection("survey_questions").stream():
+                    mapping = mapping_doc.to_dict()
+                    mappings_by_survey.setdefault(mapping.get("survey_id"), []).append((mapping, mapping_doc.reference))
+
+                async for survey_doc in client_doc.reference.collection("surveys").stream():
+                    survey_data = survey_doc.to_dict()
+                    if "question_ids" in survey_data or is_console_survey(survey_data):
+                        continue
+
+                    mappings = sorted(mappings_by_survey.get(survey_doc.id, []), key=lambda item: item[0].get("order", 0))
+                    question_ids = list(dict.fromkeys(mapping["question_id"] for mapping, _ in mappings))
+
+                    # The survey update goes in the first batch, so the mappings are only
+                    # removed once the embedded list is stored
+                    refs = [ref for _, ref in mappings]
+                    batch = db.batch()
+                    batch.update(survey_doc.reference, {
+                        "question_ids": question_ids,
+                        "question_count": len(question_ids)
+                    })
+                    pending = 1
+                    for ref in refs:
+                        if pending >= BATCH_SIZE:
+                            await batch.commit()
+                            batch = db.batch()
+                            pending = 0
+                        batch.delete(ref)
+                        pending += 1
+                    await batch.commit()
+
+                    print(f"  Migrated survey {survey_doc.id}: {len(question_ids)} questions")
+                    total_migrated += 1
+
+        print(f"\n✓ Migration completed! Migrated {total_migrated} surveys.")
+
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(migrate_survey_questions())
@@ -3,8 +3,8 @@ from firebase_admin import credentials, firestore
 import os
 from typing import Optional
 
-# Global Firestore client
-db: Optional[firestore.Client] = None
+# Global Firestore client (async, so request handlers never block the event loop)
+db: Optional[firestore.AsyncClient] = None
 
 def init_firebase():
     """Initialize Firebase Admin SDK"""
@@ -39,9 +39,17 @@ def init_firebase():
     else:
         raise FileNotFoundError("Firebase credentials not found. Set environment variables or provide serviceAccountKey.json")
     
-    db = firestore.client()
+    db = create_async_client()
     return db
 
+def create_async_client() -> firestore.AsyncClient:
+    """Create an async Firestore client sharing the Admin SDK app's credentials"""
+    app = firebase_admin.get_app()
+    return firestore.AsyncClient(
+        project=app.project_id,
+        credentials=app.credential.get_credential()
+    )
+
 def get_db():
     """Get Firestore database instance"""
     global db
@@ -64,5 +72,7 @@ COLLECTIONS = {
     "survey_questions": "survey_questions",
     "survey_assignments": "survey_assignments",
     "survey_responses": "survey_responses",
-    "client_admins": "client_admins"
+    "client_admins": "client_admins",
+    "client_email_index": "client_email_index",
+    "jobs": "jobs"
 }
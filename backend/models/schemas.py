@@ -37,6 +37,19 @@ class User(UserBase):
     updated_at: datetime
     created_by: str  # Client admin email
 
+class UserImportRow(BaseModel):
+    row: int
+    email: Optional[str] = None
+    status: str  # created, duplicate_in_file, already_exists, invalid or failed
+    user_id: Optional[str] = None
+    error: Optional[str] = None
+
+class UserImportResult(BaseModel):
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    rows: List[UserImportRow] = []
+
 # Question Models
 class QuestionOption(BaseModel):
     id: str
@@ -86,6 +99,7 @@ class Survey(SurveyBase):
     updated_at: datetime
     created_by: str  # Client admin email
     question_count: int = 0
+    question_ids: List[str] = []  # Ordered question IDs, the survey's structure
 
 class SurveyWithQuestions(Survey):
     questions: List[Question] = []
@@ -116,6 +130,20 @@ class SurveyAssignment(BaseModel):
     assigned_at: datetime
     assigned_by: str  # Client admin email
 
+class AssignmentOutcome(BaseModel):
+    user_id: str
+    status: str  # assigned, already_assigned, user_not_found or failed
+    assignment_id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkAssignmentResult(BaseModel):
+    survey_id: str
+    assigned: int = 0
+    skipped: int = 0
+    failed: int = 0
+    assignments: List[SurveyAssignment] = []
+    outcomes: List[AssignmentOutcome] = []
+
 # Survey Response Models
 class ResponseAnswer(BaseModel):
     question_id: str
@@ -131,6 +159,39 @@ class SurveyResponse(SurveyResponseCreate):
     submitted_at: datetime
     is_complete: bool = True
 
+class EnrichedAnswer(BaseModel):
+    question_id: str
+    question_text: Optional[str] = None
+    answer: Any
+
+class EnrichedResponse(BaseModel):
+    id: str
+    user_id: Optional[str] = None
+    user_name: Optional[str] = None
+    submitted_at: Optional[Any] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location_name: Optional[str] = None  # Nearest place, from the offline gazetteer
+    answers: List[EnrichedAnswer] = []  # In survey question order
+
+# Survey Results Models
+class AnswerCount(BaseModel):
+    value: str
+    count: int
+
+class QuestionResult(BaseModel):
+    question_id: str
+    text: str
+    type: QuestionType
+    answered: int = 0
+    distribution: List[AnswerCount] = []  # Choice counts, yes/no split or rating histogram
+    mean: Optional[float] = None  # Rating questions only
+
+class SurveyResults(BaseModel):
+    survey_id: str
+    total_responses: int = 0
+    questions: List[QuestionResult] = []
+
 # Client Admin Models
 class ClientAdminProfile(BaseModel):
     company_name: str = Field(..., min_length=1, max_length=100)
@@ -147,6 +208,25 @@ class ClientAdmin(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+# Background Job Models
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class Job(BaseModel):
+    id: str
+    type: str
+    status: JobStatus = JobStatus.PENDING
+    owner: str  # Email of the user who started the job
+    target: Dict[str, Any] = {}
+    progress: Dict[str, int] = {}
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
 # API Response Models
 class APIResponse(BaseModel):
     success: bool
@@ -159,3 +239,5 @@ class PaginatedResponse(BaseModel):
     page: int
     size: int
     pages: int
+    next_cursor: Optional[str] = None  # Opaque token for the next page, None on the last page
+    total_is_approximate: bool = False  # True when total is a lower bound (capped search counts)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the per-tenant counter documents.
+Recounts users, questions, surveys and assignments for every client and
+overwrites superadmin/*/clients/*/stats/counters, repairing any drift.
+"""
+
+from models.database import get_db
+from services.tenant_service import TenantService
+from services.counter_service import CounterService
+import asyncio
+
+async def rebuild_counters():
+    """
+    Recount every client's collections and rewrite its counters document.
+    """
+    db = get_db()
+    tenant_service = TenantService()
+    counter_service = CounterService()
+
+    print("Starting rebuild of tenant counters...")
+
+    try:
+        total_clients = 0
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                client_data = client_doc.to_dict()
+                tenant = tenant_service.build_tenant(superadmin_doc.id, client_doc.id, client_data.get("email"))
+                counters = await counter_service.rebuild(tenant)
+                print(f"  {client_data.get('email')}: {counters.get('users_total', 0)} users, "
+                      f"{counters.get('questions_total', 0)} questions, {counters.get('surveys_total', 0)} surveys, "
+                      f"{counters.get('assignments_total', 0)} assignments")
+                total_clients += 1
+
+        print(f"\n✓ Rebuild completed! Recounted {total_clients} clients.")
+
+    except Exception as e:
+        print(f"Error during rebuild: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_counters())
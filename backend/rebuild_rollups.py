@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the per-survey result rollups.
+Re-counts the responses of every survey of every client into a new generation
+of superadmin/*/clients/*/surveys/*/rollup_shards, repairing any drift.
+"""
+
+from models.database import get_db
+from services.tenant_service import TenantService
+from services.results_service import ResultsService
+from services.pagination import DOCUMENT_ID
+import asyncio
+
+async def rebuild_rollups():
+    """
+    Re-count every survey's responses into a new rollup generation.
+    """
+    db = get_db()
+    tenant_service = TenantService()
+    results_service = ResultsService()
+
+    print("Starting rebuild of survey result rollups...")
+
+    try:
+        total_surveys = 0
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                client_data = client_doc.to_dict()
+                tenant = tenant_service.build_tenant(superadmin_doc.id, client_doc.id, client_data.get("email"))
+
+                async for survey_doc in tenant.collection("surveys").select([DOCUMENT_ID]).stream():
+                    # Through the survey's rebuild job, so a rebuild already running is not superseded
+                    job, created = await results_service.start_rebuild(survey_doc.id, tenant)
+                    if not job:
+                        continue
+                    if not created:
+                        print(f"  {client_data.get('email')} / {survey_doc.id}: rebuild already in progress (job {job.id})")
+                        continue
+                    await results_service.job_service.run(job, results_service.rebuild_survey_rollup, survey_doc.id, tenant)
+                    print(f"  {client_data.get('email')} / {survey_doc.id}: {job.progress.get('responses', 0)} responses")
+                    total_surveys += 1
+
+        print(f"\n✓ Rebuild completed! Rebuilt {total_surveys} survey rollups.")
+
+    except Exception as e:
+        print(f"Error during rebuild: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_rollups())
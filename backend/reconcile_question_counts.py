@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Script to reconcile survey question counts.
+question_count is written together with each survey's question list; this job
+recomputes it from the list and fixes surveys edited before that, or by hand.
+"""
+
+from models.database import get_db
+from services.tenant_service import TenantService
+from services.survey_service import SurveyService, survey_fields
+import asyncio
+
+async def reconcile_question_counts():
+    """
+    Compare every survey's question_count with its question list and repair mismatches.
+    Each fix only applies if the survey has not changed since it was read.
+    """
+    db = get_db()
+    tenant_service = TenantService()
+    survey_service = SurveyService()
+
+    print("Starting reconciliation of survey question counts...")
+
+    try:
+        total_checked = 0
+        total_fixed = 0
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                tenant = tenant_service.build_tenant(superadmin_doc.id, client_doc.id, client_doc.to_dict().get("email"))
+
+                async for survey_doc in tenant.collection("surveys").stream():
+                    stored_count = survey_fields(survey_doc.to_dict()).get("question_count")
+                    try:
+                        actual_count = await survey_service.reconcile_question_count(survey_doc, tenant)
+                    except Exception as e:
+                        print(f"  Skipping survey {survey_doc.id} (changed while reconciling): {e}")
+                        continue
+
+                    total_checked += 1
+                    if stored_count != actual_count:
+                        total_fixed += 1
+
+        print(f"\n✓ Reconciliation completed! Checked {total_checked} surveys, fixed {total_fixed}.")
+
+    except Exception as e:
+        print(f"Error during reconciliation: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(reconcile_question_counts())
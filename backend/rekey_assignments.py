@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Script to rekey survey assignments to deterministic document IDs.
+Moves every assignment to {survey_id}_{user_id}, merging duplicates (the most
+recent assignment wins, as in cleanup_duplicates.py), and recounts the
+assignment counters of every client that changed.
+"""
+
+from models.database import get_db
+from services.tenant_service import TenantService
+from services.counter_service import CounterService
+from services.assignment_service import assignment_id
+import asyncio
+
+BATCH_SIZE = 500
+
+async def rekey_assignments():
+    """
+    Rewrite legacy random-ID assignments under their deterministic IDs.
+    Assignments already stored under their deterministic ID are left as they are.
+    """
+    db = get_db()
+    tenant_service = TenantService()
+    counter_service = CounterService()
+
+    print("Starting rekey of survey assignments...")
+
+    try:
+        total_moved = 0
+        total_duplicates_removed = 0
+
+        async for superadmin_doc in db.collection("superadmin").stream():
+            print(f"Checking superadmin: {superadmin_doc.id}")
+
+            async for client_doc in superadmin_doc.reference.collection("clients").stream():
+                assignments_collection = client_doc.reference.collection("survey_assignments")
+
+                # Group assignments by their deterministic ID
+                assignment_groups = {}
+                async for assignment_doc in assignments_collection.stream():
+                    assignment_data = assignment_doc.to_dict()
+                    if not assignment_data.get("survey_id") or not assignment_data.get("user_id"):
+                        continue
+                    key = assignment_id(assignment_data["survey_id"], assignment_data["user_id"])
+                    assignment_groups.setdefault(key, []).append(assignment_doc)
+
+                batch = db.batch()
+                pending = 0
+                client_changed = False
+
+                for key, assignment_docs in assignment_groups.items():
+                    if len(assignment_docs) == 1 and assignment_docs[0].id == key:
+                        continue
+
+                    # Keep the most recent assignment under the deterministic ID, delete the rest
+                    assignment_docs.sort(key=lambda doc: (doc.to_dict().get("assigned_at") is not None, doc.to_dict().get("assigned_at")), reverse=True)
+                    keep_data = assignment_docs[0].to_dict()
+                    keep_data["id"] = key
+
+                    if pending + len(assignment_docs) + 1 > BATCH_SIZE:
+                        await batch.commit()
+                        batch = db.batch()
+                        pending = 0
+
+                    batch.set(assignments_collection.document(key), keep_data)
+                    pending += 1
+                    for assignment_doc in assignment_docs:
+                        if assignment_doc.id != key:
+                            batch.delete(assignment_doc.reference)
+                            pending += 1
+
+                    total_moved += 1
+                    total_duplicates_removed += len(assignment_docs) - 1
+                    client_changed = True
+
+                if pending:
+                    await batch.commit()
+
+                if client_changed:
+                    print(f"  Rekeyed assignments for client {client_doc.id}")
+                    tenant = tenant_service.build_tenant(superadmin_doc.id, client_doc.id, client_doc.to_dict().get("email"))
+                    await counter_service.rebuild(tenant)
+
+        print(f"\n✓ Rekey completed! Moved {total_moved} assignments, removed {total_duplicates_removed} duplicates.")
+
+    except Exception as e:
+        print(f"Error during rekey: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(rekey_assignments())
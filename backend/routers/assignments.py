@@ -5,27 +5,33 @@ from models.schemas import (
     SurveyAssignment, SurveyAssignmentCreate, SurveyAssignmentUpdate,
     APIResponse, PaginatedResponse
 )
-from middleware.auth import get_current_user_email
+from middleware.auth import get_tenant_context
 from services.assignment_service import AssignmentService
+from services.tenant_service import TenantContext
+from services.pagination import InvalidCursorError
 
 router = APIRouter()
 
 @router.post("/", response_model=APIResponse)
 async def assign_survey_to_users(
     assignment_data: SurveyAssignmentCreate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Assign a survey to multiple users"""
     try:
         assignment_service = AssignmentService()
-        assignments = await assignment_service.assign_survey_to_users(
-            assignment_data, current_user_email
+        result = await assignment_service.assign_survey_to_users(
+            assignment_data, tenant
         )
         
+        message = f"Survey assigned to {result.assigned} users successfully"
+        if result.skipped or result.failed:
+            message += f" ({result.skipped} skipped, {result.failed} failed)"
+        
         return APIResponse(
-            success=True,
-            message=f"Survey assigned to {len(assignments)} users successfully",
-            data=[assignment.dict() for assignment in assignments]
+            success=result.failed == 0,
+            message=message,
+            data=result.dict()
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -39,29 +45,32 @@ async def get_assignments(
     survey_id: Optional[str] = Query(None),
     user_id: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
-    current_user_email: str = Depends(get_current_user_email)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get paginated list of survey assignments"""
     try:
         assignment_service = AssignmentService()
         result = await assignment_service.get_assignments(
-            current_user_email, page, size, survey_id, user_id, is_active
+            tenant, page, size, survey_id, user_id, is_active, cursor
         )
         
         return result
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/survey/{survey_id}", response_model=APIResponse)
 async def get_survey_assignments(
     survey_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get all assignments for a specific survey"""
     try:
         assignment_service = AssignmentService()
         assignments = await assignment_service.get_survey_assignments(
-            survey_id, current_user_email
+            survey_id, tenant
         )
         
         return APIResponse(
@@ -75,13 +84,13 @@ async def get_survey_assignments(
 @router.get("/user/{user_id}", response_model=APIResponse)
 async def get_user_assignments(
     user_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get all assignments for a specific user"""
     try:
         assignment_service = AssignmentService()
         assignments = await assignment_service.get_user_assignments(
-            user_id, current_user_email
+            user_id, tenant
         )
         
         return APIResponse(
@@ -96,13 +105,13 @@ async def get_user_assignments(
 async def update_assignment(
     assignment_id: str,
     assignment_data: SurveyAssignmentUpdate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Update a survey assignment"""
     try:
         assignment_service = AssignmentService()
         assignment = await assignment_service.update_assignment(
-            assignment_id, assignment_data, current_user_email
+            assignment_id, assignment_data, tenant
         )
         
         if not assignment:
@@ -121,13 +130,13 @@ async def update_assignment(
 @router.delete("/{assignment_id}", response_model=APIResponse)
 async def delete_assignment(
     assignment_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Delete a survey assignment"""
     try:
         assignment_service = AssignmentService()
         success = await assignment_service.delete_assignment(
-            assignment_id, current_user_email
+            assignment_id, tenant
         )
         
         if not success:
@@ -146,13 +155,13 @@ async def delete_assignment(
 async def remove_user_from_survey(
     survey_id: str,
     user_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Remove a user from a survey"""
     try:
         assignment_service = AssignmentService()
         success = await assignment_service.remove_user_from_survey(
-            survey_id, user_id, current_user_email
+            survey_id, user_id, tenant
         )
         
         if not success:
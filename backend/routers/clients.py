@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from google.api_core.exceptions import FailedPrecondition
+
+from models.schemas import APIResponse
+from middleware.auth import get_superadmin_email
+from services.client_service import ClientService
+
+router = APIRouter()
+
+async def set_client_status(
+    superadmin_id: str,
+    client_id: str,
+    is_active: bool,
+    background_tasks: BackgroundTasks,
+    current_user_email: str
+) -> APIResponse:
+    """Change a client's status and cascade it to its users as a background job"""
+    action = "reactivation" if is_active else "deactivation"
+    try:
+        client_service = ClientService()
+        job, created = await client_service.set_client_status(superadmin_id, client_id, is_active, current_user_email)
+
+        if not job:
+            raise HTTPException(status_code=404, detail="Client not found")
+
+        if created:
+            background_tasks.add_task(
+                client_service.job_service.run, job, client_service.cascade_client_status,
+                superadmin_id, client_id, is_active
+            )
+
+        return APIResponse(
+            success=True,
+            message=f"Client {action} started" if created else f"Client {action} already in progress",
+            data=job.dict()
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FailedPrecondition:
+        raise HTTPException(status_code=409, detail="Client was modified concurrently, please retry")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/{superadmin_id}/clients/{client_id}/deactivate", response_model=APIResponse)
+async def deactivate_client(
+    superadmin_id: str,
+    client_id: str,
+    background_tasks: BackgroundTasks,
+    current_user_email: str = Depends(get_superadmin_email)
+):
+    """Deactivate a client and all of its users (poll /api/jobs/{id} for progress)"""
+    return await set_client_status(superadmin_id, client_id, False, background_tasks, current_user_email)
+
+@router.post("/{superadmin_id}/clients/{client_id}/reactivate", response_model=APIResponse)
+async def reactivate_client(
+    superadmin_id: str,
+    client_id: str,
+    background_tasks: BackgroundTasks,
+    current_user_email: str = Depends(get_superadmin_email)
+):
+    """Reactivate a client and restore the users its deactivation disabled (poll /api/jobs/{id} for progress)"""
+    return await set_client_status(superadmin_id, client_id, True, background_tasks, current_user_email)
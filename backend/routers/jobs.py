@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from models.schemas import APIResponse
+from middleware.auth import get_current_user_email
+from services.job_service import JobService
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=APIResponse)
+async def get_job(
+    job_id: str,
+    current_user_email: str = Depends(get_current_user_email)
+):
+    """Get the status and progress of a background job started by the current user"""
+    try:
+        job_service = JobService()
+        job = await job_service.get_job(job_id, current_user_email)
+        
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        return APIResponse(
+            success=True,
+            message="Job retrieved successfully",
+            data=job.dict()
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
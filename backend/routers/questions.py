@@ -4,20 +4,22 @@ from typing import List, Optional
 from models.schemas import (
     Question, QuestionCreate, QuestionUpdate, APIResponse, PaginatedResponse, QuestionType
 )
-from middleware.auth import get_current_user_email
+from middleware.auth import get_tenant_context
 from services.question_service import QuestionService
+from services.tenant_service import TenantContext
+from services.pagination import InvalidCursorError
 
 router = APIRouter()
 
 @router.post("/", response_model=APIResponse)
 async def create_question(
     question_data: QuestionCreate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Create a new question"""
     try:
         question_service = QuestionService()
-        question = await question_service.create_question(question_data, current_user_email)
+        question = await question_service.create_question(question_data, tenant)
         
         return APIResponse(
             success=True,
@@ -33,30 +35,33 @@ async def create_question(
 async def get_questions(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
-    search: Optional[str] = Query(None),
+    search: Optional[str] = Query(None, description="Prefix of a word in the question text"),
     question_type: Optional[QuestionType] = Query(None),
-    current_user_email: str = Depends(get_current_user_email)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get paginated list of questions"""
     try:
         question_service = QuestionService()
         result = await question_service.get_questions(
-            current_user_email, page, size, search, question_type
+            tenant, page, size, search, question_type, cursor
         )
         
         return result
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/{question_id}", response_model=APIResponse)
 async def get_question(
     question_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get a specific question by ID"""
     try:
         question_service = QuestionService()
-        question = await question_service.get_question_by_id(question_id, current_user_email)
+        question = await question_service.get_question_by_id(question_id, tenant)
         
         if not question:
             raise HTTPException(status_code=404, detail="Question not found")
@@ -75,12 +80,12 @@ async def get_question(
 async def update_question(
     question_id: str,
     question_data: QuestionUpdate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Update a question"""
     try:
         question_service = QuestionService()
-        question = await question_service.update_question(question_id, question_data, current_user_email)
+        question = await question_service.update_question(question_id, question_data, tenant)
         
         if not question:
             raise HTTPException(status_code=404, detail="Question not found")
@@ -100,12 +105,12 @@ async def update_question(
 @router.delete("/{question_id}", response_model=APIResponse)
 async def delete_question(
     question_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Delete a question"""
     try:
         question_service = QuestionService()
-        success = await question_service.delete_question(question_id, current_user_email)
+        success = await question_service.delete_question(question_id, tenant)
         
         if not success:
             raise HTTPException(status_code=404, detail="Question not found")
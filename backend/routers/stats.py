@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from models.schemas import APIResponse
+from middleware.auth import get_tenant_context
+from services.counter_service import CounterService
+from services.tenant_service import TenantContext
+
+router = APIRouter()
+
+@router.get("/", response_model=APIResponse)
+async def get_stats(
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Get dashboard counts (users by status, questions by type, surveys by status, assignments)"""
+    try:
+        counter_service = CounterService()
+        counters = await counter_service.get_counters(tenant)
+        counters.pop("rebuilt_at", None)
+        
+        return APIResponse(
+            success=True,
+            message="Stats retrieved successfully",
+            data=counters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,24 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from google.api_core.exceptions import FailedPrecondition
 
 from models.schemas import (
     Survey, SurveyCreate, SurveyUpdate, SurveyWithQuestions, 
     APIResponse, PaginatedResponse, SurveyStatus
 )
-from middleware.auth import get_current_user_email
+from middleware.auth import get_tenant_context
 from services.survey_service import SurveyService
+from services.results_service import ResultsService
+from services.response_service import ResponseService
+from services.response_export import EXPORT_FORMATS, check_format, stream_export
+from services.tenant_service import TenantContext
+from services.pagination import InvalidCursorError
 
 router = APIRouter()
 
 @router.post("/", response_model=APIResponse)
 async def create_survey(
     survey_data: SurveyCreate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Create a new survey"""
     try:
         survey_service = SurveyService()
-        survey = await survey_service.create_survey(survey_data, current_user_email)
+        survey = await survey_service.create_survey(survey_data, tenant)
         
         return APIResponse(
             success=True,
@@ -34,18 +41,21 @@ async def create_survey(
 async def get_surveys(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
-    search: Optional[str] = Query(None),
+    search: Optional[str] = Query(None, description="Prefix of a word in the survey title or description"),
     status: Optional[SurveyStatus] = Query(None),
-    current_user_email: str = Depends(get_current_user_email)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get paginated list of surveys"""
     try:
         survey_service = SurveyService()
         result = await survey_service.get_surveys(
-            current_user_email, page, size, search, status
+            tenant, page, size, search, status, cursor
         )
         
         return result
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -53,16 +63,16 @@ async def get_surveys(
 async def get_survey(
     survey_id: str,
     include_questions: bool = Query(False),
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get a specific survey by ID"""
     try:
         survey_service = SurveyService()
         
         if include_questions:
-            survey = await survey_service.get_survey_with_questions(survey_id, current_user_email)
+            survey = await survey_service.get_survey_with_questions(survey_id, tenant)
         else:
-            survey = await survey_service.get_survey_by_id(survey_id, current_user_email)
+            survey = await survey_service.get_survey_by_id(survey_id, tenant)
         
         if not survey:
             raise HTTPException(status_code=404, detail="Survey not found")
@@ -77,16 +87,120 @@ async def get_survey(
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/{survey_id}/results", response_model=APIResponse)
+async def get_survey_results(
+    survey_id: str,
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Get per-question aggregates of a survey's responses"""
+    try:
+        results_service = ResultsService()
+        results = await results_service.get_survey_results(survey_id, tenant)
+        
+        if not results:
+            raise HTTPException(status_code=404, detail="Survey not found")
+        
+        return APIResponse(
+            success=True,
+            message="Survey results retrieved successfully",
+            data=results.dict()
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/{survey_id}/results/rebuild", response_model=APIResponse)
+async def rebuild_survey_results(
+    survey_id: str,
+    background_tasks: BackgroundTasks,
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Recount a survey's result rollup from its responses, as a background job (poll /api/jobs/{id})"""
+    try:
+        results_service = ResultsService()
+        job, created = await results_service.start_rebuild(survey_id, tenant)
+        
+        if not job:
+            raise HTTPException(status_code=404, detail="Survey not found")
+        
+        if created:
+            background_tasks.add_task(
+                results_service.job_service.run, job, results_service.rebuild_survey_rollup, survey_id, tenant
+            )
+        
+        return APIResponse(
+            success=True,
+            message="Results rebuild started" if created else "Results rebuild already in progress",
+            data=job.dict()
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/{survey_id}/responses", response_model=PaginatedResponse)
+async def get_survey_responses(
+    survey_id: str,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Get a page of a survey's responses with user names and question texts"""
+    try:
+        response_service = ResponseService()
+        result = await response_service.get_responses_page(survey_id, tenant, page, size, cursor)
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Survey not found")
+        
+        return result
+    except HTTPException:
+        raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/{survey_id}/export")
+async def export_survey_responses(
+    survey_id: str,
+    format: str = Query("csv", description="csv, ndjson or parquet"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Stream all responses of a survey, one column per question, as CSV, NDJSON or Parquet"""
+    try:
+        export_format = check_format(format)
+        response_service = ResponseService()
+        survey = await response_service.survey_service.get_survey_with_questions(survey_id, tenant)
+        
+        if not survey:
+            raise HTTPException(status_code=404, detail="Survey not found")
+        
+        # Rows are read, enriched and encoded a page at a time while the body is sent
+        return StreamingResponse(
+            stream_export(response_service.iter_export_rows(survey, tenant), survey.questions, export_format),
+            media_type=EXPORT_FORMATS[export_format],
+            headers={"Content-Disposition": f'attachment; filename="survey-{survey_id}-responses.{export_format}"'}
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.put("/{survey_id}", response_model=APIResponse)
 async def update_survey(
     survey_id: str,
     survey_data: SurveyUpdate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Update a survey"""
     try:
         survey_service = SurveyService()
-        survey = await survey_service.update_survey(survey_id, survey_data, current_user_email)
+        survey = await survey_service.update_survey(survey_id, survey_data, tenant)
         
         if not survey:
             raise HTTPException(status_code=404, detail="Survey not found")
@@ -106,19 +220,26 @@ async def update_survey(
 @router.delete("/{survey_id}", response_model=APIResponse)
 async def delete_survey(
     survey_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    background_tasks: BackgroundTasks,
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
-    """Delete a survey"""
+    """Delete a survey with its responses and assignments, as a background job (poll /api/jobs/{id})"""
     try:
         survey_service = SurveyService()
-        success = await survey_service.delete_survey(survey_id, current_user_email)
+        job, created = await survey_service.delete_survey(survey_id, tenant)
         
-        if not success:
+        if not job:
             raise HTTPException(status_code=404, detail="Survey not found")
         
+        if created:
+            background_tasks.add_task(
+                survey_service.job_service.run, job, survey_service.delete_survey_cascade, survey_id, tenant
+            )
+        
         return APIResponse(
             success=True,
-            message="Survey deleted successfully"
+            message="Survey deletion started" if created else "Survey deletion already in progress",
+            data=job.dict()
         )
     except HTTPException:
         raise
@@ -129,14 +250,14 @@ async def delete_survey(
 async def add_question_to_survey(
     survey_id: str,
     question_id: str,
-    order: int = Query(0),
-    current_user_email: str = Depends(get_current_user_email)
+    order: Optional[int] = Query(None, ge=0),
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
-    """Add a question to a survey"""
+    """Add a question to a survey, appended unless order gives its position"""
     try:
         survey_service = SurveyService()
         success = await survey_service.add_question_to_survey(
-            survey_id, question_id, order, current_user_email
+            survey_id, question_id, order, tenant
         )
         
         if not success:
@@ -148,6 +269,8 @@ async def add_question_to_survey(
         )
     except HTTPException:
         raise
+    except FailedPrecondition:
+        raise HTTPException(status_code=409, detail="Survey was modified concurrently, please retry")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -155,13 +278,13 @@ async def add_question_to_survey(
 async def remove_question_from_survey(
     survey_id: str,
     question_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Remove a question from a survey"""
     try:
         survey_service = SurveyService()
         success = await survey_service.remove_question_from_survey(
-            survey_id, question_id, current_user_email
+            survey_id, question_id, tenant
         )
         
         if not success:
@@ -173,6 +296,8 @@ async def remove_question_from_survey(
         )
     except HTTPException:
         raise
+    except FailedPrecondition:
+        raise HTTPException(status_code=409, detail="Survey was modified concurrently, please retry")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -180,12 +305,12 @@ async def remove_question_from_survey(
 async def update_survey_status(
     survey_id: str,
     status: SurveyStatus,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Update survey status"""
     try:
         survey_service = SurveyService()
-        survey = await survey_service.update_survey_status(survey_id, status, current_user_email)
+        survey = await survey_service.update_survey_status(survey_id, status, tenant)
         
         if not survey:
             raise HTTPException(status_code=404, detail="Survey not found")
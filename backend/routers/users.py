@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from google.api_core.exceptions import FailedPrecondition
 from typing import List, Optional
 from datetime import datetime
 
@@ -6,21 +7,25 @@ from models.schemas import (
     User, UserCreate, UserUpdate, APIResponse, PaginatedResponse
 )
 from models.database import get_db, COLLECTIONS
-from middleware.auth import get_current_user_email
+from middleware.auth import get_current_user_email, get_tenant_context
 from services.user_service import UserService
+from services.tenant_service import TenantContext
+from services.pagination import InvalidCursorError
+from services.user_import import detect_format, iter_import_rows
 from firebase_admin import auth as firebase_auth
+from services.auth_executor import run_auth_call
 
 router = APIRouter()
 
 @router.post("/", response_model=APIResponse)
 async def create_user(
     user_data: UserCreate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Create a new user"""
     try:
         user_service = UserService()
-        user = await user_service.create_user(user_data, current_user_email)
+        user = await user_service.create_user(user_data, tenant)
         
         return APIResponse(
             success=True,
@@ -32,25 +37,52 @@ async def create_user(
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/import", response_model=APIResponse)
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson; defaults to the Content-Type"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Bulk-create users from a streamed CSV (full_name,email header) or NDJSON upload"""
+    try:
+        import_format = detect_format(request.headers.get("content-type"), format)
+        user_service = UserService()
+        result = await user_service.import_users(
+            iter_import_rows(request.stream(), import_format), tenant
+        )
+        
+        return APIResponse(
+            success=result.failed == 0,
+            message=f"Imported {result.created} users ({result.skipped} skipped, {result.failed} failed)",
+            data=result.dict()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/", response_model=PaginatedResponse)
 async def get_users(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
-    search: Optional[str] = Query(None),
+    search: Optional[str] = Query(None, description="Prefix of a word in the user's name or email"),
     is_active: Optional[bool] = Query(None),
-    current_user_email: str = Depends(get_current_user_email)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get paginated list of users"""
     try:
-        print(f"DEBUG: Getting users for {current_user_email}")
+        print(f"DEBUG: Getting users for {tenant.email}")
         user_service = UserService()
         print(f"DEBUG: UserService created")
         result = await user_service.get_users(
-            current_user_email, page, size, search, is_active
+            tenant, page, size, search, is_active, cursor
         )
         print(f"DEBUG: Got result: {result}")
         
         return result
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"ERROR in get_users: {e}")
         import traceback
@@ -60,12 +92,12 @@ async def get_users(
 @router.get("/{user_id}", response_model=APIResponse)
 async def get_user(
     user_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Get a specific user by ID"""
     try:
         user_service = UserService()
-        user = await user_service.get_user_by_id(user_id, current_user_email)
+        user = await user_service.get_user_by_id(user_id, tenant)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -84,12 +116,12 @@ async def get_user(
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Update a user"""
     try:
         user_service = UserService()
-        user = await user_service.update_user(user_id, user_data, current_user_email)
+        user = await user_service.update_user(user_id, user_data, tenant)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -103,6 +135,8 @@ async def update_user(
         raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except FailedPrecondition:
+        raise HTTPException(status_code=409, detail="User was modified concurrently, please retry")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -156,7 +190,7 @@ async def delete_user_from_auth_only(
         auth_client = get_firebase_auth()
         
         try:
-            auth_client.delete_user(user_id)
+            await run_auth_call(auth_client.delete_user, user_id)
             return APIResponse(
                 success=True,
                 message="User deleted from Firebase Authentication",
@@ -174,12 +208,12 @@ async def delete_user_from_auth_only(
 @router.patch("/{user_id}/toggle-status", response_model=APIResponse)
 async def toggle_user_status(
     user_id: str,
-    current_user_email: str = Depends(get_current_user_email)
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     """Toggle user active status"""
     try:
         user_service = UserService()
-        user = await user_service.toggle_user_status(user_id, current_user_email)
+        user = await user_service.toggle_user_status(user_id, tenant)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -191,6 +225,8 @@ async def toggle_user_status(
         )
     except HTTPException:
         raise
+    except FailedPrecondition:
+        raise HTTPException(status_code=409, detail="User was modified concurrently, please retry")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
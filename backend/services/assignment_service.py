@@ -1,151 +1,153 @@
 from typing import List, Optional
 from datetime import datetime
-import uuid
 
 from models.schemas import (
-    SurveyAssignment, SurveyAssignmentCreate, SurveyAssignmentUpdate, PaginatedResponse
+    SurveyAssignment, SurveyAssignmentCreate, SurveyAssignmentUpdate, PaginatedResponse,
+    AssignmentOutcome, BulkAssignmentResult
 )
 from models.database import get_db, COLLECTIONS
+from google.api_core.exceptions import AlreadyExists
+from services.tenant_service import TenantContext
+from services.pagination import paginate_query, next_cursor
 from services.survey_service import SurveyService
 from services.user_service import UserService
+from services.counter_service import CounterService
+from services.bulk import get_all_docs, chunked, WRITE_BATCH_SIZE
 # FieldFilter not available in older firestore version
 
+def assignment_id(survey_id: str, user_id: str) -> str:
+    """Deterministic assignment document ID, so a survey is assigned to a user at most once"""
+    return f"{survey_id}_{user_id}"
+
 class AssignmentService:
     def __init__(self):
         self.db = get_db()
         self.survey_service = SurveyService()
         self.user_service = UserService()
+        self.counter_service = CounterService()
     
-    async def find_client_by_email(self, client_email: str):
-        """Find client document ID by email"""
-        try:
-            print(f"DEBUG: Searching for client with email: {client_email}")
-            # Search through all superadmin documents
-            superadmin_collection = self.db.collection("superadmin")
-            superadmin_docs = superadmin_collection.stream()
-            
-            for superadmin_doc in superadmin_docs:
-                print(f"DEBUG: Checking superadmin: {superadmin_doc.id}")
-                # Search through clients in this superadmin
-                clients_collection = superadmin_doc.reference.collection("clients")
-                clients_docs = clients_collection.where("email", "==", client_email).stream()
-                
-                for client_doc in clients_docs:
-                    print(f"DEBUG: Found client {client_doc.id} in superadmin {superadmin_doc.id}")
-                    return {
-                        "superadmin_id": superadmin_doc.id,
-                        "client_id": client_doc.id
-                    }
-            
-            print(f"DEBUG: Client not found")
-            return None
-        except Exception as e:
-            print(f"ERROR finding client: {e}")
-            return None
-    
-    async def ensure_client_exists(self, client_info: dict, client_email: str):
-        """Ensure client document exists in Firestore"""
-        try:
-            client_doc_ref = self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"])
-            client_doc = client_doc_ref.get()
-            
-            if not client_doc.exists:
-                # Create client document if it doesn't exist
-                client_data = {
-                    "email": client_email,
-                    "created_at": datetime.utcnow(),
-                    "status": "active"
-                }
-                client_doc_ref.set(client_data)
-                print(f"DEBUG: Created client document for {client_email} with ID {client_info['client_id']}")
-        except Exception as e:
-            print(f"ERROR ensuring client exists: {e}")
-    
-    async def get_client_assignments_collection(self, client_email: str):
+    def get_client_assignments_collection(self, tenant: TenantContext):
         """Get the survey_assignments collection for a specific client"""
-        client_info = await self.find_client_by_email(client_email)
-        
-        if not client_info:
-            raise ValueError(f"Failed to create/find client admin: {client_email}")
-        
-        # Ensure client document exists
-        await self.ensure_client_exists(client_info, client_email)
-        
-        path = f"superadmin/{client_info['superadmin_id']}/clients/{client_info['client_id']}/survey_assignments"
-        print(f"DEBUG: Using Firestore path: {path}")
-        
-        return self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"]).collection("survey_assignments")
+        return tenant.collection("survey_assignments")
 
-    async def assign_survey_to_users(self, assignment_data: SurveyAssignmentCreate, assigned_by: str) -> List[SurveyAssignment]:
-        """Assign a survey to multiple users"""
+    async def assign_survey_to_users(self, assignment_data: SurveyAssignmentCreate, tenant: TenantContext) -> BulkAssignmentResult:
+        """Assign a survey to multiple users, reporting the outcome for each user"""
         # Verify survey exists and belongs to user
-        survey = await self.survey_service.get_survey_by_id(assignment_data.survey_id, assigned_by)
+        survey = await self.survey_service.get_survey_by_id(assignment_data.survey_id, tenant)
         if not survey:
             raise ValueError("Survey not found")
         
-        collection = await self.get_client_assignments_collection(assigned_by)
-        
-        # Get all existing assignments for this survey to check for duplicates
-        existing_assignments = collection.where(
-            "survey_id", "==", assignment_data.survey_id
-        ).where(
-            "assigned_by", "==", assigned_by
-        ).get()
-        
-        existing_user_ids = set()
-        for doc in existing_assignments:
-            data = doc.to_dict()
-            existing_user_ids.add(data.get("user_id"))
-        
-        # Verify all users exist and belong to the client admin
-        assignments = []
-        for user_id in assignment_data.user_ids:
-            user = await self.user_service.get_user_by_id(user_id, assigned_by)
-            if not user:
-                continue  # Skip invalid users
+        collection = self.get_client_assignments_collection(tenant)
+        result = BulkAssignmentResult(survey_id=assignment_data.survey_id)
+        user_ids = list(dict.fromkeys(assignment_data.user_ids))  # Drop repeated IDs, keep order
+        
+        # Verify all users exist and belong to the client admin, and find their existing
+        # assignments by deterministic ID, with the same chunked multi-gets
+        users_collection = self.user_service.get_client_users_collection(tenant)
+        docs = await get_all_docs(
+            self.db,
+            [users_collection.document(user_id) for user_id in user_ids] +
+            [collection.document(assignment_id(assignment_data.survey_id, user_id)) for user_id in user_ids]
+        )
+        user_docs, existing_docs = docs[:len(user_ids)], docs[len(user_ids):]
+        
+        now = datetime.utcnow()
+        pending = []
+        for user_id, user_doc, existing_doc in zip(user_ids, user_docs, existing_docs):
+            if not user_doc.exists or (user_doc.to_dict() or {}).get("created_by") != tenant.email:
+                result.outcomes.append(AssignmentOutcome(user_id=user_id, status="user_not_found"))
+                continue
             
             # Check if assignment already exists for this user-survey combination
-            if user_id in existing_user_ids:
+            if existing_doc.exists:
                 print(f"DEBUG: Skipping duplicate assignment - Survey {assignment_data.survey_id} already assigned to user {user_id}")
-                continue  # Skip if already assigned
+                result.outcomes.append(AssignmentOutcome(user_id=user_id, status="already_assigned"))
+                continue
             
-            # Create assignment
-            assignment_id = str(uuid.uuid4())
-            now = datetime.utcnow()
-            
-            assignment = SurveyAssignment(
-                id=assignment_id,
+            pending.append(SurveyAssignment(
+                id=assignment_id(assignment_data.survey_id, user_id),
                 survey_id=assignment_data.survey_id,
                 user_id=user_id,
                 is_active=True,
                 assigned_at=now,
-                assigned_by=assigned_by
+                assigned_by=tenant.email
+            ))
+        
+        # Commit in full batches; one op per batch is kept for the counters write
+        for chunk in chunked(pending, WRITE_BATCH_SIZE - 1):
+            await self.create_assignments(chunk, tenant, result)
+        
+        # Report outcomes in the order the users were requested
+        position = {user_id: index for index, user_id in enumerate(user_ids)}
+        result.outcomes.sort(key=lambda outcome: position[outcome.user_id])
+        result.assigned = len(result.assignments)
+        result.failed = sum(1 for outcome in result.outcomes if outcome.status == "failed")
+        result.skipped = len(result.outcomes) - result.assigned - result.failed
+        
+        if user_ids and all(outcome.status == "already_assigned" for outcome in result.outcomes):
+            raise ValueError("Survey is already assigned to all selected users")
+        
+        return result
+
+    async def create_assignments(self, chunk: List[SurveyAssignment], tenant: TenantContext, result: BulkAssignmentResult):
+        """Create one batch of assignments, recording each user's outcome in result"""
+        collection = self.get_client_assignments_collection(tenant)
+        error = "Assignments changed concurrently, please retry"
+        
+        for attempt in range(2):
+            batch = self.db.batch()
+            for assignment in chunk:
+                # create() fails if the document exists, so concurrent requests cannot duplicate it
+                batch.create(collection.document(assignment.id), assignment.dict())
+            self.counter_service.track_many(
+                batch, tenant, "assignments", [(None, assignment.dict()) for assignment in chunk]
             )
             
-            # Save to client-specific Firestore collection
-            collection.document(assignment_id).set(assignment.dict())
-            assignments.append(assignment)
+            try:
+                await batch.commit()
+            except AlreadyExists:
+                # Another request assigned some of these users after they were checked;
+                # record those and retry the rest once
+                existing_docs = await get_all_docs(self.db, [collection.document(assignment.id) for assignment in chunk])
+                remaining = []
+                for assignment, existing_doc in zip(chunk, existing_docs):
+                    if existing_doc.exists:
+                        result.outcomes.append(AssignmentOutcome(user_id=assignment.user_id, status="already_assigned"))
+                    else:
+                        remaining.append(assignment)
+                chunk = remaining
+                if not chunk:
+                    return
+                continue
+            except Exception as e:
+                # A batch is atomic, so exactly this chunk's users were not assigned
+                print(f"ERROR committing assignment batch: {e}")
+                error = str(e)
+                break
             
-            # Add to existing_user_ids to prevent duplicates within this batch
-            existing_user_ids.add(user_id)
-        
-        if len(assignments) == 0 and len(assignment_data.user_ids) > 0:
-            raise ValueError("Survey is already assigned to all selected users")
+            result.assignments.extend(chunk)
+            result.outcomes.extend(
+                AssignmentOutcome(user_id=assignment.user_id, status="assigned", assignment_id=assignment.id) for assignment in chunk
+            )
+            return
         
-        return assignments
+        result.outcomes.extend(
+            AssignmentOutcome(user_id=assignment.user_id, status="failed", error=error) for assignment in chunk
+        )
 
     async def get_assignments(
         self, 
-        assigned_by: str, 
+        tenant: TenantContext, 
         page: int = 1, 
         size: int = 10,
         survey_id: Optional[str] = None,
         user_id: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None
     ) -> PaginatedResponse:
         """Get paginated list of assignments"""
-        collection = await self.get_client_assignments_collection(assigned_by)
-        query = collection.where("assigned_by", "==", assigned_by)
+        collection = self.get_client_assignments_collection(tenant)
+        query = collection.where("assigned_by", "==", tenant.email)
         
         # Apply filters
         if survey_id:
@@ -155,12 +157,18 @@ class AssignmentService:
         if is_active is not None:
             query = query.where("is_active", "==", is_active)
         
-        # Get total count
-        total_docs = query.get()
-        total = len(list(total_docs))
+        # Get total count from the tenant counters (a single document read); survey and
+        # user filters are not counted, so those still count the matching documents
+        if survey_id or user_id:
+            total_docs = await query.get()
+            total = len(list(total_docs))
+        elif is_active is not None:
+            total = await self.counter_service.count(tenant, "assignments", "is_active", is_active)
+        else:
+            total = await self.counter_service.count(tenant, "assignments")
         
-        # Get documents without ordering (to avoid index requirement)
-        docs = query.limit(size * page).get()
+        # Fetch only the requested page, ordered by document ID (no composite index needed)
+        docs = await paginate_query(query, page, size, cursor).get()
         
         assignments = []
         for doc in docs:
@@ -168,33 +176,29 @@ class AssignmentService:
             assignment_data["id"] = doc.id
             assignments.append(SurveyAssignment(**assignment_data))
         
-        # Simple client-side pagination
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        paginated_assignments = assignments[start_idx:end_idx]
-        
         pages = (total + size - 1) // size
         
         return PaginatedResponse(
-            items=[assignment.dict() for assignment in paginated_assignments],
+            items=[assignment.dict() for assignment in assignments],
             total=total,
             page=page,
             size=size,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor(docs, size)
         )
 
-    async def get_survey_assignments(self, survey_id: str, assigned_by: str) -> List[SurveyAssignment]:
+    async def get_survey_assignments(self, survey_id: str, tenant: TenantContext) -> List[SurveyAssignment]:
         """Get all assignments for a specific survey"""
         # Verify survey exists and belongs to user
-        survey = await self.survey_service.get_survey_by_id(survey_id, assigned_by)
+        survey = await self.survey_service.get_survey_by_id(survey_id, tenant)
         if not survey:
             return []
         
-        collection = await self.get_client_assignments_collection(assigned_by)
-        docs = collection.where(
+        collection = self.get_client_assignments_collection(tenant)
+        docs = await collection.where(
             "survey_id", "==", survey_id
         ).where(
-            "assigned_by", "==", assigned_by
+            "assigned_by", "==", tenant.email
         ).get()
         
         assignments = []
@@ -205,18 +209,18 @@ class AssignmentService:
         
         return assignments
 
-    async def get_user_assignments(self, user_id: str, assigned_by: str) -> List[SurveyAssignment]:
+    async def get_user_assignments(self, user_id: str, tenant: TenantContext) -> List[SurveyAssignment]:
         """Get all assignments for a specific user"""
         # Verify user exists and belongs to the client admin
-        user = await self.user_service.get_user_by_id(user_id, assigned_by)
+        user = await self.user_service.get_user_by_id(user_id, tenant)
         if not user:
             return []
         
-        collection = await self.get_client_assignments_collection(assigned_by)
-        docs = collection.where(
+        collection = self.get_client_assignments_collection(tenant)
+        docs = await collection.where(
             "user_id", "==", user_id
         ).where(
-            "assigned_by", "==", assigned_by
+            "assigned_by", "==", tenant.email
         ).get()
         
         assignments = []
@@ -227,11 +231,11 @@ class AssignmentService:
         
         return assignments
 
-    async def update_assignment(self, assignment_id: str, assignment_data: SurveyAssignmentUpdate, assigned_by: str) -> Optional[SurveyAssignment]:
+    async def update_assignment(self, assignment_id: str, assignment_data: SurveyAssignmentUpdate, tenant: TenantContext) -> Optional[SurveyAssignment]:
         """Update an assignment"""
-        collection = await self.get_client_assignments_collection(assigned_by)
+        collection = self.get_client_assignments_collection(tenant)
         doc_ref = collection.document(assignment_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return None
@@ -239,7 +243,7 @@ class AssignmentService:
         current_data = doc.to_dict()
         
         # Check if assignment belongs to the current client admin
-        if current_data.get("assigned_by") != assigned_by:
+        if current_data.get("assigned_by") != tenant.email:
             return None
         
         # Update fields
@@ -250,21 +254,24 @@ class AssignmentService:
         if not update_data:
             return None  # No updates to make
         
-        # Update document
-        doc_ref.update(update_data)
+        # Update document and counters together, failing if the assignment changed since it was read
+        batch = self.db.batch()
+        batch.update(doc_ref, update_data, option=self.db.write_option(last_update_time=doc.update_time))
+        self.counter_service.track(batch, tenant, "assignments", current_data, {**current_data, **update_data})
+        await batch.commit()
         
         # Return updated assignment
-        updated_doc = doc_ref.get()
+        updated_doc = await doc_ref.get()
         updated_data = updated_doc.to_dict()
         updated_data["id"] = updated_doc.id
         
         return SurveyAssignment(**updated_data)
 
-    async def delete_assignment(self, assignment_id: str, assigned_by: str) -> bool:
+    async def delete_assignment(self, assignment_id: str, tenant: TenantContext) -> bool:
         """Delete an assignment"""
-        collection = await self.get_client_assignments_collection(assigned_by)
+        collection = self.get_client_assignments_collection(tenant)
         doc_ref = collection.document(assignment_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return False
@@ -272,31 +279,31 @@ class AssignmentService:
         assignment_data = doc.to_dict()
         
         # Check if assignment belongs to the current client admin
-        if assignment_data.get("assigned_by") != assigned_by:
+        if assignment_data.get("assigned_by") != tenant.email:
             return False
         
         # Delete document
-        doc_ref.delete()
+        await self.delete_assignment_doc(doc, tenant)
         
         return True
 
-    async def remove_user_from_survey(self, survey_id: str, user_id: str, assigned_by: str) -> bool:
+    async def remove_user_from_survey(self, survey_id: str, user_id: str, tenant: TenantContext) -> bool:
         """Remove a user from a survey"""
-        # Find the assignment
-        collection = await self.get_client_assignments_collection(assigned_by)
-        docs = collection.where(
-            "survey_id", "==", survey_id
-        ).where(
-            "user_id", "==", user_id
-        ).where(
-            "assigned_by", "==", assigned_by
-        ).limit(1).get()
+        # The assignment's ID is known, so this is a point read instead of a query
+        collection = self.get_client_assignments_collection(tenant)
+        doc = await collection.document(assignment_id(survey_id, user_id)).get()
         
-        docs_list = list(docs)
-        if len(docs_list) == 0:
+        if not doc.exists or (doc.to_dict() or {}).get("assigned_by") != tenant.email:
             return False
         
         # Delete the assignment
-        docs_list[0].reference.delete()
+        await self.delete_assignment_doc(doc, tenant)
         
         return True
+
+    async def delete_assignment_doc(self, doc, tenant: TenantContext):
+        """Delete an assignment snapshot and uncount it atomically"""
+        batch = self.db.batch()
+        batch.delete(doc.reference, option=self.db.write_option(last_update_time=doc.update_time))
+        self.counter_service.track(batch, tenant, "assignments", doc.to_dict(), None)
+        await batch.commit()
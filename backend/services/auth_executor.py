@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+AUTH_EXECUTOR_WORKERS = int(os.getenv("AUTH_EXECUTOR_WORKERS", "8"))
+AUTH_SLOW_WAIT_SECONDS = float(os.getenv("AUTH_SLOW_WAIT_SECONDS", "0.5"))
+
+class AuthExecutor:
+    """Runs blocking Firebase Admin Auth calls on a dedicated, bounded thread pool"""
+
+    def __init__(self, max_workers: int = AUTH_EXECUTOR_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="firebase-auth")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) off the event loop and await its result"""
+        submitted_at = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        def call():
+            started_at = time.monotonic()
+            wait = started_at - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            if wait > AUTH_SLOW_WAIT_SECONDS:
+                logger.warning(f"Firebase Auth call {getattr(func, '__name__', func)} waited {wait:.3f}s for a worker")
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run += time.monotonic() - started_at
+            return result
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, call)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait_ms": round(self.total_wait / completed * 1000, 2),
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "avg_run_ms": round(self.total_run / completed * 1000, 2)
+            }
+
+# Process-wide executor shared by the middleware, services and routers
+auth_executor = AuthExecutor()
+
+async def run_auth_call(func, *args, **kwargs):
+    """Await a blocking firebase_admin.auth call without stalling other requests"""
+    return await auth_executor.run(func, *args, **kwargs)
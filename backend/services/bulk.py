@@ -0,0 +1,137 @@
+from typing import Iterable, List
+import asyncio
+
+from google.api_core.exceptions import FailedPrecondition
+
+# Document references per BatchGetDocuments call
+GET_ALL_CHUNK_SIZE = 100
+
+# Writes per batch commit (Firestore's limit)
+WRITE_BATCH_SIZE = 500
+
+# Values per "in" filter (Firestore's limit)
+IN_QUERY_LIMIT = 10
+
+# Times a page of conditional updates is re-read after a concurrent change
+PAGE_RETRIES = 3
+
+# Times a guarded read-modify-write of one document is retried after a concurrent change
+CONFLICT_RETRIES = 5
+
+def chunked(items: list, size: int) -> Iterable[list]:
+    """Split a list into consecutive chunks of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+async def get_all_docs(db, refs: list, chunk_size: int = GET_ALL_CHUNK_SIZE) -> List:
+    """Fetch many documents with concurrent, chunked get_all calls.
+
+    Returns one snapshot per reference, in the order of refs (get_all
+    itself yields documents in arbitrary order). Missing documents come
+    back as snapshots whose exists is False.
+    """
+    async def fetch(chunk):
+        return [snapshot async for snapshot in db.get_all(chunk)]
+
+    unique_refs = list({ref.path: ref for ref in refs}.values())
+    results = await asyncio.gather(*(fetch(chunk) for chunk in chunked(unique_refs, chunk_size)))
+
+    by_path = {snapshot.reference.path: snapshot for chunk in results for snapshot in chunk}
+    return [by_path[ref.path] for ref in refs]
+
+async def retry_on_conflict(attempt, retries: int = CONFLICT_RETRIES):
+    """Await attempt() and return its result, running it again on FailedPrecondition.
+
+    attempt must read the document and write it under a last_update_time
+    precondition, so a retry starts over from a fresh read. After the last
+    retry the FailedPrecondition is raised to the caller.
+    """
+    for retry in range(retries + 1):
+        try:
+            return await attempt()
+        except FailedPrecondition:
+            if retry == retries:
+                raise
+            await asyncio.sleep(0.05 * (retry + 1))
+
+async def delete_query(db, query, page_size: int = WRITE_BATCH_SIZE, before_commit=None, on_progress=None) -> int:
+    """Delete every document matching a query, one batch commit per page.
+
+    Pages are read in document ID order, each starting after the last
+    deleted document, so deleted entries are never scanned again. The
+    optional before_commit(batch, docs) can add related writes (it must
+    leave room for them within page_size), and on_progress(count) is
+    awaited after each committed page.
+    """
+    query = query.order_by("__name__").limit(page_size)
+    page_query = query
+    total = 0
+
+    while True:
+        docs = list(await page_query.get())
+        if not docs:
+            return total
+
+        batch = db.batch()
+        for doc in docs:
+            batch.delete(doc.reference)
+        if before_commit:
+            before_commit(batch, docs)
+        await batch.commit()
+
+        total += len(docs)
+        if on_progress:
+            await on_progress(len(docs))
+        if len(docs) < page_size:
+            return total
+        page_query = query.start_after({"__name__": docs[-1].id})
+
+async def update_query(db, query, update_for, page_size: int = WRITE_BATCH_SIZE, before_commit=None, on_progress=None) -> int:
+    """Update every document matching a query, one batch commit per page.
+
+    update_for(doc) returns the fields to update, or None to leave the
+    document alone. Pages are read in document ID order, each starting
+    after the last one read, so a document is visited once even if the
+    update takes it out of the query. before_commit(batch, changes) gets
+    the page's (doc, update_data) pairs and on_progress(count) is awaited
+    after each committed page. Updates are conditional on the documents
+    being unchanged since read; a page that loses that race is re-read.
+    """
+    query = query.order_by("__name__").limit(page_size)
+    page_query = query
+    total = 0
+    retries = 0
+
+    while True:
+        docs = list(await page_query.get())
+        if not docs:
+            return total
+
+        changes = []
+        for doc in docs:
+            update_data = update_for(doc)
+            if update_data:
+                changes.append((doc, update_data))
+
+        if changes:
+            batch = db.batch()
+            for doc, update_data in changes:
+                batch.update(doc.reference, update_data, option=db.write_option(last_update_time=doc.update_time))
+            if before_commit:
+                before_commit(batch, changes)
+            try:
+                await batch.commit()
+            except FailedPrecondition:
+                # A document changed after the page was read: read the page again
+                retries += 1
+                if retries > PAGE_RETRIES:
+                    raise
+                continue
+            retries = 0
+
+            total += len(changes)
+            if on_progress:
+                await on_progress(len(changes))
+        if len(docs) < page_size:
+            return total
+        page_query = query.start_after({"__name__": docs[-1].id})
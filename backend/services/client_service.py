@@ -0,0 +1,138 @@
+from typing import Optional, Tuple
+from datetime import datetime
+
+from models.schemas import Job
+from models.database import get_db, COLLECTIONS
+from firebase_admin import firestore
+from services.tenant_service import TenantService, invalidate_client, CLIENT_INACTIVE_STATUS
+from services.counter_service import CounterService
+from services.job_service import JobService, JobProgress, is_job_active
+from services.bulk import update_query, retry_on_conflict, WRITE_BATCH_SIZE
+
+# Marks users deactivated together with their client, so reactivation restores only those
+CLIENT_DEACTIVATED_FIELD = "client_deactivated"
+
+def deactivation_update(user_data: dict, now: datetime) -> Optional[dict]:
+    """Fields that deactivate a user with its client, remembering the previous state"""
+    if user_data.get(CLIENT_DEACTIVATED_FIELD):
+        return None
+    return {
+        "status": "inactive",
+        "is_active": False,
+        CLIENT_DEACTIVATED_FIELD: True,
+        "status_before_deactivation": user_data.get("status", "pending"),
+        "is_active_before_deactivation": user_data.get("is_active", False),
+        "updated_at": now
+    }
+
+def reactivation_update(user_data: dict, now: datetime) -> Optional[dict]:
+    """Fields that restore a user deactivated with its client"""
+    if not user_data.get(CLIENT_DEACTIVATED_FIELD):
+        return None
+    return {
+        "status": user_data.get("status_before_deactivation", "pending"),
+        "is_active": user_data.get("is_active_before_deactivation", False),
+        CLIENT_DEACTIVATED_FIELD: firestore.DELETE_FIELD,
+        "status_before_deactivation": firestore.DELETE_FIELD,
+        "is_active_before_deactivation": firestore.DELETE_FIELD,
+        "updated_at": now
+    }
+
+class ClientService:
+    """Superadmin operations on client admins and everything under their tenant"""
+
+    def __init__(self):
+        self.db = get_db()
+        self.tenant_service = TenantService()
+        self.counter_service = CounterService()
+        self.job_service = JobService()
+
+    async def set_client_status(self, superadmin_id: str, client_id: str, is_active: bool, owner: str) -> Tuple[Optional[Job], bool]:
+        """Activate or deactivate a client and start the job that cascades it to its users.
+
+        Returns the status job (None if the client is not found) and whether
+        it was newly created and still has to be run.
+        """
+        doc_ref = self.tenant_service.get_client_ref(superadmin_id, client_id)
+        job_type = "reactivate_client" if is_active else "deactivate_client"
+        status = "active" if is_active else CLIENT_INACTIVE_STATUS
+
+        async def attempt() -> Tuple[Optional[Job], bool, dict]:
+            doc = await doc_ref.get()
+            if not doc.exists:
+                return None, False, {}
+
+            client_data = doc.to_dict()
+
+            # A cascade already under way is reported instead of being started twice
+            if client_data.get("status_job_id"):
+                job = await self.job_service.get_job(client_data["status_job_id"])
+                if is_job_active(job):
+                    if job.type != job_type:
+                        raise ValueError("Another status change is in progress for this client")
+                    return job, False, client_data
+
+            # The job is recorded with the status change, so a conflicting write leaves no orphan job behind
+            job = self.job_service.new_job(job_type, owner, {
+                "superadmin_id": superadmin_id,
+                "client_id": client_id,
+                "client_email": client_data.get("email")
+            })
+            batch = self.db.batch()
+            batch.set(self.job_service.get_jobs_collection().document(job.id), job.dict())
+            batch.update(
+                doc_ref,
+                {"isActive": is_active, "status": status, "status_job_id": job.id, "updated_at": datetime.utcnow()},
+                option=self.db.write_option(last_update_time=doc.update_time)
+            )
+            await batch.commit()
+            return job, True, client_data
+
+        # A client changed since it was read is read and checked again
+        job, created, client_data = await retry_on_conflict(attempt)
+        if not created:
+            return job, False
+
+        # The client itself changes status right away; only its users are cascaded in the background
+        if client_data.get("email"):
+            await self.tenant_service.index_client(superadmin_id, client_id, client_data["email"], status)
+            invalidate_client(client_data["email"])
+
+        return job, True
+
+    async def cascade_client_status(self, superadmin_id: str, client_id: str, is_active: bool, progress: JobProgress):
+        """Deactivate or restore a client's users in batches, in its tenant and the flat users collection"""
+        doc = await self.tenant_service.get_client_ref(superadmin_id, client_id).get()
+        client_email = (doc.to_dict() or {}).get("email")
+        if not client_email:
+            raise ValueError(f"Client not found: {client_id}")
+
+        tenant = self.tenant_service.build_tenant(superadmin_id, client_id, client_email)
+        now = datetime.utcnow()
+        update_for = reactivation_update if is_active else deactivation_update
+
+        # Reactivation only has to visit the users its deactivation marked
+        tenant_users = tenant.collection("users")
+        flat_users = self.db.collection(COLLECTIONS["users"]).where("created_by", "==", client_email)
+        if is_active:
+            tenant_users = tenant_users.where(CLIENT_DEACTIVATED_FIELD, "==", True)
+            flat_users = flat_users.where(CLIENT_DEACTIVATED_FIELD, "==", True)
+
+        # Tenant users, counted in the same batches (one op per batch is kept for the counters)
+        await update_query(
+            self.db, tenant_users,
+            lambda user_doc: update_for(user_doc.to_dict(), now),
+            page_size=WRITE_BATCH_SIZE - 1,
+            before_commit=lambda batch, changes: self.counter_service.track_many(
+                batch, tenant, "users",
+                [(user_doc.to_dict(), {**user_doc.to_dict(), **update_data}) for user_doc, update_data in changes]
+            ),
+            on_progress=lambda count: progress.add("users", count)
+        )
+
+        # Users in the flat collection read by the mobile app
+        await update_query(
+            self.db, flat_users,
+            lambda user_doc: update_for(user_doc.to_dict(), now),
+            on_progress=lambda count: progress.add("flat_users", count)
+        )
@@ -0,0 +1,100 @@
+from typing import Optional
+from collections import Counter
+from datetime import datetime
+
+from firebase_admin import firestore
+from models.database import get_db
+from services.tenant_service import TenantContext
+
+# kind -> (tenant subcollection, fields whose values are counted)
+COUNTED_KINDS = {
+    "users": ("users", ["status", "is_active"]),
+    "questions": ("questions", ["type"]),
+    "surveys": ("surveys", ["status"]),
+    "assignments": ("survey_assignments", ["is_active"])
+}
+
+# Counter document inside the tenant: superadmin/{sid}/clients/{cid}/stats/counters
+COUNTERS_DOC = "counters"
+
+def counter_field(kind: str, field: Optional[str] = None, value=None) -> str:
+    """Name of the counter field for a kind, optionally narrowed to one field value"""
+    if field is None:
+        return f"{kind}_total"
+    value = getattr(value, "value", value)  # Enums are stored by value
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    return f"{kind}_{field}_{value}"
+
+def counter_keys(kind: str, data: Optional[dict]) -> list:
+    """Counter fields a document contributes to (none for a missing document or one being deleted)"""
+    if not data or data.get("deleting"):
+        return []
+    keys = [counter_field(kind)]
+    for field in COUNTED_KINDS[kind][1]:
+        if data.get(field) is not None:
+            keys.append(counter_field(kind, field, data[field]))
+    return keys
+
+def counter_deltas(kind: str, old: Optional[dict], new: Optional[dict]) -> dict:
+    """Counter changes for a document going from old to new (None = not existing)"""
+    deltas = Counter(counter_keys(kind, new))
+    deltas.subtract(counter_keys(kind, old))
+    return {key: delta for key, delta in deltas.items() if delta}
+
+class CounterService:
+    """Per-tenant document counters, kept in step with every create/update/delete"""
+
+    def __init__(self):
+        self.db = get_db()
+
+    def get_counters_ref(self, tenant: TenantContext):
+        """Get the counters document for a client"""
+        return tenant.collection("stats").document(COUNTERS_DOC)
+
+    def track(self, batch, tenant: TenantContext, kind: str, old: Optional[dict] = None, new: Optional[dict] = None):
+        """Add the counter increments for a document change to the batch writing it"""
+        self.track_many(batch, tenant, kind, [(old, new)])
+
+    def track_many(self, batch, tenant: TenantContext, kind: str, changes: list):
+        """Add the combined counter increments for several (old, new) changes as a single write"""
+        deltas = Counter()
+        for old, new in changes:
+            deltas.update(counter_deltas(kind, old, new))
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if deltas and tenant.is_resolved:
+            batch.set(
+                self.get_counters_ref(tenant),
+                {key: firestore.Increment(delta) for key, delta in deltas.items()},
+                merge=True
+            )
+
+    async def get_counters(self, tenant: TenantContext) -> dict:
+        """Read all counters for a client with a single document read"""
+        doc = await self.get_counters_ref(tenant).get()
+        counters = doc.to_dict() if doc.exists else {}
+
+        # Tenants created before counters existed are counted once, then kept up to date
+        if not counters.get("rebuilt_at"):
+            counters = await self.rebuild(tenant)
+
+        return counters
+
+    async def count(self, tenant: TenantContext, kind: str, field: Optional[str] = None, value=None) -> int:
+        """Number of documents of a kind, optionally with field == value"""
+        counters = await self.get_counters(tenant)
+        return max(0, counters.get(counter_field(kind, field, value), 0))
+
+    async def rebuild(self, tenant: TenantContext) -> dict:
+        """Recount every counted collection of a client and overwrite its counters"""
+        print(f"DEBUG: Rebuilding counters for {tenant.path}")
+        counters = Counter()
+        for kind, (collection_name, _) in COUNTED_KINDS.items():
+            counters[counter_field(kind)] += 0
+            async for doc in tenant.collection(collection_name).stream():
+                counters.update(counter_keys(kind, doc.to_dict()))
+
+        counters = dict(counters)
+        counters["rebuilt_at"] = datetime.utcnow()
+        await self.get_counters_ref(tenant).set(counters)
+        return counters
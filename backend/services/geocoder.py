@@ -0,0 +1,194 @@
+from typing import Iterable, List, Optional, Tuple
+from collections import OrderedDict
+import csv
+import math
+import os
+import threading
+
+import numpy as np
+
+# Bundled gazetteer of populated places, built from GeoNames by build_gazetteer.py
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.csv")
+GAZETTEER_COLUMNS = ["name", "country", "latitude", "longitude"]
+
+GEOCODER_CACHE_SIZE = int(os.getenv("GEOCODER_CACHE_SIZE", "10000"))
+
+# Coordinates are rounded to this many decimals (about 110 m) before lookup and caching
+COORDINATE_PRECISION = 3
+
+# Points farther than this from every place (at sea, remote areas) have no location name
+MAX_PLACE_DISTANCE_KM = float(os.getenv("GEOCODER_MAX_DISTANCE_KM", "100"))
+
+EARTH_RADIUS_KM = 6371.0
+
+# k-d tree ranges at most this long are scanned instead of split further
+KD_LEAF_SIZE = 8
+
+def unit_vectors(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere, so straight-line nearest is great-circle nearest (poles and the antimeridian included)"""
+    lat = np.radians(latitudes)
+    lng = np.radians(longitudes)
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+def chord_to_km(chord: float) -> float:
+    """Great-circle distance for a straight-line distance between unit vectors"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+def km_to_chord(distance_km: float) -> float:
+    """Straight-line distance between unit vectors for a great-circle distance"""
+    return 2 * math.sin(min(math.pi, distance_km / EARTH_RADIUS_KM) / 2)
+
+def valid_coordinates(latitude, longitude) -> bool:
+    """Whether latitude and longitude are finite numbers within range"""
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return False
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+class PlaceIndex:
+    """Static k-d tree over place coordinates, stored implicitly in one sorted array.
+
+    Each range [lo, hi) is split at its midpoint on axis depth % 3, so a query
+    visits O(log n) ranges and scans a few leaf points.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        points = unit_vectors(latitudes, longitudes)
+        order = np.arange(len(points))
+
+        ranges = [(0, len(points), 0)]
+        while ranges:
+            lo, hi, depth = ranges.pop()
+            if hi - lo <= KD_LEAF_SIZE:
+                continue
+            mid = (lo + hi) // 2
+            segment = order[lo:hi]
+            order[lo:hi] = segment[np.argpartition(points[segment, depth % 3], mid - lo)]
+            ranges.append((lo, mid, depth + 1))
+            ranges.append((mid + 1, hi, depth + 1))
+
+        # Plain lists: indexing them is much cheaper than indexing NumPy arrays one element at a time
+        self.order = order.tolist()
+        self.points = points[order].tolist()
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def nearest(self, latitude: float, longitude: float, max_distance_km: float = math.inf) -> Tuple[int, float]:
+        """Index (into the original places) and distance in km of the place nearest a point.
+
+        Returns (-1, inf) if no place is within max_distance_km; the bound also
+        prunes the search, so points far from every place stay cheap.
+        """
+        lat, lng = math.radians(latitude), math.radians(longitude)
+        query = [math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat)]
+        best = [-1, km_to_chord(max_distance_km) ** 2]  # Position in the tree, squared straight-line distance
+
+        def search(lo: int, hi: int, depth: int):
+            if hi - lo <= KD_LEAF_SIZE:
+                for position in range(lo, hi):
+                    self.visit(position, query, best)
+                return
+            mid = (lo + hi) // 2
+            self.visit(mid, query, best)
+            axis = depth % 3
+            offset = query[axis] - self.points[mid][axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if offset < 0 else ((mid + 1, hi), (lo, mid))
+            search(near[0], near[1], depth + 1)
+            # The far side can only hold a closer place if the splitting plane is closer than the best so far
+            if offset * offset < best[1]:
+                search(far[0], far[1], depth + 1)
+
+        search(0, len(self.points), 0)
+        if best[0] < 0:
+            return -1, math.inf
+        return self.order[best[0]], chord_to_km(math.sqrt(best[1]))
+
+    def visit(self, position: int, query: list, best: list):
+        point = self.points[position]
+        distance = (point[0] - query[0]) ** 2 + (point[1] - query[1]) ** 2 + (point[2] - query[2]) ** 2
+        if distance < best[1]:
+            best[0], best[1] = position, distance
+
+class ReverseGeocoder:
+    """Offline reverse geocoding: nearest gazetteer place, behind an LRU cache keyed by rounded coordinates.
+
+    The gazetteer is loaded and indexed on first use; after that a lookup is
+    a cache hit or one k-d tree query, with no network access.
+    """
+
+    def __init__(self, path: str = GAZETTEER_PATH, cache_size: int = GEOCODER_CACHE_SIZE,
+                 max_distance_km: float = MAX_PLACE_DISTANCE_KM):
+        self.path = path
+        self.cache_size = cache_size
+        self.max_distance_km = max_distance_km
+        self.names = None
+        self.index = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Read the gazetteer and build its spatial index (done once, on first lookup)"""
+        with self._load_lock:
+            if self.index is not None:
+                return
+            with open(self.path, encoding="utf-8", newline="") as f:
+                rows = list(csv.DictReader(f))
+            print(f"DEBUG: Loaded {len(rows)} gazetteer places from {self.path}")
+            names = [f"{row['name']}, {row['country']}" if row["country"] else row["name"] for row in rows]
+            latitudes = np.array([float(row["latitude"]) for row in rows])
+            longitudes = np.array([float(row["longitude"]) for row in rows])
+            self.names = names
+            self.index = PlaceIndex(latitudes, longitudes)
+
+    def location_name(self, latitude, longitude) -> Optional[str]:
+        """Name ("Place, Country") of the place nearest a point, or None if there is none close enough"""
+        if not valid_coordinates(latitude, longitude):
+            return None
+        key = (round(float(latitude), COORDINATE_PRECISION), round(float(longitude), COORDINATE_PRECISION))
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        # Looked up at the rounded point, so every point sharing a cache key gets the same name
+        if self.index is None:
+            self.load()
+        place, _ = self.index.nearest(key[0], key[1], self.max_distance_km)
+        name = self.names[place] if place >= 0 else None
+
+        with self._lock:
+            self._cache[key] = name
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return name
+
+    def location_names(self, coordinates: Iterable[Tuple[Optional[float], Optional[float]]]) -> List[Optional[str]]:
+        """Location names for many (latitude, longitude) pairs, in order"""
+        return [self.location_name(latitude, longitude) for latitude, longitude in coordinates]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "places": len(self.index) if self.index is not None else 0,
+                "size": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Process-wide geocoder shared by the results, responses and export endpoints
+geocoder = ReverseGeocoder()
@@ -0,0 +1,97 @@
+from typing import Optional
+from datetime import datetime, timedelta
+import os
+import traceback
+import uuid
+
+from models.schemas import Job, JobStatus
+from models.database import get_db, COLLECTIONS
+
+# A running job that has not reported progress for this long is assumed lost (e.g. instance restart)
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+
+def is_job_active(job: Optional[Job]) -> bool:
+    """Whether a job is still pending or running (and not stale)"""
+    if not job or job.status not in (JobStatus.PENDING, JobStatus.RUNNING):
+        return False
+    return job.updated_at > datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+
+class JobProgress:
+    """Running totals for a job, written to its document as work completes"""
+
+    def __init__(self, job_service: "JobService", job: Job):
+        self.job_service = job_service
+        self.job = job
+
+    async def add(self, key: str, count: int):
+        self.job.progress[key] = self.job.progress.get(key, 0) + count
+        await self.job_service.update_job(self.job.id, {"progress": self.job.progress})
+
+class JobService:
+    """Background jobs whose progress is stored in Firestore, so any instance can report it"""
+
+    def __init__(self):
+        self.db = get_db()
+
+    def get_jobs_collection(self):
+        """Get the top-level jobs collection"""
+        return self.db.collection(COLLECTIONS["jobs"])
+
+    def new_job(self, job_type: str, owner: str, target: dict) -> Job:
+        """A new pending job, not yet recorded (for callers that write it in a transaction or batch)"""
+        now = datetime.utcnow()
+        return Job(
+            id=str(uuid.uuid4()),
+            type=job_type,
+            owner=owner,
+            target=target,
+            created_at=now,
+            updated_at=now
+        )
+
+    async def create_job(self, job_type: str, owner: str, target: dict) -> Job:
+        """Record a new pending job"""
+        job = self.new_job(job_type, owner, target)
+        await self.get_jobs_collection().document(job.id).set(job.dict())
+        return job
+
+    async def update_job(self, job_id: str, update_data: dict):
+        """Update a job document"""
+        update_data["updated_at"] = datetime.utcnow()
+        await self.get_jobs_collection().document(job_id).update(update_data)
+
+    async def get_job(self, job_id: str, owner: Optional[str] = None) -> Optional[Job]:
+        """Get a job by ID, optionally only if it belongs to owner"""
+        doc = await self.get_jobs_collection().document(job_id).get()
+
+        if not doc.exists:
+            return None
+
+        job_data = doc.to_dict()
+        if owner is not None and job_data.get("owner") != owner:
+            return None
+
+        return Job(**job_data)
+
+    async def run(self, job: Job, func, *args):
+        """Run func(*args, progress) as the job's body, recording its status and any error"""
+        print(f"DEBUG: Starting {job.type} job {job.id}")
+        await self.update_job(job.id, {"status": JobStatus.RUNNING.value})
+
+        try:
+            await func(*args, JobProgress(self, job))
+        except Exception as e:
+            print(f"ERROR in {job.type} job {job.id}: {e}")
+            traceback.print_exc()
+            await self.update_job(job.id, {
+                "status": JobStatus.FAILED.value,
+                "error": str(e),
+                "finished_at": datetime.utcnow()
+            })
+            return
+
+        await self.update_job(job.id, {
+            "status": JobStatus.COMPLETED.value,
+            "finished_at": datetime.utcnow()
+        })
+        print(f"DEBUG: Finished {job.type} job {job.id}: {job.progress}")
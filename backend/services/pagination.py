@@ -0,0 +1,61 @@
+from typing import Optional, Tuple
+import base64
+import json
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor token cannot be decoded"""
+
+# Firestore's document ID field; ordering by it needs no composite index
+DOCUMENT_ID = "__name__"
+
+# Counting a query stops after this many matches; larger totals are reported as approximate
+COUNT_LIMIT = 1000
+
+def encode_cursor(doc_id: str) -> str:
+    """Encode the last document ID of a page as an opaque cursor token"""
+    payload = json.dumps({"id": doc_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    """Decode a cursor token back to the document ID to start after"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        doc_id = payload["id"]
+        if not isinstance(doc_id, str) or not doc_id:
+            raise ValueError
+        return doc_id
+    except Exception:
+        raise InvalidCursorError("Invalid pagination cursor")
+
+def paginate_query(query, page: int, size: int, cursor: Optional[str] = None):
+    """Order a query by document ID and restrict it to one page.
+
+    With a cursor the page starts right after the cursor's document, so its
+    cost is constant. Without one, the legacy page number is honoured with an
+    offset.
+    """
+    query = query.order_by(DOCUMENT_ID).limit(size)
+    if cursor:
+        return query.start_after({DOCUMENT_ID: decode_cursor(cursor)})
+    if page > 1:
+        return query.offset((page - 1) * size)
+    return query
+
+def next_cursor(docs: list, size: int) -> Optional[str]:
+    """Cursor for the page after docs, or None when docs was the last page"""
+    if len(docs) < size:
+        return None
+    return encode_cursor(docs[-1].id)
+
+async def count_query(query, limit: int = COUNT_LIMIT) -> Tuple[int, bool]:
+    """Count the documents matching a query, fetching at most limit + 1 of their keys.
+
+    Returns the count and whether it was capped at limit (the real total is
+    larger). The pinned Firestore client has no count aggregation, so this
+    bounds the cost of counting a broad search instead.
+    """
+    docs = list(await query.select([DOCUMENT_ID]).limit(limit + 1).get())
+    if len(docs) > limit:
+        return limit, True
+    return len(docs), False
@@ -4,78 +4,40 @@ import uuid
 
 from models.schemas import Question, QuestionCreate, QuestionUpdate, QuestionType, PaginatedResponse
 from models.database import get_db, COLLECTIONS
+from services.tenant_service import TenantContext
+from services.pagination import paginate_query, next_cursor, count_query
+from services.search_index import SEARCH_FIELD, search_tokens, search_term
+from services.counter_service import CounterService
+from services.bulk import get_all_docs
 # FieldFilter not available in older firestore version
 
+def question_fields(question_data: dict) -> dict:
+    """Question document data under the API's field names.
+
+    Questions created from the client console store createdAt instead of
+    created_at and no updated_at; one never edited was last updated when it
+    was created.
+    """
+    data = dict(question_data)
+    created_at = data.pop("createdAt", None)
+    if data.get("created_at") is None:
+        data["created_at"] = created_at
+    if data.get("updated_at") is None:
+        data["updated_at"] = data.get("created_at")
+    return data
+
 class QuestionService:
     def __init__(self):
         self.db = get_db()
-        # We'll set the collection path dynamically based on client
+        self.counter_service = CounterService()
     
-    async def find_client_by_email(self, client_email: str):
-        """Find client document ID by email"""
-        try:
-            print(f"DEBUG: Searching for client with email: {client_email}")
-            # Search through all superadmin documents
-            superadmin_collection = self.db.collection("superadmin")
-            superadmin_docs = superadmin_collection.stream()
-            
-            for superadmin_doc in superadmin_docs:
-                print(f"DEBUG: Checking superadmin: {superadmin_doc.id}")
-                # Search through clients in this superadmin
-                clients_collection = superadmin_doc.reference.collection("clients")
-                clients_docs = clients_collection.where("email", "==", client_email).stream()
-                
-                for client_doc in clients_docs:
-                    print(f"DEBUG: Found client {client_doc.id} in superadmin {superadmin_doc.id}")
-                    return {
-                        "superadmin_id": superadmin_doc.id,
-                        "client_id": client_doc.id
-                    }
-            
-            print(f"DEBUG: Client not found")
-            return None
-        except Exception as e:
-            print(f"ERROR finding client: {e}")
-            return None
-
-    async def ensure_client_exists(self, client_info: dict, client_email: str):
-        """Ensure client document exists in Firestore"""
-        try:
-            client_doc_ref = self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"])
-            client_doc = client_doc_ref.get()
-            
-            if not client_doc.exists:
-                # Create client document if it doesn't exist
-                client_data = {
-                    "email": client_email,
-                    "created_at": datetime.utcnow(),
-                    "status": "active"
-                }
-                client_doc_ref.set(client_data)
-                print(f"DEBUG: Created client document for {client_email} with ID {client_info['client_id']}")
-        except Exception as e:
-            print(f"ERROR ensuring client exists: {e}")
-    
-    async def get_client_questions_collection(self, client_email: str):
+    def get_client_questions_collection(self, tenant: TenantContext):
         """Get the questions collection for a specific client"""
-        client_info = await self.find_client_by_email(client_email)
-        
-        if not client_info:
-            raise ValueError(f"Failed to create/find client admin: {client_email}")
-        
-        # Ensure client document exists
-        await self.ensure_client_exists(client_info, client_email)
-        
-        path = f"superadmin/{client_info['superadmin_id']}/clients/{client_info['client_id']}/questions"
-        print(f"DEBUG: Using Firestore path: {path}")
-        
-        collection_ref = self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"]).collection("questions")
-        print(f"DEBUG: Collection reference path: {collection_ref._path}")
-        return collection_ref
+        return tenant.collection("questions")
 
-    async def create_question(self, question_data: QuestionCreate, created_by: str) -> Question:
+    async def create_question(self, question_data: QuestionCreate, tenant: TenantContext) -> Question:
         """Create a new question"""
-        print(f"DEBUG: Creating question for {created_by}")
+        print(f"DEBUG: Creating question for {tenant.email}")
         
         # Validate options for multiple choice questions
         if question_data.type == QuestionType.MULTIPLE_CHOICE:
@@ -95,16 +57,21 @@ class QuestionService:
             order=question_data.order,
             created_at=now,
             updated_at=now,
-            created_by=created_by
+            created_by=tenant.email
         )
         
         try:
             # Save to Firestore in hierarchical structure
-            print(f"DEBUG: Finding client collection for {created_by}")
-            collection = await self.get_client_questions_collection(created_by)
+            print(f"DEBUG: Finding client collection for {tenant.email}")
+            collection = self.get_client_questions_collection(tenant)
             print(f"DEBUG: Got collection, saving question {question_id}")
             print(f"DEBUG: Collection path: {collection._path}")
-            collection.document(question_id).set(question.dict())
+            question_doc = question.dict()
+            question_doc[SEARCH_FIELD] = search_tokens(question.text)
+            batch = self.db.batch()
+            batch.set(collection.document(question_id), question_doc)
+            self.counter_service.track(batch, tenant, "questions", None, question.dict())
+            await batch.commit()
             print(f"DEBUG: Question saved successfully at path: {collection._path}/{question_id}")
         except Exception as e:
             print(f"ERROR: Failed to save question: {e}")
@@ -116,77 +83,77 @@ class QuestionService:
 
     async def get_questions(
         self, 
-        created_by: str, 
+        tenant: TenantContext, 
         page: int = 1, 
         size: int = 10,
         search: Optional[str] = None,
-        question_type: Optional[QuestionType] = None
+        question_type: Optional[QuestionType] = None,
+        cursor: Optional[str] = None
     ) -> PaginatedResponse:
         """Get paginated list of questions"""
-        collection = await self.get_client_questions_collection(created_by)
-        query = collection.where("created_by", "==", created_by)
+        collection = self.get_client_questions_collection(tenant)
+        query = collection.where("created_by", "==", tenant.email)
         
         # Apply filters
         if question_type:
             query = query.where("type", "==", question_type.value)
-        
-        # Get total count
-        total_docs = query.get()
-        total = len(list(total_docs))
-        
-        # Get documents without ordering (to avoid index requirement)
-        docs = query.limit(size * page).get()
+        term = search_term(search)
+        if term:
+            query = query.where(SEARCH_FIELD, "array_contains", term)
+        
+        # Get total count from the tenant counters (a single document read);
+        # searches are not counted, so those count the matching keys, up to a cap
+        total_is_approximate = False
+        if term:
+            total, total_is_approximate = await count_query(query)
+        elif question_type:
+            total = await self.counter_service.count(tenant, "questions", "type", question_type)
+        else:
+            total = await self.counter_service.count(tenant, "questions")
+        
+        # Fetch only the requested page, ordered by document ID (no composite index needed)
+        docs = await paginate_query(query, page, size, cursor).get()
         
         questions = []
         for doc in docs:
-            question_data = doc.to_dict()
+            question_data = question_fields(doc.to_dict())
             question_data["id"] = doc.id
-            
-            # Apply search filter (client-side for simplicity)
-            if search:
-                search_lower = search.lower()
-                if search_lower not in question_data["text"].lower():
-                    continue
-            
             questions.append(Question(**question_data))
         
-        # Simple client-side pagination
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        paginated_questions = questions[start_idx:end_idx]
-        
         pages = (total + size - 1) // size
         
         return PaginatedResponse(
-            items=[question.dict() for question in paginated_questions],
+            items=[question.dict() for question in questions],
             total=total,
             page=page,
             size=size,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor(docs, size),
+            total_is_approximate=total_is_approximate
         )
 
-    async def get_question_by_id(self, question_id: str, created_by: str) -> Optional[Question]:
+    async def get_question_by_id(self, question_id: str, tenant: TenantContext) -> Optional[Question]:
         """Get question by ID"""
-        collection = await self.get_client_questions_collection(created_by)
-        doc = collection.document(question_id).get()
+        collection = self.get_client_questions_collection(tenant)
+        doc = await collection.document(question_id).get()
         
         if not doc.exists:
             return None
         
-        question_data = doc.to_dict()
+        question_data = question_fields(doc.to_dict())
         question_data["id"] = doc.id
         
         # Check if question belongs to the current client admin
-        if question_data.get("created_by") != created_by:
+        if question_data.get("created_by") != tenant.email:
             return None
         
         return Question(**question_data)
 
-    async def update_question(self, question_id: str, question_data: QuestionUpdate, created_by: str) -> Optional[Question]:
+    async def update_question(self, question_id: str, question_data: QuestionUpdate, tenant: TenantContext) -> Optional[Question]:
         """Update question"""
-        collection = await self.get_client_questions_collection(created_by)
+        collection = self.get_client_questions_collection(tenant)
         doc_ref = collection.document(question_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return None
@@ -194,7 +161,7 @@ class QuestionService:
         current_data = doc.to_dict()
         
         # Check if question belongs to the current client admin
-        if current_data.get("created_by") != created_by:
+        if current_data.get("created_by") != tenant.email:
             return None
         
         # Validate options for multiple choice questions
@@ -206,6 +173,7 @@ class QuestionService:
         update_data = {}
         if question_data.text is not None:
             update_data["text"] = question_data.text
+            update_data[SEARCH_FIELD] = search_tokens(question_data.text)
         if question_data.type is not None:
             update_data["type"] = question_data.type.value
         if question_data.options is not None:
@@ -217,21 +185,24 @@ class QuestionService:
         
         update_data["updated_at"] = datetime.utcnow()
         
-        # Update document
-        doc_ref.update(update_data)
+        # Update document and counters together, failing if the question changed since it was read
+        batch = self.db.batch()
+        batch.update(doc_ref, update_data, option=self.db.write_option(last_update_time=doc.update_time))
+        self.counter_service.track(batch, tenant, "questions", current_data, {**current_data, **update_data})
+        await batch.commit()
         
         # Return updated question
-        updated_doc = doc_ref.get()
-        updated_data = updated_doc.to_dict()
+        updated_doc = await doc_ref.get()
+        updated_data = question_fields(updated_doc.to_dict())
         updated_data["id"] = updated_doc.id
         
         return Question(**updated_data)
 
-    async def delete_question(self, question_id: str, created_by: str) -> bool:
+    async def delete_question(self, question_id: str, tenant: TenantContext) -> bool:
         """Delete question"""
-        collection = await self.get_client_questions_collection(created_by)
+        collection = self.get_client_questions_collection(tenant)
         doc_ref = collection.document(question_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return False
@@ -239,26 +210,41 @@ class QuestionService:
         question_data = doc.to_dict()
         
         # Check if question belongs to the current client admin
-        if question_data.get("created_by") != created_by:
+        if question_data.get("created_by") != tenant.email:
             return False
         
         # TODO: Check if question is used in any surveys before deleting
         # For now, we'll allow deletion
         
         # Delete document
-        doc_ref.delete()
+        batch = self.db.batch()
+        batch.delete(doc_ref, option=self.db.write_option(last_update_time=doc.update_time))
+        self.counter_service.track(batch, tenant, "questions", question_data, None)
+        await batch.commit()
         
         return True
 
-    async def get_questions_by_ids(self, question_ids: List[str], created_by: str) -> List[Question]:
-        """Get multiple questions by their IDs"""
+    async def get_questions_by_ids(self, question_ids: List[str], tenant: TenantContext) -> List[Question]:
+        """Get multiple questions by their IDs, in the given order"""
         if not question_ids:
             return []
         
+        # One batched multi-get instead of a point read per question
+        collection = self.get_client_questions_collection(tenant)
+        docs = await get_all_docs(self.db, [collection.document(question_id) for question_id in question_ids])
+        
         questions = []
-        for question_id in question_ids:
-            question = await self.get_question_by_id(question_id, created_by)
-            if question:
-                questions.append(question)
+        for doc in docs:
+            if not doc.exists:
+                continue
+            
+            question_data = question_fields(doc.to_dict())
+            question_data["id"] = doc.id
+            
+            # Skip questions that don't belong to the current client admin
+            if question_data.get("created_by") != tenant.email:
+                continue
+            
+            questions.append(Question(**question_data))
         
         return questions
@@ -0,0 +1,157 @@
+from typing import AsyncIterator, List, Optional, Tuple
+import csv
+import io
+import json
+import math
+
+from models.schemas import Question
+
+# Export format -> media type
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+# Columns of every export, before the one column per question
+RESPONSE_COLUMNS = ["response_id", "user_id", "user_name", "submitted_at", "latitude", "longitude", "location_name"]
+
+# Columns typed as float64 in Parquet exports and as numbers in NDJSON (all other Parquet columns are strings)
+NUMERIC_COLUMNS = {"latitude", "longitude"}
+
+class ExportFormatError(ValueError):
+    """Raised when an export is requested in an unknown format"""
+
+def check_format(fmt: str) -> str:
+    """Validate an export format name"""
+    if fmt not in EXPORT_FORMATS:
+        raise ExportFormatError(f"Unsupported export format: {fmt} (use {', '.join(EXPORT_FORMATS)})")
+    return fmt
+
+def export_columns(questions: List[Question]) -> List[Tuple[str, str]]:
+    """(row key, column header) pairs: the response fields, then each question by its text"""
+    columns = [(column, column) for column in RESPONSE_COLUMNS]
+    headers = {column for column in RESPONSE_COLUMNS}
+    for question in questions:
+        # Questions sharing a text are told apart by their ID
+        header = question.text if question.text not in headers else f"{question.text} ({question.id})"
+        headers.add(header)
+        columns.append((question.id, header))
+    return columns
+
+def flatten_value(value) -> Optional[str]:
+    """An answer as a single cell: lists joined with "; ", empty answers as None"""
+    if value is None or value == "" or value == []:
+        return None
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+def number_value(value) -> Optional[float]:
+    """A numeric cell as a float, None if it is missing or not a finite number"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+def json_value(value):
+    """An answer as a JSON value: lists stay arrays and numbers and booleans keep their type, empty answers are null"""
+    if value is None or value == "" or value == []:
+        return None
+    if isinstance(value, list):
+        return [json_value(item) for item in value]
+    if isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return number_value(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+async def stream_csv(pages: AsyncIterator[List[dict]], columns: List[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """Encode pages of rows as CSV, one chunk per page"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in columns])
+    yield ("﻿" + buffer.getvalue()).encode("utf-8")  # BOM, so spreadsheets detect UTF-8
+
+    async for rows in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([flatten_value(row.get(key)) for key, _ in columns] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+async def stream_ndjson(pages: AsyncIterator[List[dict]], columns: List[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """Encode pages of rows as newline-delimited JSON objects keyed by column header, with native JSON types"""
+    def cell(key: str, row: dict):
+        if key in NUMERIC_COLUMNS:
+            return number_value(row.get(key))
+        return json_value(row.get(key))
+
+    async for rows in pages:
+        yield "".join(
+            json.dumps({header: cell(key, row) for key, header in columns}, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last take()"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+async def stream_parquet(pages: AsyncIterator[List[dict]], columns: List[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """Encode pages of rows as a Parquet file, one row group per page"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def column_array(key: str, rows: List[dict]):
+        if key in NUMERIC_COLUMNS:
+            return pa.array([number_value(row.get(key)) for row in rows], type=pa.float64())
+        return pa.array([flatten_value(row.get(key)) for row in rows], type=pa.string())
+
+    # Question IDs never collide with the response columns, so keys identify numeric columns
+    schema = pa.schema([(header, pa.float64() if key in NUMERIC_COLUMNS else pa.string()) for key, header in columns])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in pages:
+            table = pa.Table.from_arrays([column_array(key, rows) for key, _ in columns], schema=schema)
+            writer.write_table(table)
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+def stream_export(pages: AsyncIterator[List[dict]], questions: List[Question], fmt: str) -> AsyncIterator[bytes]:
+    """Encoded export chunks for pages of response rows"""
+    columns = export_columns(questions)
+    if fmt == "parquet":
+        return stream_parquet(pages, columns)
+    if fmt == "ndjson":
+        return stream_ndjson(pages, columns)
+    return stream_csv(pages, columns)
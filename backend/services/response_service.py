@@ -0,0 +1,190 @@
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+
+from models.schemas import SurveyWithQuestions, EnrichedResponse, EnrichedAnswer, PaginatedResponse
+from models.database import get_db, COLLECTIONS
+from services.tenant_service import TenantContext
+from services.survey_service import SurveyService
+from services.pagination import DOCUMENT_ID, paginate_query, next_cursor, count_query
+from services.bulk import get_all_docs
+from services.results_service import ResultsService, answers_map
+from services.geocoder import geocoder
+
+# Responses read per page when walking a whole survey
+RESPONSE_PAGE_SIZE = 500
+
+def response_user_id(response_data: dict) -> Optional[str]:
+    """ID of the user who submitted a response (the mobile app writes userId)"""
+    return response_data.get("userId") or response_data.get("user_id")
+
+def response_submitted_at(response_data: dict):
+    """Submission time of a response (the mobile app writes submittedAt)"""
+    return response_data.get("submittedAt") or response_data.get("submitted_at")
+
+def response_location(response_data: dict) -> Tuple[Optional[float], Optional[float]]:
+    """Latitude and longitude of a response's geoCode (a GeoPoint), if it has one"""
+    geo_code = response_data.get("geoCode")
+    if geo_code is None:
+        return None, None
+    if isinstance(geo_code, dict):
+        return geo_code.get("latitude", geo_code.get("_lat")), geo_code.get("longitude", geo_code.get("_long"))
+    return getattr(geo_code, "latitude", None), getattr(geo_code, "longitude", None)
+
+class ResponseService:
+    """Reads survey responses page by page, joined with their users in bulk"""
+
+    def __init__(self):
+        self.db = get_db()
+        self.survey_service = SurveyService()
+        self.results_service = ResultsService()
+
+    def get_responses_collection(self, survey_id: str, tenant: TenantContext):
+        """Get the responses collection of a survey"""
+        return self.survey_service.get_client_surveys_collection(tenant).document(survey_id).collection("responses")
+
+    async def iter_response_pages(self, survey_id: str, tenant: TenantContext, page_size: int = RESPONSE_PAGE_SIZE) -> AsyncIterator[list]:
+        """Yield a survey's responses a page at a time, in document ID order"""
+        query = self.get_responses_collection(survey_id, tenant).order_by(DOCUMENT_ID).limit(page_size)
+        page_query = query
+
+        while True:
+            docs = list(await page_query.get())
+            if docs:
+                yield docs
+            if len(docs) < page_size:
+                return
+            page_query = query.start_after({DOCUMENT_ID: docs[-1].id})
+
+    async def resolve_user_names(self, user_ids: List[str], names: Dict[str, Optional[str]], tenant: TenantContext):
+        """Add the full names of users not yet in names (an identity map), with chunked multi-gets.
+
+        Mobile users live in the flat users collection; the client's own
+        users collection is checked for any IDs not found there.
+        """
+        missing = list({user_id for user_id in user_ids if user_id and user_id not in names})
+        for collection in (self.db.collection(COLLECTIONS["users"]), tenant.collection("users")):
+            if not missing:
+                break
+            docs = await get_all_docs(self.db, [collection.document(user_id) for user_id in missing])
+            for doc in docs:
+                if doc.exists:
+                    user_data = doc.to_dict()
+                    names[doc.id] = user_data.get("full_name") or user_data.get("name")
+            missing = [doc.id for doc in docs if not doc.exists]
+
+        # Users that no longer exist are remembered too, so they are not fetched again
+        for user_id in missing:
+            names[user_id] = None
+
+    async def resolve_question_texts(self, question_ids: List[str], texts: Dict[str, Optional[str]], tenant: TenantContext):
+        """Add the texts of questions not yet in texts (an identity map), with chunked multi-gets"""
+        missing = list({question_id for question_id in question_ids if question_id and question_id not in texts})
+        if not missing:
+            return
+
+        collection = tenant.collection("questions")
+        for doc in await get_all_docs(self.db, [collection.document(question_id) for question_id in missing]):
+            question_data = doc.to_dict() or {}
+            texts[doc.id] = question_data.get("text") or question_data.get("question_text") or question_data.get("question")
+
+    async def get_responses_page(
+        self,
+        survey_id: str,
+        tenant: TenantContext,
+        page: int = 1,
+        size: int = 20,
+        cursor: Optional[str] = None
+    ) -> Optional[PaginatedResponse]:
+        """Get a page of a survey's responses joined with user names and question texts.
+
+        The round trips do not depend on the page: the survey and its
+        questions, the page and the rollup total, then the missing users and
+        questions, each fetched with chunked multi-gets. Surveys without a ready
+        rollup are counted with a capped key query instead; the total never
+        triggers a rebuild or reads the answers.
+        """
+        survey = await self.survey_service.get_survey_with_questions(survey_id, tenant)
+        if not survey:
+            return None
+
+        responses_collection = self.get_responses_collection(survey_id, tenant)
+        query = paginate_query(responses_collection, page, size, cursor)
+        docs, rollup = await asyncio.gather(query.get(), self.results_service.get_ready_rollup(survey_id, tenant))
+        if rollup is not None:
+            total, total_is_approximate = rollup["responses"], False
+        else:
+            total, total_is_approximate = await count_query(responses_collection)
+        responses = [(doc.id, doc.to_dict()) for doc in docs]
+        answers = {response_id: answers_map(data.get("answers")) for response_id, data in responses}
+
+        # Identity maps for this request: each user and question is fetched at most once
+        question_texts = {question.id: question.text for question in survey.questions}
+        user_names = {}
+        await asyncio.gather(
+            self.resolve_question_texts([question_id for row in answers.values() for question_id in row], question_texts, tenant),
+            self.resolve_user_names([response_user_id(data) for _, data in responses], user_names, tenant)
+        )
+
+        # Answers in survey question order, then any answers to questions since removed from the survey
+        question_order = {question.id: index for index, question in enumerate(survey.questions)}
+        locations = [response_location(data) for _, data in responses]
+        location_names = geocoder.location_names(locations)
+        items = []
+        for (response_id, data), (latitude, longitude), location_name in zip(responses, locations, location_names):
+            user_id = response_user_id(data)
+            items.append(EnrichedResponse(
+                id=response_id,
+                user_id=user_id,
+                user_name=user_names.get(user_id),
+                submitted_at=response_submitted_at(data),
+                latitude=latitude,
+                longitude=longitude,
+                location_name=location_name,
+                answers=[
+                    EnrichedAnswer(question_id=question_id, question_text=question_texts.get(question_id), answer=answer)
+                    for question_id, answer in sorted(
+                        answers[response_id].items(), key=lambda item: question_order.get(item[0], len(question_order))
+                    )
+                    if question_id
+                ]
+            ).dict())
+
+        return PaginatedResponse(
+            items=items,
+            total=total,
+            page=page,
+            size=size,
+            pages=(total + size - 1) // size,
+            next_cursor=next_cursor(docs, size),
+            total_is_approximate=total_is_approximate
+        )
+
+    async def iter_export_rows(self, survey: SurveyWithQuestions, tenant: TenantContext) -> AsyncIterator[List[dict]]:
+        """Yield pages of flat export rows: response fields, the user's name, the location name and one value per question"""
+        async for docs in self.iter_response_pages(survey.id, tenant):
+            responses = [(doc.id, doc.to_dict()) for doc in docs]
+            # Names are looked up per page, so memory stays bounded however many users answered
+            user_names = {}
+            await self.resolve_user_names([response_user_id(data) for _, data in responses], user_names, tenant)
+
+            locations = [response_location(data) for _, data in responses]
+            location_names = geocoder.location_names(locations)
+
+            rows = []
+            for (response_id, data), (latitude, longitude), location_name in zip(responses, locations, location_names):
+                answers = answers_map(data.get("answers"))
+                user_id = response_user_id(data)
+                submitted_at = response_submitted_at(data)
+                row = {
+                    "response_id": response_id,
+                    "user_id": user_id,
+                    "user_name": user_names.get(user_id),
+                    "submitted_at": submitted_at.isoformat() if hasattr(submitted_at, "isoformat") else submitted_at,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "location_name": location_name
+                }
+                for question in survey.questions:
+                    row[question.id] = answers.get(question.id)
+                rows.append(row)
+            yield rows
@@ -0,0 +1,416 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+import numpy as np
+
+from models.schemas import Question, QuestionType, QuestionResult, AnswerCount, SurveyResults, SurveyWithQuestions, Job
+from models.database import get_db
+from firebase_admin import firestore
+from services.tenant_service import TenantContext
+from services.survey_service import SurveyService, DELETING_FIELD
+from services.job_service import JobService, JobProgress, is_job_active
+from services.pagination import DOCUMENT_ID
+from services.bulk import get_all_docs, chunked, WRITE_BATCH_SIZE
+
+# Rollup documents under each survey: surveys/{id}/rollup_shards/{generation}-{0..ROLLUP_SHARDS-1}.
+# Responses increment a random shard, so a hot survey is not limited to one write per second.
+# Keep in sync with ROLLUP_SHARDS in functions/index.js.
+ROLLUP_COLLECTION = "rollup_shards"
+ROLLUP_SHARDS = 10
+
+# Per-response markers (surveys/{id}/rollup_applied/{response_id}) holding the generation
+# and answers a response is counted with, so each response is counted exactly once
+ROLLUP_MARKERS = "rollup_applied"
+
+# Rollup state of each survey, kept off the survey document so rebuilds never conflict with
+# survey edits: rollup_meta/{survey_id} holds the generation responses are counted into, the
+# last complete one (the one that is read) and the survey's rebuild job.
+# A rebuild counts into a new generation while readers keep the previous one.
+ROLLUP_META_COLLECTION = "rollup_meta"
+ROLLUP_GENERATION_FIELD = "generation"
+ROLLUP_READY_FIELD = "ready_generation"
+ROLLUP_JOB_FIELD = "rebuild_job_id"
+
+# Responses counted per rebuild transaction (their markers and one shard fit in a commit)
+ROLLUP_PAGE_SIZE = 200
+
+# Longer answers are counted under their first characters
+MAX_ROLLUP_KEY_LENGTH = 200
+
+# Answers counted as "yes" / "no" for yes_no questions (compared lowercased)
+YES_VALUES = ["yes", "y", "true", "1"]
+NO_VALUES = ["no", "n", "false", "0"]
+
+# Rating histograms always cover this scale, widened by any answers outside it
+DEFAULT_RATING_SCALE = (1, 5)
+
+def answers_map(answers) -> dict:
+    """A response's answers keyed by question ID, stored either as a map or as a list of answers"""
+    if isinstance(answers, dict):
+        return answers
+    if isinstance(answers, list):
+        return {item.get("question_id"): item.get("answer") for item in answers if isinstance(item, dict)}
+    return {}
+
+def object_array(values: list) -> np.ndarray:
+    """1-D object array of values, even when the values are themselves lists"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def answer_columns(answers: List[dict], question_ids: List[str]) -> Dict[str, np.ndarray]:
+    """Each question's non-empty answers across all responses, gathered in a single pass.
+
+    Responses arrive from Firestore as Python dicts, so collecting their
+    values is plain Python (one pass for all questions, not one per
+    question); NumPy only does the per-question counting that follows.
+    """
+    columns = {question_id: [] for question_id in question_ids}
+    for answers_row in answers:
+        for question_id, value in answers_row.items():
+            column = columns.get(question_id)
+            if column is not None and value is not None and value != "" and value != []:
+                column.append(value)
+    return {question_id: object_array(values) for question_id, values in columns.items()}
+
+def as_strings(column: np.ndarray) -> np.ndarray:
+    """Answers as a lowercased, stripped string array"""
+    return np.char.lower(np.char.strip(column.astype(str)))
+
+def as_numbers(column: np.ndarray) -> np.ndarray:
+    """Answers as floats, NaN where an answer is not a number"""
+    try:
+        return column.astype(float)
+    except (TypeError, ValueError):
+        def to_number(value):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return np.nan
+        return np.array([to_number(value) for value in column], dtype=float)
+
+def rollup_keys(column: np.ndarray) -> np.ndarray:
+    """Answers as rollup map keys: stripped strings of bounded length, booleans lowercased"""
+    keys = np.char.strip(column.astype(str)).astype(f"<U{MAX_ROLLUP_KEY_LENGTH}")
+    is_bool = np.array([isinstance(value, bool) for value in column], dtype=bool)
+    keys[is_bool] = np.char.lower(keys[is_bool])
+    return keys
+
+def question_rollup(question: Question, column: np.ndarray) -> dict:
+    """Rollup entry for one question's answers: answered count, value counts and numeric sum"""
+    entry = {"answered": len(column), "counts": {}, "sum": 0.0, "numeric": 0}
+    if not len(column):
+        return entry
+
+    if question.type == QuestionType.MULTIPLE_CHOICE:
+        # Multi-select answers are lists: every selected option counts once
+        is_list = np.array([isinstance(value, list) for value in column], dtype=bool)
+        if is_list.any():
+            column = np.concatenate([column[~is_list]] + [object_array(value) for value in column[is_list]])
+        keys = rollup_keys(column)
+        # Blank answers are no option, and Firestore rejects empty map keys
+        values, counts = np.unique(keys[keys != ""], return_counts=True)
+        entry["counts"] = dict(zip(values.tolist(), counts.tolist()))
+    elif question.type == QuestionType.RATING:
+        ratings = as_numbers(column)
+        ratings = ratings[np.isfinite(ratings)]
+        # Half-up rounding, as in the rollup trigger
+        values, counts = np.unique(np.floor(ratings + 0.5).astype(int), return_counts=True)
+        entry["counts"] = {str(value): count for value, count in zip(values.tolist(), counts.tolist())}
+        entry["sum"] = float(ratings.sum())
+        entry["numeric"] = len(ratings)
+    elif question.type == QuestionType.YES_NO:
+        strings = as_strings(column)
+        entry["counts"] = {
+            "yes": int(np.isin(strings, YES_VALUES).sum()),
+            "no": int(np.isin(strings, NO_VALUES).sum())
+        }
+    # Text answers are only counted
+    return entry
+
+def initial_rollup_meta() -> dict:
+    """Rollup state of a survey created without responses: its first generation is complete"""
+    return {ROLLUP_GENERATION_FIELD: 1, ROLLUP_READY_FIELD: 1}
+
+def rollup_increments(values: dict) -> dict:
+    """A rollup (or part of one) as Increment writes of its non-zero numbers, for set(merge=True)"""
+    increments = {}
+    for key, value in values.items():
+        if isinstance(value, dict):
+            nested = rollup_increments(value)
+            if nested:
+                increments[key] = nested
+        elif value:
+            increments[key] = firestore.Increment(value)
+    return increments
+
+def shard_generation(shard_id: str) -> int:
+    """Generation of a shard document ID ("{generation}-{n}"; shards from before generations count as 0)"""
+    generation, _, shard = shard_id.partition("-")
+    return int(generation) if shard and generation.isdigit() else 0
+
+def merge_rollups(shards: List[dict]) -> dict:
+    """Add up the shard documents of a rollup"""
+    rollup = {"responses": 0, "questions": {}}
+    for shard in shards:
+        rollup["responses"] += shard.get("responses", 0)
+        for question_id, shard_entry in (shard.get("questions") or {}).items():
+            entry = rollup["questions"].setdefault(question_id, {"answered": 0, "counts": {}, "sum": 0.0, "numeric": 0})
+            for field in ("answered", "sum", "numeric"):
+                entry[field] += shard_entry.get(field, 0)
+            for key, count in (shard_entry.get("counts") or {}).items():
+                entry["counts"][key] = entry["counts"].get(key, 0) + count
+    return rollup
+
+def choice_distribution(question: Question, counts: dict) -> List[AnswerCount]:
+    """Counts per option, in the question's option order followed by any other answers"""
+    # Answers may hold an option's ID or its text; both count towards the option
+    counted = {key: count for key, count in counts.items() if count > 0}
+    distribution = []
+    for option in sorted(question.options or [], key=lambda option: option.order):
+        count = counted.pop(option.text, 0) + (counted.pop(option.id, 0) if option.id != option.text else 0)
+        distribution.append(AnswerCount(value=option.text, count=count))
+    distribution.extend(
+        AnswerCount(value=value, count=count)
+        for value, count in sorted(counted.items(), key=lambda item: (-item[1], item[0]))
+    )
+    return distribution
+
+def rating_distribution(counts: dict) -> List[AnswerCount]:
+    """Histogram over the rating scale, widened by any ratings outside it"""
+    ratings = [int(key) for key, count in counts.items() if count > 0]
+    low = min([DEFAULT_RATING_SCALE[0]] + ratings)
+    high = max([DEFAULT_RATING_SCALE[1]] + ratings)
+    return [AnswerCount(value=str(value), count=counts.get(str(value), 0)) for value in range(low, high + 1)]
+
+def question_result(question: Question, entry: Optional[dict]) -> QuestionResult:
+    """Per-question aggregates from the question's rollup entry"""
+    entry = entry or {}
+    counts = entry.get("counts") or {}
+    result = QuestionResult(question_id=question.id, text=question.text, type=question.type, answered=entry.get("answered", 0))
+    if not result.answered:
+        return result
+
+    if question.type == QuestionType.MULTIPLE_CHOICE:
+        result.distribution = choice_distribution(question, counts)
+    elif question.type == QuestionType.RATING:
+        if entry.get("numeric"):
+            result.distribution = rating_distribution(counts)
+            result.mean = round(entry.get("sum", 0) / entry["numeric"], 2)
+    elif question.type == QuestionType.YES_NO:
+        result.distribution = [AnswerCount(value=key, count=counts.get(key, 0)) for key in ("yes", "no")]
+    return result
+
+class ResultsService:
+    """Survey results, read from a per-survey rollup that is kept up to date as responses arrive"""
+
+    def __init__(self):
+        self.db = get_db()
+        self.survey_service = SurveyService()
+        self.job_service = JobService()
+
+    def get_rollup_meta_ref(self, survey_id: str, tenant: TenantContext):
+        """Rollup state document of a survey: rollup_meta/{survey_id}"""
+        return tenant.collection(ROLLUP_META_COLLECTION).document(survey_id)
+
+    def get_rollup_refs(self, survey_id: str, generation: int, tenant: TenantContext) -> list:
+        """Shard documents of one generation of a survey's rollup: surveys/{id}/rollup_shards/{generation}-{n}"""
+        shards = self.survey_service.get_client_surveys_collection(tenant).document(survey_id).collection(ROLLUP_COLLECTION)
+        return [shards.document(f"{generation}-{shard}") for shard in range(ROLLUP_SHARDS)]
+
+    async def get_survey_results(self, survey_id: str, tenant: TenantContext) -> Optional[SurveyResults]:
+        """Per-question aggregates of all responses to a survey, from the survey and its rollup shards"""
+        survey = await self.survey_service.get_survey_with_questions(survey_id, tenant)
+        if not survey:
+            return None
+
+        rollup = await self.get_rollup(survey, tenant)
+
+        return SurveyResults(
+            survey_id=survey_id,
+            total_responses=rollup["responses"],
+            questions=[question_result(question, rollup["questions"].get(question.id)) for question in survey.questions]
+        )
+
+    async def get_rollup(self, survey: SurveyWithQuestions, tenant: TenantContext) -> dict:
+        """A survey's rollup: its ready generation, or an in-memory aggregate if it has none yet.
+
+        Never rebuilds: surveys answered before rollups existed are aggregated
+        on each read until rebuild_rollups.py or POST .../results/rebuild has run.
+        """
+        rollup = await self.get_ready_rollup(survey.id, tenant)
+        if rollup is None:
+            return await self.aggregate_responses(survey, tenant)
+        return rollup
+
+    async def get_ready_rollup(self, survey_id: str, tenant: TenantContext) -> Optional[dict]:
+        """A survey's rollup added up from the shards of its ready generation, None if it has none"""
+        meta_doc = await self.get_rollup_meta_ref(survey_id, tenant).get()
+        generation = (meta_doc.to_dict() or {}).get(ROLLUP_READY_FIELD)
+        if not generation:
+            return None
+
+        shard_docs = await get_all_docs(self.db, self.get_rollup_refs(survey_id, generation, tenant))
+        return merge_rollups([doc.to_dict() for doc in shard_docs if doc.exists])
+
+    async def aggregate_responses(self, survey: SurveyWithQuestions, tenant: TenantContext) -> dict:
+        """Rollup of all responses of a survey, computed in memory without writing it"""
+        # Only the answers are fetched, once, split into per-question columns, then summarized a column at a time
+        responses_collection = self.survey_service.get_client_surveys_collection(tenant).document(survey.id).collection("responses")
+        answers = [answers_map((doc.to_dict() or {}).get("answers")) async for doc in responses_collection.select(["answers"]).stream()]
+        columns = answer_columns(answers, [question.id for question in survey.questions])
+
+        return {
+            "responses": len(answers),
+            "questions": {question.id: question_rollup(question, columns[question.id]) for question in survey.questions}
+        }
+
+    async def start_rebuild(self, survey_id: str, tenant: TenantContext) -> Tuple[Optional[Job], bool]:
+        """Start rebuilding a survey's rollup as a background job, one at a time per survey.
+
+        Returns the rebuild job (None if the survey is not found) and whether
+        it was newly created and still has to be run.
+        """
+        if not await self.survey_service.get_survey_by_id(survey_id, tenant):
+            return None, False
+
+        meta_ref = self.get_rollup_meta_ref(survey_id, tenant)
+        job = self.job_service.new_job("rebuild_rollup", tenant.email, {"survey_id": survey_id})
+
+        @firestore.async_transactional
+        async def start(transaction):
+            meta_doc = await meta_ref.get(transaction=transaction)
+            job_id = (meta_doc.to_dict() or {}).get(ROLLUP_JOB_FIELD)
+            # A rebuild already under way is reported instead of being started twice
+            if job_id:
+                running = await self.job_service.get_job(job_id)
+                if is_job_active(running):
+                    return running, False
+            transaction.set(self.job_service.get_jobs_collection().document(job.id), job.dict())
+            transaction.set(meta_ref, {ROLLUP_JOB_FIELD: job.id}, merge=True)
+            return job, True
+
+        return await start(self.db.transaction())
+
+    async def rebuild_survey_rollup(self, survey_id: str, tenant: TenantContext, progress: JobProgress):
+        """Body of a rebuild job"""
+        survey = await self.survey_service.get_survey_with_questions(survey_id, tenant)
+        if survey:
+            await self.rebuild_rollup(survey, tenant, progress)
+
+    async def rebuild_rollup(self, survey: SurveyWithQuestions, tenant: TenantContext, progress: Optional[JobProgress] = None) -> Optional[dict]:
+        """Count all responses of a survey into a new rollup generation and make it the one that is read.
+
+        The rollup trigger counts new writes into the new generation as soon as
+        it is opened. Responses are counted a page at a time in transactions
+        that also write their markers, so each response is counted once, by
+        whichever of the trigger and the rebuild reaches it first. Returns the
+        new rollup, or None if the survey is being deleted or a newer rebuild
+        superseded this one. Run it through start_rebuild, which allows one
+        rebuild per survey at a time.
+        """
+        print(f"DEBUG: Rebuilding result rollup for survey {survey.id}")
+        survey_ref = self.survey_service.get_client_surveys_collection(tenant).document(survey.id)
+        meta_ref = self.get_rollup_meta_ref(survey.id, tenant)
+
+        generation = await self.start_rollup_generation(survey_ref, meta_ref)
+        if generation is None:
+            return None
+
+        query = survey_ref.collection("responses").select([DOCUMENT_ID]).order_by(DOCUMENT_ID).limit(ROLLUP_PAGE_SIZE)
+        page_query = query
+        page = 0
+        while True:
+            docs = list(await page_query.get())
+            if docs and not await self.count_rollup_page(survey_ref, meta_ref, survey, generation, page % ROLLUP_SHARDS, [doc.id for doc in docs]):
+                print(f"DEBUG: Rollup generation {generation} of survey {survey.id} was superseded")
+                return None
+            if progress and docs:
+                await progress.add("responses", len(docs))
+            if len(docs) < ROLLUP_PAGE_SIZE:
+                break
+            page += 1
+            page_query = query.start_after(docs[-1])
+
+        if not await self.finish_rollup_generation(survey_ref, meta_ref, generation):
+            print(f"DEBUG: Rollup generation {generation} of survey {survey.id} was superseded")
+            return None
+
+        # Older generations are no longer written or read
+        stale_refs = [doc.reference async for doc in survey_ref.collection(ROLLUP_COLLECTION).select([DOCUMENT_ID]).stream()
+                      if shard_generation(doc.id) < generation]
+        for chunk in chunked(stale_refs, WRITE_BATCH_SIZE):
+            batch = self.db.batch()
+            for ref in chunk:
+                batch.delete(ref)
+            await batch.commit()
+
+        shard_docs = await get_all_docs(self.db, self.get_rollup_refs(survey.id, generation, tenant))
+        return merge_rollups([doc.to_dict() for doc in shard_docs if doc.exists])
+
+    async def start_rollup_generation(self, survey_ref, meta_ref) -> Optional[int]:
+        """Open the next rollup generation of a survey; None if the survey is gone or being deleted"""
+        @firestore.async_transactional
+        async def start(transaction):
+            docs = {doc.reference.path: doc async for doc in self.db.get_all([survey_ref, meta_ref], transaction=transaction)}
+            survey_data = docs[survey_ref.path].to_dict()
+            if not survey_data or survey_data.get(DELETING_FIELD):
+                return None
+            generation = ((docs[meta_ref.path].to_dict() or {}).get(ROLLUP_GENERATION_FIELD) or 0) + 1
+            transaction.set(meta_ref, {ROLLUP_GENERATION_FIELD: generation}, merge=True)
+            return generation
+
+        return await start(self.db.transaction())
+
+    async def count_rollup_page(self, survey_ref, meta_ref, survey: SurveyWithQuestions, generation: int, shard: int, response_ids: List[str]) -> bool:
+        """Count a page of responses into a rollup generation, skipping those its markers show as counted.
+
+        Returns False, writing nothing, if the generation has been superseded
+        or the survey is being deleted.
+        """
+        response_refs = [survey_ref.collection("responses").document(response_id) for response_id in response_ids]
+        marker_refs = [survey_ref.collection(ROLLUP_MARKERS).document(response_id) for response_id in response_ids]
+        shard_ref = survey_ref.collection(ROLLUP_COLLECTION).document(f"{generation}-{shard}")
+
+        @firestore.async_transactional
+        async def count(transaction):
+            refs = [survey_ref, meta_ref] + response_refs + marker_refs
+            docs = {doc.reference.path: doc async for doc in self.db.get_all(refs, transaction=transaction)}
+            survey_data = docs[survey_ref.path].to_dict() or {}
+            meta_data = docs[meta_ref.path].to_dict() or {}
+            if meta_data.get(ROLLUP_GENERATION_FIELD) != generation or survey_data.get(DELETING_FIELD):
+                return False
+
+            answers = {}
+            for response_ref, marker_ref in zip(response_refs, marker_refs):
+                response_doc = docs[response_ref.path]
+                if response_doc.exists and (docs[marker_ref.path].to_dict() or {}).get("generation") != generation:
+                    answers[response_ref.id] = answers_map((response_doc.to_dict() or {}).get("answers"))
+            if not answers:
+                return True
+
+            columns = answer_columns(list(answers.values()), [question.id for question in survey.questions])
+            increments = rollup_increments({
+                "responses": len(answers),
+                "questions": {question.id: question_rollup(question, columns[question.id]) for question in survey.questions}
+            })
+            transaction.set(shard_ref, increments, merge=True)
+            for response_id, response_answers in answers.items():
+                transaction.set(survey_ref.collection(ROLLUP_MARKERS).document(response_id), {"generation": generation, "answers": response_answers})
+            return True
+
+        return await count(self.db.transaction())
+
+    async def finish_rollup_generation(self, survey_ref, meta_ref, generation: int) -> bool:
+        """Make a fully counted generation the one that is read, unless a newer one has been opened"""
+        @firestore.async_transactional
+        async def finish(transaction):
+            docs = {doc.reference.path: doc async for doc in self.db.get_all([survey_ref, meta_ref], transaction=transaction)}
+            survey_data = docs[survey_ref.path].to_dict()
+            meta_data = docs[meta_ref.path].to_dict() or {}
+            if not survey_data or survey_data.get(DELETING_FIELD) or meta_data.get(ROLLUP_GENERATION_FIELD) != generation:
+                return False
+            transaction.update(meta_ref, {ROLLUP_READY_FIELD: generation, "rebuilt_at": datetime.utcnow()})
+            return True
+
+        return await finish(self.db.transaction())
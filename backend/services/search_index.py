@@ -0,0 +1,38 @@
+from typing import List, Optional
+import re
+
+# Document field holding the search tokens, queried with array_contains
+SEARCH_FIELD = "search_tokens"
+
+# Longer prefixes are not indexed; longer queries are cut to this length
+MAX_PREFIX_LENGTH = 20
+
+def normalize_search(text: Optional[str]) -> str:
+    """Lowercase and collapse whitespace, so queries and tokens compare equal"""
+    return " ".join((text or "").lower().split())
+
+def prefixes(term: str) -> List[str]:
+    """All prefixes of a term, up to MAX_PREFIX_LENGTH characters"""
+    return [term[:length] for length in range(1, min(len(term), MAX_PREFIX_LENGTH) + 1)]
+
+def search_tokens(*values: Optional[str]) -> List[str]:
+    """Index tokens for the searchable values of a document.
+
+    Every word, every email part and the whole normalized value contribute
+    their prefixes, so both "smi" and "john sm" match "John Smith".
+    """
+    tokens = set()
+    for value in values:
+        text = normalize_search(value)
+        if not text:
+            continue
+        tokens.update(prefixes(text))
+        for word in re.split(r"[\s@.,;:!?()\"'/_-]+", text):
+            if word:
+                tokens.update(prefixes(word))
+    return sorted(tokens)
+
+def search_term(search: Optional[str]) -> Optional[str]:
+    """Token to look up for a search query, or None when nothing is searched"""
+    text = normalize_search(search)[:MAX_PREFIX_LENGTH].rstrip()
+    return text or None
@@ -1,97 +1,92 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import uuid
 
 from models.schemas import (
     Survey, SurveyCreate, SurveyUpdate, SurveyWithQuestions, 
-    SurveyStatus, PaginatedResponse, SurveyQuestionCreate
+    SurveyStatus, PaginatedResponse, SurveyQuestionCreate, Job
 )
 from models.database import get_db, COLLECTIONS
+from firebase_admin import firestore
+from services.tenant_service import TenantContext
+from services.pagination import paginate_query, next_cursor, count_query, DOCUMENT_ID
+from services.search_index import SEARCH_FIELD, search_tokens, search_term
 from services.question_service import QuestionService
+from services.counter_service import CounterService
+from services.job_service import JobService, JobProgress, is_job_active
+from services.bulk import delete_query, retry_on_conflict, WRITE_BATCH_SIZE
 # FieldFilter not available in older firestore version
 
+# Set on a survey while its deletion job runs: the survey reads as not found and
+# rejects writes, and the rollup trigger skips its responses
+DELETING_FIELD = "deleting"
+
+def is_deleting(survey_data: dict) -> bool:
+    """Whether a survey is being deleted by a background job"""
+    return bool(survey_data.get(DELETING_FIELD))
+
+# Field names the client console writes on the surveys it creates, by the API field each stands for
+CONSOLE_SURVEY_FIELDS = {
+    "title": "name",
+    "created_by": "createdBy",
+    "created_at": "createdAt",
+    "updated_at": "updatedAt",
+    "question_ids": "questions",
+    "question_count": "questionCount",
+}
+
+def is_console_survey(survey_data: dict) -> bool:
+    """Whether a survey document was created from the client console, under its field names"""
+    return "created_by" not in survey_data and "createdBy" in survey_data
+
+def survey_fields(survey_data: dict) -> dict:
+    """Survey document data under the API's field names.
+
+    Console-created surveys keep their own names (name, createdBy, createdAt,
+    questions, ...); they read here as API surveys, and one never edited was
+    last updated when it was created.
+    """
+    data = dict(survey_data)
+    for field, console_field in CONSOLE_SURVEY_FIELDS.items():
+        value = data.pop(console_field, None)
+        if data.get(field) is None and value is not None:
+            data[field] = value
+    if data.get("updated_at") is None:
+        data["updated_at"] = data.get("created_at")
+    return data
+
+def survey_update_fields(survey_data: dict, update_data: dict) -> dict:
+    """An update to a survey under the field names its document uses, so console surveys stay readable in the console"""
+    if not is_console_survey(survey_data):
+        return update_data
+    return {CONSOLE_SURVEY_FIELDS.get(field, field): value for field, value in update_data.items()}
+
 class SurveyService:
     def __init__(self):
         self.db = get_db()
         self.question_service = QuestionService()
+        self.counter_service = CounterService()
+        self.job_service = JobService()
     
-    async def find_client_by_email(self, client_email: str):
-        """Find client document ID by email"""
-        try:
-            print(f"DEBUG: Searching for client with email: {client_email}")
-            # Search through all superadmin documents
-            superadmin_collection = self.db.collection("superadmin")
-            superadmin_docs = superadmin_collection.stream()
-            
-            for superadmin_doc in superadmin_docs:
-                print(f"DEBUG: Checking superadmin: {superadmin_doc.id}")
-                # Search through clients in this superadmin
-                clients_collection = superadmin_doc.reference.collection("clients")
-                clients_docs = clients_collection.where("email", "==", client_email).stream()
-                
-                for client_doc in clients_docs:
-                    print(f"DEBUG: Found client {client_doc.id} in superadmin {superadmin_doc.id}")
-                    return {
-                        "superadmin_id": superadmin_doc.id,
-                        "client_id": client_doc.id
-                    }
-            
-            print(f"DEBUG: Client not found")
-            return None
-        except Exception as e:
-            print(f"ERROR finding client: {e}")
-            return None
-    
-    async def ensure_client_exists(self, client_info: dict, client_email: str):
-        """Ensure client document exists in Firestore"""
-        try:
-            client_doc_ref = self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"])
-            client_doc = client_doc_ref.get()
-            
-            if not client_doc.exists:
-                # Create client document if it doesn't exist
-                client_data = {
-                    "email": client_email,
-                    "created_at": datetime.utcnow(),
-                    "status": "active"
-                }
-                client_doc_ref.set(client_data)
-                print(f"DEBUG: Created client document for {client_email} with ID {client_info['client_id']}")
-        except Exception as e:
-            print(f"ERROR ensuring client exists: {e}")
-    
-    async def get_client_surveys_collection(self, client_email: str):
+    def get_client_surveys_collection(self, tenant: TenantContext):
         """Get the surveys collection for a specific client"""
-        client_info = await self.find_client_by_email(client_email)
-        
-        if not client_info:
-            raise ValueError(f"Failed to create/find client admin: {client_email}")
-        
-        # Ensure client document exists
-        await self.ensure_client_exists(client_info, client_email)
-        
-        path = f"superadmin/{client_info['superadmin_id']}/clients/{client_info['client_id']}/surveys"
-        print(f"DEBUG: Using Firestore path: {path}")
-        
-        return self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"]).collection("surveys")
+        return tenant.collection("surveys")
     
-    async def get_client_survey_questions_collection(self, client_email: str):
+    def get_client_survey_questions_collection(self, tenant: TenantContext):
         """Get the survey_questions collection for a specific client"""
-        client_info = await self.find_client_by_email(client_email)
-        
-        if not client_info:
-            raise ValueError(f"Failed to create/find client admin: {client_email}")
-        
-        # Ensure client document exists
-        await self.ensure_client_exists(client_info, client_email)
+        return tenant.collection("survey_questions")
+
+    async def create_survey(self, survey_data: SurveyCreate, tenant: TenantContext) -> Survey:
+        """Create a new survey, with its initial questions, in a single batch"""
+        question_ids = list(dict.fromkeys(survey_data.question_ids))  # Drop repeated IDs, keep order
         
-        path = f"superadmin/{client_info['superadmin_id']}/clients/{client_info['client_id']}/survey_questions"
-        print(f"DEBUG: Using Firestore path: {path}")
+        # Validate all initial questions with one multi-get before writing anything
+        if question_ids:
+            questions = await self.question_service.get_questions_by_ids(question_ids, tenant)
+            missing_ids = set(question_ids) - {question.id for question in questions}
+            if missing_ids:
+                raise ValueError(f"Questions not found: {', '.join(sorted(missing_ids))}")
         
-        return self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"]).collection("survey_questions")
-
-    async def create_survey(self, survey_data: SurveyCreate, created_by: str) -> Survey:
-        """Create a new survey"""
         # Create new survey
         survey_id = str(uuid.uuid4())
         now = datetime.utcnow()
@@ -103,136 +98,148 @@ class SurveyService:
             status=survey_data.status,
             created_at=now,
             updated_at=now,
-            created_by=created_by,
-            question_count=0
+            created_by=tenant.email,
+            question_count=len(question_ids),
+            question_ids=question_ids
         )
         
-        # Save to client-specific Firestore collection
-        collection = await self.get_client_surveys_collection(created_by)
-        collection.document(survey_id).set(survey.dict())
-        
-        # Add questions to survey if provided
-        if survey_data.question_ids:
-            for i, question_id in enumerate(survey_data.question_ids):
-                await self.add_question_to_survey(survey_id, question_id, i, created_by)
-            
-            # Update question count
-            survey.question_count = len(survey_data.question_ids)
-            collection.document(survey_id).update({"question_count": survey.question_count})
+        # Save to client-specific Firestore collection; the ordered question list is
+        # embedded in the survey document, so survey and counters are a single batch
+        collection = self.get_client_surveys_collection(tenant)
+        survey_doc = survey.dict()
+        survey_doc[SEARCH_FIELD] = search_tokens(survey.title, survey.description)
+        # A new survey has no responses, so its result rollup starts out complete
+        from services.results_service import ROLLUP_META_COLLECTION, initial_rollup_meta
+        batch = self.db.batch()
+        batch.set(collection.document(survey_id), survey_doc)
+        batch.set(tenant.collection(ROLLUP_META_COLLECTION).document(survey_id), initial_rollup_meta())
+        self.counter_service.track(batch, tenant, "surveys", None, survey.dict())
+        await batch.commit()
         
         return survey
 
     async def get_surveys(
         self, 
-        created_by: str, 
+        tenant: TenantContext, 
         page: int = 1, 
         size: int = 10,
         search: Optional[str] = None,
-        status: Optional[SurveyStatus] = None
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None
     ) -> PaginatedResponse:
         """Get paginated list of surveys"""
-        collection = await self.get_client_surveys_collection(created_by)
-        query = collection.where("created_by", "==", created_by)
+        collection = self.get_client_surveys_collection(tenant)
+        query = collection.where("created_by", "==", tenant.email)
         
         # Apply filters
         if status:
             query = query.where("status", "==", status.value)
-        
-        # Get total count
-        total_docs = query.get()
-        total = len(list(total_docs))
-        
-        # Get documents without ordering (to avoid index requirement)
-        docs = query.limit(size * page).get()
+        term = search_term(search)
+        if term:
+            query = query.where(SEARCH_FIELD, "array_contains", term)
+        
+        # Get total count from the tenant counters (a single document read);
+        # searches are not counted, so those count the matching keys, up to a cap
+        total_is_approximate = False
+        if term:
+            total, total_is_approximate = await count_query(query)
+        elif status:
+            total = await self.counter_service.count(tenant, "surveys", "status", status)
+        else:
+            total = await self.counter_service.count(tenant, "surveys")
+        
+        # Fetch only the requested page, ordered by document ID (no composite index needed)
+        docs = await paginate_query(query, page, size, cursor).get()
         
         surveys = []
         for doc in docs:
-            survey_data = doc.to_dict()
+            survey_data = survey_fields(doc.to_dict())
+            if is_deleting(survey_data):
+                continue
             survey_data["id"] = doc.id
-            
-            # Apply search filter (client-side for simplicity)
-            if search:
-                search_lower = search.lower()
-                if (search_lower not in survey_data["title"].lower() and 
-                    search_lower not in (survey_data.get("description", "") or "").lower()):
-                    continue
-            
             surveys.append(Survey(**survey_data))
         
-        # Simple client-side pagination
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        paginated_surveys = surveys[start_idx:end_idx]
-        
         pages = (total + size - 1) // size
         
         return PaginatedResponse(
-            items=[survey.dict() for survey in paginated_surveys],
+            items=[survey.dict() for survey in surveys],
             total=total,
             page=page,
             size=size,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor(docs, size),
+            total_is_approximate=total_is_approximate
         )
 
-    async def get_survey_by_id(self, survey_id: str, created_by: str) -> Optional[Survey]:
+    async def get_survey_by_id(self, survey_id: str, tenant: TenantContext) -> Optional[Survey]:
         """Get survey by ID"""
-        collection = await self.get_client_surveys_collection(created_by)
-        doc = collection.document(survey_id).get()
+        collection = self.get_client_surveys_collection(tenant)
+        doc = await collection.document(survey_id).get()
         
         if not doc.exists:
             return None
         
-        survey_data = doc.to_dict()
+        survey_data = survey_fields(doc.to_dict())
         survey_data["id"] = doc.id
         
         # Check if survey belongs to the current client admin
-        if survey_data.get("created_by") != created_by:
+        if survey_data.get("created_by") != tenant.email or is_deleting(survey_data):
             return None
         
         return Survey(**survey_data)
 
-    async def get_survey_with_questions(self, survey_id: str, created_by: str) -> Optional[SurveyWithQuestions]:
+    async def get_survey_with_questions(self, survey_id: str, tenant: TenantContext) -> Optional[SurveyWithQuestions]:
         """Get survey with its questions"""
-        survey = await self.get_survey_by_id(survey_id, created_by)
-        if not survey:
-            return None
+        doc = await self.get_client_surveys_collection(tenant).document(survey_id).get()
         
-        # Get survey questions from client-specific collection
-        survey_questions_collection = await self.get_client_survey_questions_collection(created_by)
-        survey_questions_docs = survey_questions_collection.where(
-            "survey_id", "==", survey_id
-        ).get()
+        if not doc.exists:
+            return None
         
-        # Sort by order (client-side since we can't use order_by without index)
-        survey_questions_data = []
-        for doc in survey_questions_docs:
-            data = doc.to_dict()
-            data["id"] = doc.id
-            survey_questions_data.append(data)
+        survey_data = survey_fields(doc.to_dict())
+        survey_data["id"] = doc.id
         
-        survey_questions_data.sort(key=lambda x: x.get("order", 0))
+        # Check if survey belongs to the current client admin
+        if survey_data.get("created_by") != tenant.email or is_deleting(survey_data):
+            return None
         
-        question_ids = [data["question_id"] for data in survey_questions_data]
-        questions = await self.question_service.get_questions_by_ids(question_ids, created_by)
+        # Ordered question IDs come with the survey; their questions are one multi-get
+        survey_data["question_ids"] = await self.get_question_ids(survey_id, survey_data, tenant)
+        questions = await self.question_service.get_questions_by_ids(survey_data["question_ids"], tenant)
         
         return SurveyWithQuestions(
-            **survey.dict(),
+            **survey_data,
             questions=questions
         )
 
-    async def update_survey(self, survey_id: str, survey_data: SurveyUpdate, created_by: str) -> Optional[Survey]:
+    async def get_question_ids(self, survey_id: str, survey_data: dict, tenant: TenantContext) -> List[str]:
+        """Ordered question IDs of a survey, read from the legacy mappings if it predates question_ids"""
+        if "question_ids" in survey_data:
+            return list(survey_data["question_ids"])
+        
+        survey_questions_collection = self.get_client_survey_questions_collection(tenant)
+        survey_questions_docs = await survey_questions_collection.where(
+            "survey_id", "==", survey_id
+        ).get()
+        
+        # Sort by order (client-side since we can't use order_by without index)
+        survey_questions_data = [doc.to_dict() for doc in survey_questions_docs]
+        survey_questions_data.sort(key=lambda x: x.get("order", 0))
+        
+        return [data["question_id"] for data in survey_questions_data]
+
+    async def update_survey(self, survey_id: str, survey_data: SurveyUpdate, tenant: TenantContext) -> Optional[Survey]:
         """Update survey"""
-        collection = await self.get_client_surveys_collection(created_by)
+        collection = self.get_client_surveys_collection(tenant)
         doc_ref = collection.document(survey_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return None
         
-        current_data = doc.to_dict()
+        current_data = survey_fields(doc.to_dict())
         
         # Check if survey belongs to the current client admin
-        if current_data.get("created_by") != created_by:
+        if current_data.get("created_by") != tenant.email or is_deleting(current_data):
             return None
         
         # Update fields
@@ -241,145 +248,229 @@ class SurveyService:
             update_data["title"] = survey_data.title
         if survey_data.description is not None:
             update_data["description"] = survey_data.description
+        if survey_data.title is not None or survey_data.description is not None:
+            update_data[SEARCH_FIELD] = search_tokens(
+                update_data.get("title", current_data.get("title")),
+                update_data.get("description", current_data.get("description"))
+            )
         if survey_data.status is not None:
             update_data["status"] = survey_data.status.value
         
         update_data["updated_at"] = datetime.utcnow()
         
-        # Update document
-        doc_ref.update(update_data)
+        # Update document and counters together
+        await self.commit_survey_update(doc_ref, doc, update_data, tenant)
         
         # Return updated survey
-        updated_doc = doc_ref.get()
-        updated_data = updated_doc.to_dict()
+        updated_doc = await doc_ref.get()
+        updated_data = survey_fields(updated_doc.to_dict())
         updated_data["id"] = updated_doc.id
         
         return Survey(**updated_data)
 
-    async def delete_survey(self, survey_id: str, created_by: str) -> bool:
-        """Delete survey"""
-        collection = await self.get_client_surveys_collection(created_by)
+    async def delete_survey(self, survey_id: str, tenant: TenantContext) -> Tuple[Optional[Job], bool]:
+        """Start deleting a survey and everything under it.
+
+        Returns the deletion job (None if the survey is not found) and
+        whether it was newly created and still has to be run.
+        """
+        collection = self.get_client_surveys_collection(tenant)
         doc_ref = collection.document(survey_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
-            return False
+            return None, False
         
-        survey_data = doc.to_dict()
+        survey_data = survey_fields(doc.to_dict())
         
         # Check if survey belongs to the current client admin
-        if survey_data.get("created_by") != created_by:
-            return False
+        if survey_data.get("created_by") != tenant.email:
+            return None, False
         
-        # Delete survey questions mappings from client-specific collection
-        survey_questions_collection = await self.get_client_survey_questions_collection(created_by)
-        survey_questions_docs = survey_questions_collection.where(
-            "survey_id", "==", survey_id
-        ).get()
+        # A deletion already under way is reported instead of being started twice
+        if survey_data.get("deletion_job_id"):
+            job = await self.job_service.get_job(survey_data["deletion_job_id"])
+            if is_job_active(job):
+                return job, False
         
-        for doc in survey_questions_docs:
-            doc.reference.delete()
+        job = await self.job_service.create_job("delete_survey", tenant.email, {"survey_id": survey_id})
         
-        # Delete survey
-        doc_ref.delete()
+        # Flag the survey first, so no new assignments or edits land behind the job's cursor;
+        # a flagged survey no longer counts towards the survey counters
+        update_data = {"deletion_job_id": job.id, DELETING_FIELD: True, "updated_at": datetime.utcnow()}
+        await self.commit_survey_update(doc_ref, doc, update_data, tenant)
         
-        return True
+        return job, True
 
-    async def add_question_to_survey(self, survey_id: str, question_id: str, order: int, created_by: str) -> bool:
-        """Add a question to a survey"""
-        # Verify survey exists and belongs to user
-        survey = await self.get_survey_by_id(survey_id, created_by)
-        if not survey:
-            return False
+    async def delete_survey_cascade(self, survey_id: str, tenant: TenantContext, progress: JobProgress):
+        """Delete a survey's responses, assignments and legacy mappings in batches, then the survey"""
+        doc_ref = self.get_client_surveys_collection(tenant).document(survey_id)
+        
+        await self.delete_survey_children(doc_ref, survey_id, tenant, progress)
+        
+        # Final sweep for anything written by requests that read the survey before it was flagged
+        await self.delete_survey_children(doc_ref, survey_id, tenant, progress)
+        
+        # Delete survey last, so a failed job can be retried without leaving orphans
+        doc = await doc_ref.get()
+        if doc.exists:
+            batch = self.db.batch()
+            batch.delete(doc_ref, option=self.db.write_option(last_update_time=doc.update_time))
+            self.counter_service.track(batch, tenant, "surveys", doc.to_dict(), None)
+            await batch.commit()
+            await progress.add("surveys", 1)
+
+    async def delete_survey_children(self, doc_ref, survey_id: str, tenant: TenantContext, progress: JobProgress):
+        """One pass over everything stored under or about a survey, deleting it in batches"""
+        # Responses (surveys/{id}/responses), keys only
+        await delete_query(
+            self.db, doc_ref.collection("responses").select([DOCUMENT_ID]),
+            on_progress=lambda count: progress.add("responses", count)
+        )
+        
+        # Assignments, uncounted in the same batches (one op per batch is kept for the counters)
+        await delete_query(
+            self.db,
+            tenant.collection("survey_assignments").where("survey_id", "==", survey_id).select(["is_active"]),
+            page_size=WRITE_BATCH_SIZE - 1,
+            before_commit=lambda batch, docs: self.counter_service.track_many(
+                batch, tenant, "assignments", [(doc.to_dict(), None) for doc in docs]
+            ),
+            on_progress=lambda count: progress.add("assignments", count)
+        )
         
+        # Result rollup shards, the per-response markers of what they count and the rollup state
+        from services.results_service import ROLLUP_COLLECTION, ROLLUP_MARKERS, ROLLUP_META_COLLECTION
+        await delete_query(
+            self.db, doc_ref.collection(ROLLUP_COLLECTION).select([DOCUMENT_ID]),
+            on_progress=lambda count: progress.add("rollup_shards", count)
+        )
+        await delete_query(
+            self.db, doc_ref.collection(ROLLUP_MARKERS).select([DOCUMENT_ID]),
+            on_progress=lambda count: progress.add("rollup_markers", count)
+        )
+        await tenant.collection(ROLLUP_META_COLLECTION).document(survey_id).delete()
+        
+        # Legacy survey question mappings (surveys that predate question_ids)
+        await delete_query(
+            self.db,
+            self.get_client_survey_questions_collection(tenant).where("survey_id", "==", survey_id).select([DOCUMENT_ID]),
+            on_progress=lambda count: progress.add("survey_questions", count)
+        )
+
+    async def add_question_to_survey(self, survey_id: str, question_id: str, order: Optional[int], tenant: TenantContext) -> bool:
+        """Add a question to a survey at position order (appended if order is None)"""
         # Verify question exists and belongs to user
-        question = await self.question_service.get_question_by_id(question_id, created_by)
+        question = await self.question_service.get_question_by_id(question_id, tenant)
         if not question:
             return False
         
-        # Check if question is already in survey
-        survey_questions_collection = await self.get_client_survey_questions_collection(created_by)
-        existing_docs = survey_questions_collection.where(
-            "survey_id", "==", survey_id
-        ).where(
-            "question_id", "==", question_id
-        ).limit(1).get()
-        
-        if len(list(existing_docs)) > 0:
-            return False  # Question already in survey
-        
-        # Add question to survey
-        survey_question_id = str(uuid.uuid4())
-        survey_question_data = {
-            "id": survey_question_id,
-            "survey_id": survey_id,
-            "question_id": question_id,
-            "order": order,
-            "created_at": datetime.utcnow()
-        }
-        
-        survey_questions_collection.document(survey_question_id).set(survey_question_data)
-        
-        # Update question count
-        current_count = survey.question_count
-        surveys_collection = await self.get_client_surveys_collection(created_by)
-        surveys_collection.document(survey_id).update({"question_count": current_count + 1})
-        
-        return True
+        doc_ref = self.get_client_surveys_collection(tenant).document(survey_id)
+        
+        async def attempt() -> bool:
+            doc = await doc_ref.get()
+            if not doc.exists:
+                return False
+            
+            survey_data = survey_fields(doc.to_dict())
+            if survey_data.get("created_by") != tenant.email or is_deleting(survey_data):
+                return False
+            
+            # Check if question is already in survey
+            question_ids = await self.get_question_ids(survey_id, survey_data, tenant)
+            if question_id in question_ids:
+                return False  # Question already in survey
+            
+            if order is None:
+                question_ids.append(question_id)
+            else:
+                question_ids.insert(max(0, order), question_id)
+            
+            # The list is rewritten under a precondition and the count set from it, so
+            # concurrent or retried adds cannot make question_count drift
+            await self.commit_survey_update(doc_ref, doc, {
+                "question_ids": question_ids,
+                "question_count": len(question_ids)
+            }, tenant)
+            return True
+        
+        return await retry_on_conflict(attempt)
 
-    async def remove_question_from_survey(self, survey_id: str, question_id: str, created_by: str) -> bool:
+    async def remove_question_from_survey(self, survey_id: str, question_id: str, tenant: TenantContext) -> bool:
         """Remove a question from a survey"""
-        # Verify survey exists and belongs to user
-        survey = await self.get_survey_by_id(survey_id, created_by)
-        if not survey:
-            return False
-        
-        # Find and delete the survey question mapping
-        survey_questions_collection = await self.get_client_survey_questions_collection(created_by)
-        survey_questions_docs = survey_questions_collection.where(
-            "survey_id", "==", survey_id
-        ).where(
-            "question_id", "==", question_id
-        ).limit(1).get()
-        
-        docs_list = list(survey_questions_docs)
-        if len(docs_list) == 0:
-            return False
-        
-        # Delete the mapping
-        docs_list[0].reference.delete()
-        
-        # Update question count
-        current_count = survey.question_count
-        surveys_collection = await self.get_client_surveys_collection(created_by)
-        surveys_collection.document(survey_id).update({"question_count": max(0, current_count - 1)})
+        doc_ref = self.get_client_surveys_collection(tenant).document(survey_id)
         
-        return True
+        async def attempt() -> bool:
+            # Verify survey exists and belongs to user
+            doc = await doc_ref.get()
+            if not doc.exists:
+                return False
+            
+            survey_data = survey_fields(doc.to_dict())
+            if survey_data.get("created_by") != tenant.email or is_deleting(survey_data):
+                return False
+            
+            # A question that is already gone changes nothing
+            question_ids = await self.get_question_ids(survey_id, survey_data, tenant)
+            if question_id not in question_ids:
+                return False
+            
+            question_ids.remove(question_id)
+            await self.commit_survey_update(doc_ref, doc, {
+                "question_ids": question_ids,
+                "question_count": len(question_ids)
+            }, tenant)
+            return True
+        
+        return await retry_on_conflict(attempt)
 
-    async def update_survey_status(self, survey_id: str, status: SurveyStatus, created_by: str) -> Optional[Survey]:
+    async def update_survey_status(self, survey_id: str, status: SurveyStatus, tenant: TenantContext) -> Optional[Survey]:
         """Update survey status"""
-        collection = await self.get_client_surveys_collection(created_by)
+        collection = self.get_client_surveys_collection(tenant)
         doc_ref = collection.document(survey_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return None
         
-        current_data = doc.to_dict()
+        current_data = survey_fields(doc.to_dict())
         
         # Check if survey belongs to the current client admin
-        if current_data.get("created_by") != created_by:
+        if current_data.get("created_by") != tenant.email or is_deleting(current_data):
             return None
         
         # Update status
-        doc_ref.update({
+        await self.commit_survey_update(doc_ref, doc, {
             "status": status.value,
             "updated_at": datetime.utcnow()
-        })
+        }, tenant)
         
         # Return updated survey
-        updated_doc = doc_ref.get()
-        updated_data = updated_doc.to_dict()
+        updated_doc = await doc_ref.get()
+        updated_data = survey_fields(updated_doc.to_dict())
         updated_data["id"] = updated_doc.id
         
         return Survey(**updated_data)
+
+    async def commit_survey_update(self, doc_ref, doc, update_data: dict, tenant: TenantContext):
+        """Apply an update and its counter changes atomically, failing if the survey changed since it was read"""
+        current_data = doc.to_dict()
+        update_data = survey_update_fields(current_data, update_data)
+        batch = self.db.batch()
+        batch.update(doc_ref, update_data, option=self.db.write_option(last_update_time=doc.update_time))
+        self.counter_service.track(batch, tenant, "surveys", current_data, {**current_data, **update_data})
+        await batch.commit()
+
+    async def reconcile_question_count(self, doc, tenant: TenantContext) -> int:
+        """Recompute a survey snapshot's question_count from its question list, fixing any drift"""
+        survey_data = survey_fields(doc.to_dict())
+        question_ids = await self.get_question_ids(doc.id, survey_data, tenant)
+        
+        if survey_data.get("question_count") != len(question_ids):
+            print(f"DEBUG: Reconciling question_count for survey {doc.id}: {survey_data.get('question_count')} -> {len(question_ids)}")
+            await doc.reference.update(
+                survey_update_fields(doc.to_dict(), {"question_count": len(question_ids)}),
+                option=self.db.write_option(last_update_time=doc.update_time)
+            )
+        
+        return len(question_ids)
@@ -0,0 +1,315 @@
+from typing import Optional
+from datetime import datetime
+from collections import OrderedDict
+import os
+import threading
+import time
+
+from models.database import get_db, COLLECTIONS
+from firebase_admin import auth
+from services.auth_executor import run_auth_call
+
+# Subcollections that live under superadmin/{superadmin_id}/clients/{client_id}
+CLIENT_COLLECTIONS = ["users", "questions", "surveys", "survey_questions", "survey_assignments", "stats", "users_by_email"]
+
+# Client status that locks a client admin out of the API
+CLIENT_INACTIVE_STATUS = "inactive"
+
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", "1024"))
+TENANT_CACHE_TTL = float(os.getenv("TENANT_CACHE_TTL", "300"))
+
+def normalize_email(email: str) -> str:
+    """Normalize an email address for use as a lookup key"""
+    return (email or "").strip().lower()
+
+class TenantContext:
+    """A client tenant resolved once per request and passed to every service method"""
+
+    def __init__(self, email: str, superadmin_id: Optional[str] = None, client_id: Optional[str] = None,
+                 client_ref=None, status: Optional[str] = None, collections: Optional[dict] = None):
+        self.email = email  # Client admin email, stored as created_by/assigned_by
+        self.superadmin_id = superadmin_id
+        self.client_id = client_id
+        self.client_ref = client_ref
+        self.status = status
+        self.collections = collections or {}
+
+    @property
+    def is_resolved(self) -> bool:
+        return self.client_ref is not None
+
+    @property
+    def path(self) -> str:
+        return f"superadmin/{self.superadmin_id}/clients/{self.client_id}"
+
+    def collection(self, name: str):
+        """Get a tenant subcollection without any Firestore round trip"""
+        if not self.is_resolved:
+            raise ValueError(f"Failed to create/find client admin: {self.email}")
+        return self.collections.get(name) or self.client_ref.collection(name)
+
+    def for_email(self, email: str) -> "TenantContext":
+        """Copy of this context bound to the exact email used by the request"""
+        if email == self.email:
+            return self
+        return TenantContext(email, self.superadmin_id, self.client_id, self.client_ref, self.status, self.collections)
+
+class TenantCache:
+    """Bounded LRU cache of client email -> TenantContext, with per-entry TTL"""
+
+    def __init__(self, maxsize: int = TENANT_CACHE_SIZE, ttl: float = TENANT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> Optional[TenantContext]:
+        key = normalize_email(email)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, tenant = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return tenant
+
+    def set(self, email: str, tenant: TenantContext):
+        key = normalize_email(email)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, tenant)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str):
+        with self._lock:
+            self._entries.pop(normalize_email(email), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Process-wide cache shared by every service instance
+tenant_cache = TenantCache()
+
+# UIDs whose tenant custom claims were already written by this process
+_claims_provisioned = set()
+
+def invalidate_client(client_email: str):
+    """Drop a client's cached tenant info (call on client create/deactivate/delete)"""
+    tenant_cache.invalidate(client_email)
+
+class TenantService:
+    """Resolves a client admin email to its superadmin/client tenant path"""
+
+    def __init__(self):
+        self.db = get_db()
+
+    def get_client_ref(self, superadmin_id: str, client_id: str):
+        """Get the client document reference for a tenant"""
+        return self.db.collection("superadmin").document(superadmin_id).collection("clients").document(client_id)
+
+    def build_tenant(self, superadmin_id: str, client_id: str, client_email: str, status: Optional[str] = None) -> TenantContext:
+        """Build the cached tenant context, including the client collection references"""
+        client_ref = self.get_client_ref(superadmin_id, client_id)
+        return TenantContext(
+            email=client_email,
+            superadmin_id=superadmin_id,
+            client_id=client_id,
+            client_ref=client_ref,
+            status=status,
+            collections={name: client_ref.collection(name) for name in CLIENT_COLLECTIONS}
+        )
+
+    async def remember_client(self, client_email: str, superadmin_id: str, client_id: str) -> Optional[TenantContext]:
+        """Seed the cache from trusted token claims, with one client document read per cache TTL.
+
+        The read picks up the client's current status, so a client deactivated
+        or deleted after its token was minted loses access within the TTL
+        instead of when the token expires. Returns None if the client is gone.
+        """
+        cached = tenant_cache.get(client_email)
+        if cached and cached.superadmin_id == superadmin_id and cached.client_id == client_id:
+            return cached
+
+        client_doc = await self.get_client_ref(superadmin_id, client_id).get()
+        client_data = client_doc.to_dict() or {}
+        if not client_doc.exists or normalize_email(client_data.get("email")) != normalize_email(client_email):
+            return None
+
+        tenant = self.build_tenant(superadmin_id, client_id, client_email, client_data.get("status"))
+        tenant_cache.set(client_email, tenant)
+        return tenant
+
+    async def set_client_claims(self, uid: str, superadmin_id: str, client_id: str) -> bool:
+        """Store the tenant identity as custom claims on a client admin's Firebase Auth user"""
+        try:
+            user_record = await run_auth_call(auth.get_user, uid)
+            claims = dict(user_record.custom_claims or {})
+
+            if claims.get("superadmin_id") == superadmin_id and claims.get("client_id") == client_id:
+                return True
+
+            claims.update({"superadmin_id": superadmin_id, "client_id": client_id})
+            await run_auth_call(auth.set_custom_user_claims, uid, claims)
+            print(f"DEBUG: Set tenant claims for {uid}: {superadmin_id}/{client_id}")
+            return True
+        except Exception as e:
+            print(f"ERROR setting tenant claims for {uid}: {e}")
+            return False
+
+    def start_claims_provisioning(self, uid: str) -> bool:
+        """Whether claims still have to be written for a uid; only the first caller per process gets True.
+
+        Checked before scheduling the write, so a failing Auth backend is not
+        retried, and no task is queued, on every request.
+        """
+        if uid in _claims_provisioned:
+            return False
+        _claims_provisioned.add(uid)
+        return True
+
+    async def find_client_by_email(self, client_email: str) -> Optional[TenantContext]:
+        """Find client tenant info by email, using the shared cache when possible"""
+        cached = tenant_cache.get(client_email)
+        if cached:
+            return cached
+
+        client_info = await self.lookup_client_index(client_email)
+        if not client_info:
+            # Cold path: scan the tenant tree and repair the index for next time
+            client_info = await self.scan_for_client(client_email)
+            if not client_info:
+                return None
+
+            # Ensure client document exists
+            await self.ensure_client_exists(client_info, client_email)
+            await self.index_client(
+                client_info["superadmin_id"], client_info["client_id"], client_email, client_info.get("status")
+            )
+
+        tenant = self.build_tenant(
+            client_info["superadmin_id"], client_info["client_id"], client_email, client_info.get("status")
+        )
+        tenant_cache.set(client_email, tenant)
+        return tenant
+
+    def get_index_ref(self, client_email: str):
+        """Get the reverse-index document for a client email"""
+        return self.db.collection(COLLECTIONS["client_email_index"]).document(normalize_email(client_email))
+
+    async def lookup_client_index(self, client_email: str) -> Optional[dict]:
+        """Resolve a client email with a single point read on the reverse index"""
+        try:
+            index_doc = await self.get_index_ref(client_email).get()
+            if not index_doc.exists:
+                return None
+
+            index_data = index_doc.to_dict()
+            if not index_data.get("superadmin_id") or not index_data.get("client_id"):
+                return None
+
+            return {
+                "superadmin_id": index_data["superadmin_id"],
+                "client_id": index_data["client_id"],
+                "status": index_data.get("status")
+            }
+        except Exception as e:
+            print(f"ERROR reading client index: {e}")
+            return None
+
+    async def index_client(self, superadmin_id: str, client_id: str, client_email: str, status: Optional[str] = None):
+        """Write (or refresh) the reverse-index entry for a client"""
+        try:
+            await self.get_index_ref(client_email).set({
+                "superadmin_id": superadmin_id,
+                "client_id": client_id,
+                "email": client_email,
+                "status": status,
+                "updated_at": datetime.utcnow()
+            })
+        except Exception as e:
+            print(f"ERROR writing client index: {e}")
+
+    async def remove_client_index(self, client_email: str):
+        """Remove the reverse-index entry for a client"""
+        try:
+            await self.get_index_ref(client_email).delete()
+        except Exception as e:
+            print(f"ERROR removing client index: {e}")
+        invalidate_client(client_email)
+
+    async def scan_for_client(self, client_email: str) -> Optional[dict]:
+        """Find client document ID by email by scanning every superadmin"""
+        try:
+            print(f"DEBUG: Searching for client with email: {client_email}")
+            # Search through all superadmin documents
+            superadmin_collection = self.db.collection("superadmin")
+            superadmin_docs = superadmin_collection.stream()
+
+            async for superadmin_doc in superadmin_docs:
+                print(f"DEBUG: Checking superadmin: {superadmin_doc.id}")
+                # Search through clients in this superadmin
+                clients_collection = superadmin_doc.reference.collection("clients")
+                clients_docs = clients_collection.where("email", "==", client_email).stream()
+
+                async for client_doc in clients_docs:
+                    print(f"DEBUG: Found client {client_doc.id} in superadmin {superadmin_doc.id}")
+                    return {
+                        "superadmin_id": superadmin_doc.id,
+                        "client_id": client_doc.id,
+                        "status": client_doc.to_dict().get("status")
+                    }
+
+            print(f"DEBUG: Client not found")
+            return None
+        except Exception as e:
+            print(f"ERROR finding client: {e}")
+            return None
+
+    async def ensure_client_exists(self, client_info: dict, client_email: str):
+        """Ensure client document exists in Firestore"""
+        try:
+            client_doc_ref = self.get_client_ref(client_info["superadmin_id"], client_info["client_id"])
+            client_doc = await client_doc_ref.get()
+
+            if not client_doc.exists:
+                # Create client document if it doesn't exist
+                client_data = {
+                    "email": client_email,
+                    "created_at": datetime.utcnow(),
+                    "status": "active"
+                }
+                await client_doc_ref.set(client_data)
+                invalidate_client(client_email)
+                print(f"DEBUG: Created client document for {client_email} with ID {client_info['client_id']}")
+        except Exception as e:
+            print(f"ERROR ensuring client exists: {e}")
+
+    async def get_context(self, client_email: str) -> TenantContext:
+        """Resolve the tenant context for a request; unresolved if the client is unknown"""
+        tenant = await self.find_client_by_email(client_email)
+        if not tenant:
+            print(f"DEBUG: Client admin not found: {client_email}")
+            return TenantContext(client_email)
+
+        print(f"DEBUG: Using Firestore path: {tenant.path}")
+        return tenant.for_email(client_email)
@@ -0,0 +1,130 @@
+from typing import AsyncIterator, List, Optional, Tuple
+import codecs
+import csv
+import json
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Columns (CSV) or keys (NDJSON) read from each row
+IMPORT_FIELDS = ("full_name", "email")
+
+class ImportFormatError(ValueError):
+    """Raised when an upload cannot be read as the requested format"""
+
+def detect_format(content_type: Optional[str], requested: Optional[str] = None) -> str:
+    """Pick the import format from an explicit request or the upload's content type"""
+    if requested:
+        if requested not in IMPORT_FORMATS:
+            raise ImportFormatError(f"Unsupported import format: {requested}")
+        return requested
+
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    raise ImportFormatError("Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson")
+
+async def iter_lines(chunks: AsyncIterator[bytes], keepends: bool = False) -> AsyncIterator[str]:
+    """Decode a streamed UTF-8 body into lines without buffering the whole upload"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n" if keepends else line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending if keepends else pending.rstrip("\r")
+
+def ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV line ends inside a quoted field, given whether it started inside one.
+
+    Follows the csv module's default dialect: a quote opens a field only at
+    its start, and a doubled quote inside a quoted field is a literal quote.
+    """
+    field_start = not quoted
+    after_close = False
+    for char in line:
+        if quoted:
+            if char == '"':
+                quoted = False
+                after_close = True
+            continue
+        if char == '"' and (field_start or after_close):
+            quoted = True  # An opening quote, or the second half of a doubled one
+            continue
+        field_start = char == ","
+        after_close = False
+    return quoted
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """Parse a streamed CSV body into records, keeping line breaks inside quoted fields.
+
+    Lines are gathered until no quoted field is left open, so only the
+    record being read is held in memory; blank lines come out as empty records.
+    """
+    record = []
+    quoted = False
+    async for line in iter_lines(chunks, keepends=True):
+        record.append(line)
+        quoted = ends_quoted(line, quoted)
+        if quoted:
+            continue
+        yield next(csv.reader(record), [])
+        record = []
+    if record:
+        # Unterminated quote at the end of the upload: csv reads it up to the end
+        yield next(csv.reader(record), [])
+
+async def iter_import_rows(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row number, row data, error) for each non-empty data row of an upload"""
+    if fmt == "csv":
+        rows = iter_csv_rows(chunks)
+    else:
+        rows = iter_ndjson_rows(chunks)
+
+    row_number = 0
+    async for row, error in rows:
+        row_number += 1
+        if error:
+            yield row_number, None, error
+        else:
+            yield row_number, {field: row.get(field) for field in IMPORT_FIELDS}, None
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Optional[dict], Optional[str]]]:
+    """Yield (row, error) for each non-empty CSV record after the header"""
+    header = None
+    async for values in iter_csv_records(chunks):
+        if not any(value.strip() for value in values):
+            continue
+
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            missing = [field for field in IMPORT_FIELDS if field not in header]
+            if missing:
+                raise ImportFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+            continue
+
+        yield dict(zip(header, (value.strip() for value in values))), None
+
+    if header is None:
+        raise ImportFormatError("CSV upload is empty")
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Optional[dict], Optional[str]]]:
+    """Yield (row, error) for each non-empty NDJSON line"""
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield None, "Each line must be a JSON object"
+            continue
+
+        yield row, None
@@ -1,167 +1,256 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from datetime import datetime
 import uuid
 
-from models.schemas import User, UserCreate, UserUpdate, PaginatedResponse
+from pydantic import ValidationError
+from google.api_core.exceptions import AlreadyExists
+
+from models.schemas import User, UserCreate, UserUpdate, PaginatedResponse, UserImportRow, UserImportResult
 from models.database import get_db, COLLECTIONS
+from services.tenant_service import TenantContext, normalize_email
+from services.pagination import paginate_query, next_cursor, count_query
+from services.search_index import SEARCH_FIELD, search_tokens, search_term
+from services.counter_service import CounterService
+from services.bulk import get_all_docs, retry_on_conflict, WRITE_BATCH_SIZE
 # FieldFilter not available in older firestore version
 from firebase_admin import auth
+from services.auth_executor import run_auth_call
+
+# Import rows per batch: each user is written with its email index entry, and one op is kept for the counters
+IMPORT_WINDOW_SIZE = (WRITE_BATCH_SIZE - 1) // 2
 
 class UserService:
     def __init__(self):
         self.db = get_db()
+        self.counter_service = CounterService()
     
-    async def find_client_by_email(self, client_email: str):
-        """Find client document ID by email"""
-        try:
-            print(f"DEBUG: Searching for client with email: {client_email}")
-            # Search through all superadmin documents
-            superadmin_collection = self.db.collection("superadmin")
-            superadmin_docs = superadmin_collection.stream()
-            
-            for superadmin_doc in superadmin_docs:
-                print(f"DEBUG: Checking superadmin: {superadmin_doc.id}")
-                # Search through clients in this superadmin
-                clients_collection = superadmin_doc.reference.collection("clients")
-                clients_docs = clients_collection.where("email", "==", client_email).stream()
-                
-                for client_doc in clients_docs:
-                    print(f"DEBUG: Found client {client_doc.id} in superadmin {superadmin_doc.id}")
-                    return {
-                        "superadmin_id": superadmin_doc.id,
-                        "client_id": client_doc.id
-                    }
-            
-            print(f"DEBUG: Client not found")
-            return None
-        except Exception as e:
-            print(f"ERROR finding client: {e}")
-            return None
-    
-    async def ensure_client_exists(self, client_info: dict, client_email: str):
-        """Ensure client document exists in Firestore"""
-        try:
-            client_doc_ref = self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"])
-            client_doc = client_doc_ref.get()
-            
-            if not client_doc.exists:
-                # Create client document if it doesn't exist
-                client_data = {
-                    "email": client_email,
-                    "created_at": datetime.utcnow(),
-                    "status": "active"
-                }
-                client_doc_ref.set(client_data)
-                print(f"DEBUG: Created client document for {client_email} with ID {client_info['client_id']}")
-        except Exception as e:
-            print(f"ERROR ensuring client exists: {e}")
-    
-    async def get_client_users_collection(self, client_email: str):
+    def get_client_users_collection(self, tenant: TenantContext):
         """Get the users collection for a specific client"""
-        client_info = await self.find_client_by_email(client_email)
-        
-        if not client_info:
-            print(f"DEBUG: Client admin not found, returning empty collection for: {client_email}")
+        if not tenant.is_resolved:
+            print(f"DEBUG: Client admin not found, returning empty collection for: {tenant.email}")
             return self.db.collection("_non_existent_collection_")
         
-        # Ensure client document exists
-        await self.ensure_client_exists(client_info, client_email)
-        
-        path = f"superadmin/{client_info['superadmin_id']}/clients/{client_info['client_id']}/users"
-        print(f"DEBUG: Using Firestore path: {path}")
-        
-        return self.db.collection("superadmin").document(client_info["superadmin_id"]).collection("clients").document(client_info["client_id"]).collection("users")
+        return tenant.collection("users")
 
-    async def create_user(self, user_data: UserCreate, created_by: str) -> User:
+    async def create_user(self, user_data: UserCreate, tenant: TenantContext) -> User:
         """Create a new user"""
-        collection = await self.get_client_users_collection(created_by)
-        
-        # Check if user with email already exists for this client admin
-        existing_users = collection.where(
-            "email", "==", user_data.email
-        ).where(
-            "created_by", "==", created_by
-        ).limit(1).get()
-        
-        if len(list(existing_users)) > 0:
-            raise ValueError("User with this email already exists")
+        collection = self.get_client_users_collection(tenant)
         
         # Create new user
-        user_id = str(uuid.uuid4())
-        now = datetime.utcnow()
+        user = self.new_user(user_data, tenant, datetime.utcnow())
+        
+        # The email index entry is created in the same batch as the user, so a
+        # taken email fails the whole write instead of racing a prior query
+        batch = self.db.batch()
+        batch.create(self.get_email_index_ref(user.email, tenant), self.email_index_document(user))
+        batch.set(collection.document(user.id), self.user_document(user))
+        self.counter_service.track(batch, tenant, "users", None, user.dict())
+        try:
+            await batch.commit()
+        except AlreadyExists:
+            raise ValueError("User with this email already exists")
         
-        user = User(
-            id=user_id,
+        return user
+
+    def get_email_index_ref(self, email: str, tenant: TenantContext):
+        """Get the email uniqueness entry for a client: users_by_email/{normalized email}"""
+        return tenant.collection("users_by_email").document(normalize_email(email))
+
+    async def get_owned_email_index_entry(self, email: str, user_id: str, tenant: TenantContext):
+        """The email index entry of a user's email, or None if it is missing or points at another user"""
+        if not normalize_email(email):
+            return None
+        index_doc = await self.get_email_index_ref(email, tenant).get()
+        if not index_doc.exists or (index_doc.to_dict() or {}).get("user_id") != user_id:
+            return None
+        return index_doc
+
+    def delete_email_index_entry(self, batch, index_doc):
+        """Delete an email index entry in a batch, failing it if the entry changed since it was read"""
+        if index_doc is not None:
+            batch.delete(index_doc.reference, option=self.db.write_option(last_update_time=index_doc.update_time))
+
+    def email_index_document(self, user: User) -> dict:
+        """Email index entry pointing at the user that owns the email"""
+        return {"user_id": user.id, "email": user.email, "created_at": user.created_at}
+
+    def new_user(self, user_data: UserCreate, tenant: TenantContext, now: datetime) -> User:
+        """Build a new pending user owned by the client admin"""
+        return User(
+            id=str(uuid.uuid4()),
             full_name=user_data.full_name,
             email=user_data.email,
             is_active=False,
             status="pending",
             created_at=now,
             updated_at=now,
-            created_by=created_by
+            created_by=tenant.email
         )
+
+    def user_document(self, user: User) -> dict:
+        """Firestore document for a user, including its search tokens"""
+        user_doc = user.dict()
+        user_doc[SEARCH_FIELD] = search_tokens(user.full_name, user.email)
+        return user_doc
+
+    async def import_users(self, rows: AsyncIterator, tenant: TenantContext) -> UserImportResult:
+        """Create users from streamed (row number, data, error) rows, reporting every row"""
+        result = UserImportResult()
+        seen_emails = set()
+        window = []
+        
+        async for row_number, row_data, error in rows:
+            if error:
+                result.rows.append(UserImportRow(row=row_number, status="invalid", error=error))
+                continue
+            
+            try:
+                user_data = UserCreate(**row_data)
+                if "@" not in user_data.email:
+                    raise ValueError("Invalid email address")
+            except (ValidationError, ValueError, TypeError) as e:
+                result.rows.append(UserImportRow(row=row_number, email=row_data.get("email"), status="invalid", error=str(e)))
+                continue
+            
+            # Dedupe within the file on the normalized email
+            email_key = normalize_email(user_data.email)
+            if email_key in seen_emails:
+                result.rows.append(UserImportRow(row=row_number, email=user_data.email, status="duplicate_in_file"))
+                continue
+            seen_emails.add(email_key)
+            
+            # Process a window at a time, so uploads of any size use bounded memory
+            window.append((row_number, user_data))
+            if len(window) >= IMPORT_WINDOW_SIZE:
+                await self.import_window(window, tenant, result)
+                window = []
         
-        # Save to client-specific Firestore collection
-        collection.document(user_id).set(user.dict())
+        if window:
+            await self.import_window(window, tenant, result)
         
-        return user
+        result.rows.sort(key=lambda row: row.row)
+        result.created = sum(1 for row in result.rows if row.status == "created")
+        result.failed = sum(1 for row in result.rows if row.status == "failed")
+        result.skipped = len(result.rows) - result.created - result.failed
+        
+        return result
+
+    async def import_window(self, window: list, tenant: TenantContext, result: UserImportResult):
+        """Check one window of import rows against the email index and create the new users in one batch"""
+        collection = self.get_client_users_collection(tenant)
+        existing_emails = await self.find_existing_emails([user_data.email for _, user_data in window], tenant)
+        
+        now = datetime.utcnow()
+        created = []
+        for row_number, user_data in window:
+            if normalize_email(user_data.email) in existing_emails:
+                result.rows.append(UserImportRow(row=row_number, email=user_data.email, status="already_exists"))
+                continue
+            created.append((row_number, self.new_user(user_data, tenant, now)))
+        
+        error = "Users changed concurrently, please retry"
+        
+        for attempt in range(2):
+            if not created:
+                return
+            
+            # One batch for the window: each user and its email index entry, plus the counters write
+            batch = self.db.batch()
+            for _, user in created:
+                batch.create(self.get_email_index_ref(user.email, tenant), self.email_index_document(user))
+                batch.set(collection.document(user.id), self.user_document(user))
+            self.counter_service.track_many(batch, tenant, "users", [(None, user.dict()) for _, user in created])
+            
+            try:
+                await batch.commit()
+            except AlreadyExists:
+                # Another request took some of these emails after they were checked;
+                # record those and retry the rest once
+                existing_emails = await self.find_existing_emails([user.email for _, user in created], tenant)
+                remaining = []
+                for row_number, user in created:
+                    if normalize_email(user.email) in existing_emails:
+                        result.rows.append(UserImportRow(row=row_number, email=user.email, status="already_exists"))
+                    else:
+                        remaining.append((row_number, user))
+                created = remaining
+                continue
+            except Exception as e:
+                print(f"ERROR committing user import batch: {e}")
+                error = str(e)
+                break
+            
+            result.rows.extend(
+                UserImportRow(row=row_number, email=user.email, status="created", user_id=user.id) for row_number, user in created
+            )
+            return
+        
+        result.rows.extend(
+            UserImportRow(row=row_number, email=user.email, status="failed", error=error) for row_number, user in created
+        )
+
+    async def find_existing_emails(self, emails: List[str], tenant: TenantContext) -> set:
+        """Normalized emails already taken in the client, read from the email index with chunked multi-gets"""
+        refs = [self.get_email_index_ref(email, tenant) for email in emails]
+        docs = await get_all_docs(self.db, refs)
+        return {doc.id for doc in docs if doc.exists}
 
     async def get_users(
         self, 
-        created_by: str, 
+        tenant: TenantContext, 
         page: int = 1, 
         size: int = 10,
         search: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None
     ) -> PaginatedResponse:
         """Get paginated list of users"""
-        collection = await self.get_client_users_collection(created_by)
-        query = collection.where("created_by", "==", created_by)
+        collection = self.get_client_users_collection(tenant)
+        query = collection.where("created_by", "==", tenant.email)
         
         # Apply filters
         if is_active is not None:
             query = query.where("is_active", "==", is_active)
-        
-        # Get total count
-        total_docs = query.get()
-        total = len(list(total_docs))
-        
-        # Get documents without ordering (to avoid index requirement)
-        docs = query.limit(size * page).get()
+        term = search_term(search)
+        if term:
+            query = query.where(SEARCH_FIELD, "array_contains", term)
+        
+        # Get total count from the tenant counters (a single document read);
+        # searches are not counted, so those count the matching keys, up to a cap
+        total = 0
+        total_is_approximate = False
+        if term:
+            total, total_is_approximate = await count_query(query)
+        elif tenant.is_resolved and is_active is not None:
+            total = await self.counter_service.count(tenant, "users", "is_active", is_active)
+        elif tenant.is_resolved:
+            total = await self.counter_service.count(tenant, "users")
+        
+        # Fetch only the requested page, ordered by document ID (no composite index needed)
+        docs = await paginate_query(query, page, size, cursor).get()
         
         users = []
         for doc in docs:
             user_data = doc.to_dict()
             user_data["id"] = doc.id
-            
-            # Apply search filter (client-side for simplicity)
-            if search:
-                search_lower = search.lower()
-                if (search_lower not in user_data["full_name"].lower() and 
-                    search_lower not in user_data["email"].lower()):
-                    continue
-            
             users.append(User(**user_data))
         
-        # Simple client-side pagination
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        paginated_users = users[start_idx:end_idx]
-        
         pages = (total + size - 1) // size
         
         return PaginatedResponse(
-            items=[user.dict() for user in paginated_users],
+            items=[user.dict() for user in users],
             total=total,
             page=page,
             size=size,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor(docs, size),
+            total_is_approximate=total_is_approximate
         )
 
-    async def get_user_by_id(self, user_id: str, created_by: str) -> Optional[User]:
+    async def get_user_by_id(self, user_id: str, tenant: TenantContext) -> Optional[User]:
         """Get user by ID"""
-        collection = await self.get_client_users_collection(created_by)
-        doc = collection.document(user_id).get()
+        collection = self.get_client_users_collection(tenant)
+        doc = await collection.document(user_id).get()
         
         if not doc.exists:
             return None
@@ -170,65 +259,68 @@ class UserService:
         user_data["id"] = doc.id
         
         # Check if user belongs to the current client admin
-        if user_data.get("created_by") != created_by:
+        if user_data.get("created_by") != tenant.email:
             return None
         
         return User(**user_data)
 
-    async def update_user(self, user_id: str, user_data: UserUpdate, created_by: str) -> Optional[User]:
+    async def update_user(self, user_id: str, user_data: UserUpdate, tenant: TenantContext) -> Optional[User]:
         """Update user"""
-        collection = await self.get_client_users_collection(created_by)
+        collection = self.get_client_users_collection(tenant)
         doc_ref = collection.document(user_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            return None
         
-        current_data = doc.to_dict()
-        
-        # Check if user belongs to the current client admin
-        if current_data.get("created_by") != created_by:
-            return None
-        
-        # Check for email uniqueness if email is being updated
-        if user_data.email and user_data.email != current_data["email"]:
-            existing_users = collection.where(
-                "email", "==", user_data.email
-            ).where(
-                "created_by", "==", created_by
-            ).limit(1).get()
+        async def attempt() -> bool:
+            doc = await doc_ref.get()
+            if not doc.exists:
+                return False
+            
+            current_data = doc.to_dict()
+            
+            # Check if user belongs to the current client admin
+            if current_data.get("created_by") != tenant.email:
+                return False
+            
+            # Update fields
+            update_data = {}
+            if user_data.full_name is not None:
+                update_data["full_name"] = user_data.full_name
+            if user_data.email is not None:
+                update_data["email"] = user_data.email
+            if user_data.full_name is not None or user_data.email is not None:
+                update_data[SEARCH_FIELD] = search_tokens(
+                    update_data.get("full_name", current_data.get("full_name")),
+                    update_data.get("email", current_data.get("email"))
+                )
+            if user_data.is_active is not None:
+                update_data["is_active"] = user_data.is_active
+            if user_data.status is not None:
+                update_data["status"] = user_data.status
+            
+            update_data["updated_at"] = datetime.utcnow()
             
-            if len(list(existing_users)) > 0:
+            # Update document and counters together; an email change moves the index entry in the same batch
+            try:
+                await self.commit_user_update(doc_ref, doc, update_data, tenant)
+            except AlreadyExists:
                 raise ValueError("User with this email already exists")
+            return True
         
-        # Update fields
-        update_data = {}
-        if user_data.full_name is not None:
-            update_data["full_name"] = user_data.full_name
-        if user_data.email is not None:
-            update_data["email"] = user_data.email
-        if user_data.is_active is not None:
-            update_data["is_active"] = user_data.is_active
-        if user_data.status is not None:
-            update_data["status"] = user_data.status
-        
-        update_data["updated_at"] = datetime.utcnow()
-        
-        # Update document
-        doc_ref.update(update_data)
+        # A user changed since it was read is read and updated again
+        if not await retry_on_conflict(attempt):
+            return None
         
         # Return updated user
-        updated_doc = doc_ref.get()
+        updated_doc = await doc_ref.get()
         updated_data = updated_doc.to_dict()
         updated_data["id"] = updated_doc.id
         
         return User(**updated_data)
 
-    async def delete_user(self, user_id: str, created_by: str) -> bool:
+    async def delete_user(self, user_id: str, tenant: TenantContext) -> bool:
         """Delete user from both Firestore and Firebase Auth"""
-        collection = await self.get_client_users_collection(created_by)
+        collection = self.get_client_users_collection(tenant)
         doc_ref = collection.document(user_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return False
@@ -236,7 +328,7 @@ class UserService:
         user_data = doc.to_dict()
         
         # Check if user belongs to the current client admin
-        if user_data.get("created_by") != created_by:
+        if user_data.get("created_by") != tenant.email:
             return False
         
         # Delete from Firebase Auth first
@@ -246,8 +338,8 @@ class UserService:
             
             # Try to find user by email in Firebase Auth
             try:
-                user_record = auth_client.get_user_by_email(user_data["email"])
-                auth_client.delete_user(user_record.uid)
+                user_record = await run_auth_call(auth_client.get_user_by_email, user_data["email"])
+                await run_auth_call(auth_client.delete_user, user_record.uid)
                 print(f"Successfully deleted user from Firebase Auth: {user_data['email']}")
             except auth_client.UserNotFoundError:
                 print(f"User not found in Firebase Auth: {user_data['email']}")
@@ -257,11 +349,35 @@ class UserService:
         except Exception as e:
             print(f"Firebase Auth deletion error: {str(e)}")
         
-        # Delete from Firestore
-        doc_ref.delete()
+        # Delete from Firestore, with the email index entry only if it still belongs to this user
+        index_doc = await self.get_owned_email_index_entry(user_data.get("email"), user_id, tenant)
+        batch = self.db.batch()
+        batch.delete(doc_ref, option=self.db.write_option(last_update_time=doc.update_time))
+        self.delete_email_index_entry(batch, index_doc)
+        self.counter_service.track(batch, tenant, "users", user_data, None)
+        await batch.commit()
         
         return True
 
+    async def commit_user_update(self, doc_ref, doc, update_data: dict, tenant: TenantContext):
+        """Apply an update and its counter changes atomically, failing if the user changed since it was read"""
+        current_data = doc.to_dict()
+        new_email = update_data.get("email")
+        email_changed = new_email and normalize_email(new_email) != normalize_email(current_data.get("email"))
+        index_doc = await self.get_owned_email_index_entry(current_data.get("email"), doc.id, tenant) if email_changed else None
+        
+        batch = self.db.batch()
+        batch.update(doc_ref, update_data, option=self.db.write_option(last_update_time=doc.update_time))
+        if email_changed:
+            batch.create(self.get_email_index_ref(new_email, tenant), {
+                "user_id": doc.id,
+                "email": new_email,
+                "created_at": update_data.get("updated_at", datetime.utcnow())
+            })
+            self.delete_email_index_entry(batch, index_doc)
+        self.counter_service.track(batch, tenant, "users", current_data, {**current_data, **update_data})
+        await batch.commit()
+
     async def delete_user_completely(self, user_id: str, created_by: str) -> dict:
         """Delete user completely from both Firebase Auth and Firestore with detailed results"""
         result = {
@@ -276,7 +392,7 @@ class UserService:
             # Get user from flat users collection
             users_collection = self.db.collection("users")
             doc_ref = users_collection.document(user_id)
-            doc = doc_ref.get()
+            doc = await doc_ref.get()
             
             if not doc.exists:
                 result["errors"].append("User not found in Firestore")
@@ -295,7 +411,7 @@ class UserService:
                 from firebase_admin import auth as firebase_auth
                 
                 try:
-                    firebase_auth.delete_user(user_id)
+                    await run_auth_call(firebase_auth.delete_user, user_id)
                     result["firebase_auth_deleted"] = True
                     print(f"Successfully deleted user from Firebase Auth: {user_id}")
                 except firebase_auth.UserNotFoundError:
@@ -312,7 +428,7 @@ class UserService:
             
             # Delete from Firestore
             try:
-                doc_ref.delete()
+                await doc_ref.delete()
                 result["firestore_deleted"] = True
                 print(f"Successfully deleted user from Firestore: {user_id}")
             except Exception as firestore_error:
@@ -332,50 +448,56 @@ class UserService:
             result["success"] = False
             return result
 
-    async def toggle_user_status(self, user_id: str, created_by: str) -> Optional[User]:
+    async def toggle_user_status(self, user_id: str, tenant: TenantContext) -> Optional[User]:
         """Toggle user active status"""
-        collection = await self.get_client_users_collection(created_by)
+        collection = self.get_client_users_collection(tenant)
         doc_ref = collection.document(user_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            return None
-        
-        user_data = doc.to_dict()
         
-        # Check if user belongs to the current client admin
-        if user_data.get("created_by") != created_by:
+        async def attempt() -> bool:
+            doc = await doc_ref.get()
+            if not doc.exists:
+                return False
+            
+            user_data = doc.to_dict()
+            
+            # Check if user belongs to the current client admin
+            if user_data.get("created_by") != tenant.email:
+                return False
+            
+            # Determine new status based on current status
+            current_status = user_data.get("status", "pending")
+            current_is_active = user_data.get("is_active", False)
+            
+            if current_status == "pending":
+                # Pending -> Active
+                new_status = "active"
+                new_is_active = True
+            elif current_status == "active":
+                # Active -> Inactive
+                new_status = "inactive"
+                new_is_active = False
+            elif current_status == "inactive":
+                # Inactive -> Active
+                new_status = "active"
+                new_is_active = True
+            else:
+                # Default toggle
+                new_is_active = not current_is_active
+                new_status = "active" if new_is_active else "inactive"
+            
+            await self.commit_user_update(doc_ref, doc, {
+                "is_active": new_is_active,
+                "status": new_status,
+                "updated_at": datetime.utcnow()
+            }, tenant)
+            return True
+        
+        # A user changed since it was read is toggled from its new status
+        if not await retry_on_conflict(attempt):
             return None
         
-        # Determine new status based on current status
-        current_status = user_data.get("status", "pending")
-        current_is_active = user_data.get("is_active", False)
-        
-        if current_status == "pending":
-            # Pending -> Active
-            new_status = "active"
-            new_is_active = True
-        elif current_status == "active":
-            # Active -> Inactive
-            new_status = "inactive"
-            new_is_active = False
-        elif current_status == "inactive":
-            # Inactive -> Active
-            new_status = "active"
-            new_is_active = True
-        else:
-            # Default toggle
-            new_is_active = not current_is_active
-            new_status = "active" if new_is_active else "inactive"
-        
-        doc_ref.update({
-            "is_active": new_is_active,
-            "status": new_status,
-            "updated_at": datetime.utcnow()
-        })
-        
         # Return updated user
-        updated_doc = doc_ref.get()
+        updated_doc = await doc_ref.get()
         updated_data = updated_doc.to_dict()
         updated_data["id"] = updated_doc.id
         
@@ -387,7 +509,7 @@ class UserService:
             # Query the flat users collection by email
             users_collection = self.db.collection("users")
             query = users_collection.where("email", "==", user_email).limit(1)
-            docs = query.get()
+            docs = await query.get()
             
             if not docs:
                 print(f"User not found in flat collection: {user_email}")
@@ -399,7 +521,7 @@ class UserService:
             # Only activate if currently pending
             if user_data.get("status") == "pending":
                 print(f"Activating user: {user_email}")
-                user_doc.reference.update({
+                await user_doc.reference.update({
                     "status": "active",
                     "is_active": True,
                     "activatedAt": datetime.utcnow(),
@@ -407,7 +529,7 @@ class UserService:
                 })
                 
                 # Get updated data
-                updated_doc = user_doc.reference.get()
+                updated_doc = await user_doc.reference.get()
                 updated_data = updated_doc.to_dict()
                 updated_data["id"] = updated_doc.id
                 
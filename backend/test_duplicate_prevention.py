@@ -4,9 +4,17 @@ Test script to verify that duplicate assignment prevention is working correctly.
 """
 
 from services.assignment_service import AssignmentService
-from models.schemas import SurveyAssignmentCreate
+from services.tenant_service import TenantService
+from models.schemas import SurveyAssignmentCreate, BulkAssignmentResult
 import asyncio
 
+def outcome_counts(result: BulkAssignmentResult) -> dict:
+    """Number of users per outcome status in a bulk assignment result"""
+    counts = {}
+    for outcome in result.outcomes:
+        counts[outcome.status] = counts.get(outcome.status, 0) + 1
+    return counts
+
 async def test_duplicate_prevention():
     """
     Test the duplicate prevention logic in the assignment service.
@@ -19,6 +27,7 @@ async def test_duplicate_prevention():
     test_user_ids = ["user_1", "user_2"]
     
     assignment_service = AssignmentService()
+    tenant = await TenantService().get_context(test_client_email)
     
     try:
         # Test 1: Create initial assignments
@@ -28,23 +37,23 @@ async def test_duplicate_prevention():
             user_ids=test_user_ids
         )
         
-        initial_assignments = await assignment_service.assign_survey_to_users(
-            assignment_data, test_client_email
+        initial_result = await assignment_service.assign_survey_to_users(
+            assignment_data, tenant
         )
         
-        print(f"   ✓ Created {len(initial_assignments)} initial assignments")
+        print(f"   ✓ Created {initial_result.assigned} initial assignments {outcome_counts(initial_result)}")
         
         # Test 2: Try to create duplicate assignments
         print("\n2. Attempting to create duplicate assignments...")
         try:
-            duplicate_assignments = await assignment_service.assign_survey_to_users(
-                assignment_data, test_client_email
+            duplicate_result = await assignment_service.assign_survey_to_users(
+                assignment_data, tenant
             )
             
-            if len(duplicate_assignments) == 0:
-                print("   ✓ Duplicate prevention working - no duplicates created")
+            if duplicate_result.assigned == 0:
+                print(f"   ✓ Duplicate prevention working - no duplicates created {outcome_counts(duplicate_result)}")
             else:
-                print(f"   ✗ FAILED - {len(duplicate_assignments)} duplicates were created!")
+                print(f"   ✗ FAILED - {duplicate_result.assigned} duplicates were created!")
                 
         except ValueError as e:
             if "already assigned" in str(e):
@@ -59,20 +68,22 @@ async def test_duplicate_prevention():
             user_ids=test_user_ids + ["user_3", "user_4"]  # Mix of existing and new users
         )
         
-        mixed_assignments = await assignment_service.assign_survey_to_users(
-            mixed_assignment_data, test_client_email
+        mixed_result = await assignment_service.assign_survey_to_users(
+            mixed_assignment_data, tenant
         )
         
-        expected_new_assignments = 2  # Only user_3 and user_4 should be assigned
-        if len(mixed_assignments) == expected_new_assignments:
-            print(f"   ✓ Mixed scenario working - created {len(mixed_assignments)} new assignments, skipped duplicates")
+        # Only user_3 and user_4 should be assigned; user_1 and user_2 are reported as already assigned
+        counts = outcome_counts(mixed_result)
+        expected_counts = {"already_assigned": 2, "assigned": 2}
+        if counts == expected_counts and mixed_result.assigned == 2 and mixed_result.skipped == 2:
+            print(f"   ✓ Mixed scenario working - created {mixed_result.assigned} new assignments, skipped {mixed_result.skipped} duplicates")
         else:
-            print(f"   ✗ FAILED - expected {expected_new_assignments} new assignments, got {len(mixed_assignments)}")
+            print(f"   ✗ FAILED - expected {expected_counts}, got {counts}")
         
         # Test 4: Verify assignments exist
         print("\n4. Verifying final assignment state...")
         survey_assignments = await assignment_service.get_survey_assignments(
-            test_survey_id, test_client_email
+            test_survey_id, tenant
         )
         
         expected_total = 4  # user_1, user_2, user_3, user_4
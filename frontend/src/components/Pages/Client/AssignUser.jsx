@@ -6,7 +6,7 @@ import { Badge } from "@/components/ui/badge";
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from "@/components/ui/dialog";
 import { Edit3, Trash2 } from "lucide-react";
 import { db, auth } from "../../../firebase";
-import { collection, getDocs, query, where, addDoc, updateDoc, doc, deleteDoc } from "firebase/firestore";
+import { collection, getDocs, query, where, setDoc, updateDoc, doc, deleteDoc } from "firebase/firestore";
 
 const AssignUser = ({
   profile,
@@ -311,7 +311,9 @@ const AssignUser = ({
               user_id: userId
             };
             
-            await addDoc(assignmentsRef, assignmentData);
+            // One document per survey and user ({survey_id}_{user_id}, as the API writes them),
+            // so concurrent or repeated assigns cannot create duplicates
+            await setDoc(doc(assignmentsRef, `${surveyId}_${userId}`), assignmentData);
             existingPairs.add(pairKey); // Prevent duplicates within this batch
             assignmentCount++;
           }
@@ -501,7 +503,7 @@ const AssignUser = ({
             user_id: editingUser.id
           };
           
-          await addDoc(assignmentsRef, assignmentData);
+          await setDoc(doc(assignmentsRef, `${surveyId}_${editingUser.id}`), assignmentData);
           assignmentCount++;
         }
         
@@ -5,7 +5,8 @@ import { Label } from "@/components/ui/label";
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from "@/components/ui/dialog";
 import { Edit3, Trash2, Plus } from "lucide-react";
 import { db, auth } from "../../../firebase";
-import { collection, addDoc, getDocs, doc, updateDoc, deleteDoc } from "firebase/firestore";
+import { collection, addDoc, getDocs, doc, updateDoc } from "firebase/firestore";
+import { apiService } from "../../../services/api";
 
 const CreateSurveysAPI = ({ profile, onProfileEdit, onLogout }) => {
   const [surveyName, setSurveyName] = useState("");
@@ -90,6 +91,8 @@ const CreateSurveysAPI = ({ profile, onProfileEdit, onLogout }) => {
       const snapshot = await getDocs(surveysRef);
       const surveysList = [];
       snapshot.forEach((doc) => {
+        // Surveys being deleted read as not found
+        if (doc.data().deleting) return;
         surveysList.push({
           id: doc.id,
           ...doc.data()
@@ -192,55 +195,30 @@ const CreateSurveysAPI = ({ profile, onProfileEdit, onLogout }) => {
   };
 
   const confirmDelete = async () => {
-    if (surveyToDelete) {
-      try {
-        const clientId = await getClientId();
-        if (!clientId) {
-          throw new Error('No client ID found for current user');
-        }
-        
-        // Delete all survey responses first
-        const responsesRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys", surveyToDelete.id, "responses");
-        const responsesSnapshot = await getDocs(responsesRef);
-        
-        const responseDeletePromises = [];
-        responsesSnapshot.forEach((responseDoc) => {
-          const responseRef = doc(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys", surveyToDelete.id, "responses", responseDoc.id);
-          responseDeletePromises.push(deleteDoc(responseRef));
-        });
-        
-        // Remove survey from all user assignments
-        const assignmentsRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "survey_assignments");
-        const assignmentsSnapshot = await getDocs(assignmentsRef);
-        
-        const assignmentDeletePromises = [];
-        assignmentsSnapshot.forEach((assignmentDoc) => {
-          const assignmentData = assignmentDoc.data();
-          if (assignmentData.survey_id === surveyToDelete.id) {
-            const assignmentRef = doc(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "survey_assignments", assignmentDoc.id);
-            assignmentDeletePromises.push(deleteDoc(assignmentRef));
-          }
-        });
-        
-        // Wait for all deletions to complete
-        await Promise.all([...responseDeletePromises, ...assignmentDeletePromises]);
-        
-        // Delete the survey
-        const surveyRef = doc(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys", surveyToDelete.id);
-        await deleteDoc(surveyRef);
-        
-        setMessage(`Survey deleted successfully! Removed ${responseDeletePromises.length} response(s) and ${assignmentDeletePromises.length} assignment(s).`);
-        setTimeout(() => setMessage(""), 3000);
-        
-        await loadSurveys();
-      } catch (error) {
-        console.error("Error deleting survey:", error);
-        setMessage("Failed to delete survey");
-        setTimeout(() => setMessage(""), 3000);
-      }
-    }
+    const survey = surveyToDelete;
     setIsDeleteModalOpen(false);
     setSurveyToDelete(null);
+    if (!survey) return;
+    
+    try {
+      // The backend deletes the survey with its responses, assignments and rollup in a
+      // background job, in bounded batches; the survey reads as gone as soon as it starts
+      setMessage("Deleting survey...");
+      const result = await apiService.deleteSurvey(survey.id);
+      await loadSurveys();
+      const job = await apiService.waitForJob(result.data.id);
+      
+      const responseCount = job.progress?.responses || 0;
+      const assignmentCount = job.progress?.assignments || 0;
+      setMessage(`Survey deleted successfully! Removed ${responseCount} response(s) and ${assignmentCount} assignment(s).`);
+      setTimeout(() => setMessage(""), 3000);
+      
+      await loadSurveys();
+    } catch (error) {
+      console.error("Error deleting survey:", error);
+      setMessage(`Failed to delete survey: ${error.message}`);
+      setTimeout(() => setMessage(""), 3000);
+    }
   };
 
   const cancelDelete = () => {
@@ -1,48 +1,36 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 
 import { BarChart3, Users, Calendar, ChevronDown, ChevronUp, ArrowUpDown, ArrowUp, ArrowDown } from "lucide-react";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { db, auth } from "../../../firebase";
-import { collection, getDocs, doc, getDoc, onSnapshot } from "firebase/firestore";
+import { collection, getDocs, onSnapshot } from "firebase/firestore";
+import { apiService } from "../../../services/api";
+
+// Responses shown per page of a survey's table
+const RESPONSES_PAGE_SIZE = 50;
 
 const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
   const [surveys, setSurveys] = useState([]);
   const [expandedSurvey, setExpandedSurvey] = useState(null);
   const [surveyResponses, setSurveyResponses] = useState({});
   const [loading, setLoading] = useState(false);
-  const [totalResponses, setTotalResponses] = useState(0);
-  const [locationCache, setLocationCache] = useState({});
+  const [surveyTotals, setSurveyTotals] = useState({});
+  const [surveyErrors, setSurveyErrors] = useState({});
+  const [responsePages, setResponsePages] = useState({});
   const [surveyQuestions, setSurveyQuestions] = useState({});
   const [sortConfig, setSortConfig] = useState({});
   const [filters, setFilters] = useState({});
   const [openDropdowns, setOpenDropdowns] = useState({});
-  const [unsubscribers, setUnsubscribers] = useState([]);
 
-  const getLocationName = async (lat, lng) => {
-    const cacheKey = `${lat},${lng}`;
-    if (locationCache[cacheKey]) {
-      return locationCache[cacheKey];
-    }
+  // Listeners live in refs so snapshot callbacks and the unmount cleanup see the current ones
+  const surveysUnsubscriber = useRef(null);
+  const rollupUnsubscribers = useRef({});
+  const expandedSurveyRef = useRef(null);
+  const responsePagesRef = useRef({});
 
-    try {
-      const response = await fetch(
-        `https://nominatim.openstreetmap.org/reverse?format=json&lat=${lat}&lon=${lng}&addressdetails=1`
-      );
-      const data = await response.json();
-      
-      if (data && data.display_name) {
-        const location = data.display_name;
-        setLocationCache(prev => ({ ...prev, [cacheKey]: location }));
-        return location;
-      }
-    } catch (error) {
-      console.error('Error fetching location:', error);
-    }
-    
-    return `${lat}, ${lng}`;
-  };
+  const totalResponses = Object.values(surveyTotals).reduce((sum, count) => sum + count, 0);
 
   const getClientId = async () => {
     try {
@@ -72,11 +60,9 @@ const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
     
     return () => {
       // Cleanup all listeners on unmount
-      unsubscribers.forEach(unsubscribe => {
-        if (typeof unsubscribe === 'function') {
-          unsubscribe();
-        }
-      });
+      if (surveysUnsubscriber.current) surveysUnsubscriber.current();
+      Object.values(rollupUnsubscribers.current).forEach(unsubscribe => unsubscribe());
+      rollupUnsubscribers.current = {};
     };
   }, []);
 
@@ -87,177 +73,152 @@ const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
 
       // Real-time listener for surveys
       const surveysRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys");
-      const unsubscribeSurveys = onSnapshot(surveysRef, (snapshot) => {
+      surveysUnsubscriber.current = onSnapshot(surveysRef, (snapshot) => {
         const surveysList = [];
         snapshot.forEach((doc) => {
+          const data = doc.data();
+          // Surveys being deleted read as not found
+          if (data.deleting) return;
           surveysList.push({
             id: doc.id,
-            ...doc.data()
+            ...data
           });
         });
         setSurveys(surveysList);
         
-        // Setup response listeners for each survey
+        // One rollup listener per survey: attach for new surveys, detach for removed ones
+        const surveyIds = new Set(surveysList.map(survey => survey.id));
         surveysList.forEach(survey => {
-          const responseUnsubscriber = setupResponseListener(survey.id, clientId);
-          setUnsubscribers(prev => [...prev, responseUnsubscriber]);
+          if (!rollupUnsubscribers.current[survey.id]) {
+            rollupUnsubscribers.current[survey.id] = setupResponseListener(survey.id, clientId);
+          }
+        });
+        Object.keys(rollupUnsubscribers.current).forEach(surveyId => {
+          if (!surveyIds.has(surveyId)) {
+            rollupUnsubscribers.current[surveyId]();
+            delete rollupUnsubscribers.current[surveyId];
+            setSurveyTotals(prev => {
+              const { [surveyId]: removed, ...rest } = prev;
+              return rest;
+            });
+          }
         });
       });
-
-      setUnsubscribers(prev => [...prev, unsubscribeSurveys]);
     } catch (error) {
       console.error("Error setting up real-time listeners:", error);
     }
   };
 
   const setupResponseListener = (surveyId, clientId) => {
-    const responsesRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys", surveyId, "responses");
+    // The survey's result rollup changes whenever a response is written; listening to its
+    // few shard documents avoids downloading every response on each change
+    const rollupRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys", surveyId, "rollup_shards");
     
-    return onSnapshot(responsesRef, async (snapshot) => {
-      // Update total responses count across all surveys
-      let total = 0;
-      const allSurveys = surveys.length > 0 ? surveys : await loadSurveysOnce();
-      for (const survey of allSurveys) {
-        const surveyResponsesRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys", survey.id, "responses");
-        const surveySnapshot = await getDocs(surveyResponsesRef);
-        total += surveySnapshot.docs.length;
+    return onSnapshot(rollupRef, async () => {
+      // Only the survey whose rollup changed is refetched
+      try {
+        const results = await apiService.getSurveyResults(surveyId);
+        setSurveyTotals(prev => ({
+          ...prev,
+          [surveyId]: results?.data?.total_responses || 0
+        }));
+      } catch (error) {
+        console.error("Error loading survey results:", error);
+        setSurveyErrors(prev => ({ ...prev, [surveyId]: `Could not load results: ${error.message}` }));
       }
-      setTotalResponses(total);
 
-      // Always update responses for this survey, regardless of expansion state
-      await loadSurveyResponses(surveyId, clientId);
+      // Refresh the page of responses on screen, if it belongs to this survey
+      if (expandedSurveyRef.current === surveyId) {
+        const page = responsePagesRef.current[surveyId];
+        await loadSurveyResponses(surveyId, page ? page.cursors[page.index] : null, page ? page.index : 0);
+      }
     });
   };
 
-  const loadSurveysOnce = async () => {
-    try {
-      const clientId = await getClientId();
-      if (!clientId) return [];
-
-      const surveysRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys");
-      const snapshot = await getDocs(surveysRef);
-      const surveysList = [];
-
-      snapshot.forEach((doc) => {
-        surveysList.push({
-          id: doc.id,
-          ...doc.data()
-        });
-      });
-
-      return surveysList;
-    } catch (error) {
-      console.error("Error loading surveys:", error);
-      return [];
-    }
-  };
-
-  const loadSurveyResponses = async (surveyId, clientId) => {
+  const loadSurveyResponses = async (surveyId, cursor = null, pageIndex = 0) => {
     try {
-      // Get responses and extract question IDs
-      const responsesRef = collection(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "surveys", surveyId, "responses");
-      const responsesSnapshot = await getDocs(responsesRef);
-      const questionIds = new Set();
+      // Only the visible page is loaded; the backend joins it with user names and question texts in bulk
       const questionsData = {};
-      
-      // Extract all question IDs from responses
-      responsesSnapshot.forEach((doc) => {
-        const data = doc.data();
-        if (data.answers) {
-          Object.keys(data.answers).forEach(questionId => {
-            questionIds.add(questionId);
-          });
-        }
-      });
-
-      // Fetch question details
-      for (const questionId of questionIds) {
-        try {
-          const questionRef = doc(db, "superadmin", "U0UjGVvDJoDbLtWAhyjp", "clients", clientId, "questions", questionId);
-          const questionDoc = await getDoc(questionRef);
-          if (questionDoc.exists()) {
-            const questionData = questionDoc.data();
-            questionsData[questionId] = questionData.question_text || questionData.text || questionData.question || `Question ${questionId}`;
-          }
-        } catch (err) {
-          console.error("Error fetching question:", err);
-        }
-      }
-
-      setSurveyQuestions(prev => ({
-        ...prev,
-        [surveyId]: questionsData
-      }));
-
       const responses = [];
-
-      for (const responseDoc of responsesSnapshot.docs) {
-        const responseData = responseDoc.data();
-
-        // Fetch user name using userId
-        let userName = 'N/A';
-        if (responseData.userId) {
-          try {
-            const userRef = doc(db, "users", responseData.userId);
-            const userDoc = await getDoc(userRef);
-            if (userDoc.exists()) {
-              const userData = userDoc.data();
-              userName = userData.full_name || userData.name || 'N/A';
-            }
-          } catch (err) {
-            console.error("Error fetching user:", err);
-          }
-        }
+      const params = { size: RESPONSES_PAGE_SIZE };
+      if (cursor) params.cursor = cursor;
+      const page = await apiService.getSurveyResponses(surveyId, params);
+
+      for (const response of page.items || []) {
+        const answers = {};
+        response.answers.forEach(({ question_id, question_text, answer }) => {
+          answers[question_id] = Array.isArray(answer) ? answer.join(", ") : answer;
+          questionsData[question_id] = question_text || `Question ${question_id}`;
+        });
 
         // Format timestamp
         let formattedDate = 'N/A';
-        if (responseData.submittedAt) {
-          try {
-            if (responseData.submittedAt.toDate) {
-              formattedDate = responseData.submittedAt.toDate().toLocaleString();
-            } else {
-              formattedDate = new Date(responseData.submittedAt).toLocaleString();
-            }
-          } catch (err) {
-            console.error("Error formatting date:", err);
-          }
+        if (response.submitted_at) {
+          formattedDate = new Date(response.submitted_at).toLocaleString();
         }
 
-        // Convert geoCode to location name
+        // Location names are resolved by the backend from its offline gazetteer
         let locationName = 'N/A';
-        if (responseData.geoCode && responseData.geoCode._lat && responseData.geoCode._long) {
-          locationName = await getLocationName(responseData.geoCode._lat, responseData.geoCode._long);
+        if (response.location_name) {
+          locationName = response.location_name;
+        } else if (response.latitude != null && response.longitude != null) {
+          locationName = `${response.latitude}, ${response.longitude}`;
         }
 
         responses.push({
-          id: responseDoc.id,
-          ...responseData,
-          userName: userName,
+          id: response.id,
+          userId: response.user_id,
+          answers,
+          userName: response.user_name || 'N/A',
           formattedSubmittedAt: formattedDate,
           locationName: locationName
         });
       }
 
+      // Cursors of the pages visited so far, so Previous can go back without re-reading from the start
+      const previous = responsePagesRef.current[surveyId];
+      const cursors = (previous ? previous.cursors : [null]).slice(0, pageIndex + 1);
+      cursors[pageIndex] = cursor;
+      if (page.next_cursor) cursors[pageIndex + 1] = page.next_cursor;
+      const pageState = { cursors, index: pageIndex, hasNext: Boolean(page.next_cursor) };
+      responsePagesRef.current = { ...responsePagesRef.current, [surveyId]: pageState };
+      setResponsePages(responsePagesRef.current);
+
+      setSurveyQuestions(prev => ({
+        ...prev,
+        [surveyId]: questionsData
+      }));
+
       setSurveyResponses(prev => ({
         ...prev,
         [surveyId]: responses
       }));
+      setSurveyErrors(prev => {
+        const { [surveyId]: cleared, ...rest } = prev;
+        return rest;
+      });
     } catch (error) {
       console.error("Error loading survey responses:", error);
+      setSurveyErrors(prev => ({ ...prev, [surveyId]: `Could not load responses: ${error.message}` }));
     }
   };
 
+  const showResponsePage = async (surveyId, pageIndex) => {
+    const page = responsePagesRef.current[surveyId];
+    if (!page || pageIndex < 0 || pageIndex >= page.cursors.length) return;
+    await loadSurveyResponses(surveyId, page.cursors[pageIndex], pageIndex);
+  };
+
   const toggleSurveyExpansion = async (surveyId) => {
     if (expandedSurvey === surveyId) {
+      expandedSurveyRef.current = null;
       setExpandedSurvey(null);
     } else {
+      expandedSurveyRef.current = surveyId;
       setExpandedSurvey(surveyId);
 
-      // Load responses for this survey
-      const clientId = await getClientId();
-      if (clientId) {
-        await loadSurveyResponses(surveyId, clientId);
-      }
+      // Load the first page of responses for this survey
+      await loadSurveyResponses(surveyId);
     }
   };
 
@@ -308,6 +269,7 @@ const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
                 const allResponses = surveyResponses[survey.id] || [];
                 const questions = surveyQuestions[survey.id] || {};
                 const questionIds = Object.keys(questions);
+                const pageState = responsePages[survey.id];
                 
                 // Apply filters
                 const filteredResponses = allResponses.filter(response => {
@@ -388,7 +350,7 @@ const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
                         <div className="flex-1">
                           <h3 className="text-xl font-semibold text-gray-900">{survey.name}</h3>
                           <div className="flex items-center gap-4 mt-2 text-sm text-gray-600">
-                            <span>Responses: {responses.length}</span>
+                            <span>Responses: {surveyTotals[survey.id] ?? 0}</span>
                             <span>•</span>
                             <div className="flex items-center gap-1">
                               <Calendar className="w-4 h-4" />
@@ -466,6 +428,11 @@ const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
                       {/* Expanded Content - Responses Table */}
                       {isExpanded && (
                         <div className="mt-6 border-t pt-6">
+                          {surveyErrors[survey.id] && (
+                            <div className="mb-4 p-3 rounded-md bg-red-50 text-sm text-red-700">
+                              {surveyErrors[survey.id]}
+                            </div>
+                          )}
                           {responses.length > 0 ? (
                             <div className="overflow-x-auto">
                               <table className="min-w-full divide-y divide-gray-200">
@@ -518,7 +485,7 @@ const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
                                 <tbody className="bg-white divide-y divide-gray-200">
                                   {responses.map((response, index) => (
                                     <tr key={response.id} className="hover:bg-gray-50">
-                                      <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{index + 1}</td>
+                                      <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{(pageState ? pageState.index * RESPONSES_PAGE_SIZE : 0) + index + 1}</td>
                                       {questionIds.map((questionId) => (
                                         <td key={questionId} className="px-6 py-4 whitespace-nowrap text-sm text-gray-900 max-w-xs truncate">
                                           {response.answers && response.answers[questionId] ? response.answers[questionId] : 'N/A'}
@@ -539,11 +506,30 @@ const SurveyResults = ({ profile, onProfileEdit, onLogout }) => {
                                 </tbody>
                               </table>
                             </div>
-                          ) : (
+                          ) : !surveyErrors[survey.id] && (
                             <div className="text-center py-8 text-gray-500">
                               No responses found for this survey
                             </div>
                           )}
+                          {pageState && (pageState.index > 0 || pageState.hasNext) && (
+                            <div className="flex items-center justify-end gap-2 mt-4">
+                              <span className="text-sm text-gray-600">Page {pageState.index + 1}</span>
+                              <Button
+                                onClick={() => showResponsePage(survey.id, pageState.index - 1)}
+                                variant="outline"
+                                disabled={pageState.index === 0}
+                              >
+                                Previous
+                              </Button>
+                              <Button
+                                onClick={() => showResponsePage(survey.id, pageState.index + 1)}
+                                variant="outline"
+                                disabled={!pageState.hasNext}
+                              >
+                                Next
+                              </Button>
+                            </div>
+                          )}
                         </div>
                       )}
                     </CardContent>
@@ -43,6 +43,7 @@ import { getAuth } from "firebase/auth";
 import { setSuperAdminUpdateCallback } from "../../../services/superAdminNotification";
 
 import { FIREBASE_CONFIG } from "../../../config/firebaseConfig";
+import { apiService } from "../../../services/api";
 
 // Create separate Firebase app for user creation (doesn't affect main auth state)
 const secondaryApp = initializeApp(FIREBASE_CONFIG, "secondary");
@@ -391,41 +392,13 @@ const SuperAdminDashboardAPI = () => {
     try {
       const superadminId = "U0UjGVvDJoDbLtWAhyjp";
       const newIsActive = !currentIsActive;
-      const newStatus = newIsActive ? "active" : "inactive";
       
-      // Update client status
-      await updateDoc(
-        doc(db, "superadmin", superadminId, "clients", clientId),
-        {
-          isActive: newIsActive,
-          status: newStatus
-        }
-      );
-      
-      // If deactivating client, also deactivate all users under this client
-      if (!newIsActive) {
-        const client = clientAdmins.find(c => c.id === clientId);
-        if (client) {
-          const globalUsersRef = collection(db, "users");
-          const globalUsersSnapshot = await getDocs(globalUsersRef);
-          
-          const updatePromises = [];
-          globalUsersSnapshot.forEach((userDoc) => {
-            const userData = userDoc.data();
-            if (userData.created_by === client.email) {
-              updatePromises.push(
-                updateDoc(doc(db, "users", userDoc.id), {
-                  status: "inactive",
-                  is_active: false
-                })
-              );
-            }
-          });
-          
-          await Promise.all(updatePromises);
-          console.log(`Deactivated ${updatePromises.length} users under client ${client.email}`);
-        }
+      // The backend updates the client and cascades the change to its users as a background job
+      const result = await apiService.setClientStatus(superadminId, clientId, newIsActive);
+      if (!result.success) {
+        throw new Error(result.message || "Client status change failed");
       }
+      console.log(`${result.message} (job ${result.data.id})`);
       
       setMessage(`Client ${newIsActive ? 'activated' : 'deactivated'} successfully!`);
       setTimeout(() => setMessage(""), 3000);
@@ -49,6 +49,9 @@ class ApiService {
   }
 
   async request(endpoint, options = {}) {
+    // Callers that must tell a failure from an empty result pass throwOnError
+    const { throwOnError = false, ...fetchOptions } = options;
+
     // Skip all API requests during user creation
     if (window.isCreatingUser) {
       console.log('DEBUG: Skipping API request during user creation');
@@ -58,6 +61,7 @@ class ApiService {
     const token = await this.getAuthToken();
     
     if (!token) {
+      if (throwOnError) throw new Error('Not signed in');
       return { items: [], total: 0, page: 1, size: 10, pages: 0 };
     }
     
@@ -65,9 +69,9 @@ class ApiService {
       headers: {
         'Content-Type': 'application/json',
         'Authorization': `Bearer ${token}`,
-        ...options.headers,
+        ...fetchOptions.headers,
       },
-      ...options,
+      ...fetchOptions,
     };
 
     if (config.body && typeof config.body === 'object') {
@@ -79,6 +83,7 @@ class ApiService {
       
       if (response.status === 401) {
         localStorage.removeItem('firebaseToken');
+        if (throwOnError) throw new Error('Session expired, please sign in again');
         return { items: [], total: 0, page: 1, size: 10, pages: 0 };
       }
       
@@ -89,6 +94,7 @@ class ApiService {
 
       return await response.json();
     } catch (error) {
+      if (throwOnError) throw error;
       // Silently return empty data for any error including network/auth errors
       return { items: [], total: 0, page: 1, size: 10, pages: 0 };
     }
@@ -181,6 +187,27 @@ class ApiService {
     return this.request(`/surveys/${surveyId}?include_questions=${includeQuestions}`);
   }
 
+  async getSurveyResults(surveyId) {
+    return this.request(`/surveys/${surveyId}/results`, { throwOnError: true });
+  }
+
+  async getSurveyResponses(surveyId, params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    return this.request(`/surveys/${surveyId}/responses?${queryString}`, { throwOnError: true });
+  }
+
+  async exportSurveyResponses(surveyId, format = 'csv') {
+    // The export is a file stream, not JSON, so it is fetched without request()
+    const token = await this.getAuthToken();
+    const response = await fetch(`${this.baseURL}/surveys/${surveyId}/export?format=${format}`, {
+      headers: { 'Authorization': `Bearer ${token}` },
+    });
+    if (!response.ok) {
+      throw new Error('Export failed');
+    }
+    return response.blob();
+  }
+
   async updateSurvey(surveyId, surveyData) {
     return this.request(`/surveys/${surveyId}`, {
       method: 'PUT',
@@ -191,11 +218,13 @@ class ApiService {
   async deleteSurvey(surveyId) {
     return this.request(`/surveys/${surveyId}`, {
       method: 'DELETE',
+      throwOnError: true,
     });
   }
 
-  async addQuestionToSurvey(surveyId, questionId, order = 0) {
-    return this.request(`/surveys/${surveyId}/questions/${questionId}?order=${order}`, {
+  async addQuestionToSurvey(surveyId, questionId, order = null) {
+    const query = order === null ? '' : `?order=${order}`;
+    return this.request(`/surveys/${surveyId}/questions/${questionId}${query}`, {
       method: 'POST',
     });
   }
@@ -251,6 +280,28 @@ class ApiService {
       method: 'DELETE',
     });
   }
+
+  // Superadmin endpoints
+  async setClientStatus(superadminId, clientId, isActive) {
+    const action = isActive ? 'reactivate' : 'deactivate';
+    return this.request(`/superadmin/${superadminId}/clients/${clientId}/${action}`, {
+      method: 'POST',
+    });
+  }
+
+  async getJob(jobId) {
+    return this.request(`/jobs/${jobId}`, { throwOnError: true });
+  }
+
+  // Poll a background job until it finishes; resolves with the job, or throws if it failed
+  async waitForJob(jobId, intervalMs = 1000) {
+    for (;;) {
+      const job = (await this.getJob(jobId)).data;
+      if (job.status === 'completed') return job;
+      if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+  }
 }
 
 export const apiService = new ApiService();